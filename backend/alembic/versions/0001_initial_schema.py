@@ -0,0 +1,63 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+Databases created by `create_all` before migrations existed already match this
+revision and only need `alembic stamp 0001`.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: str | Sequence[str] | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "idioms",
+        sa.Column("id", sa.UUID(), primary_key=True),
+        sa.Column("text", sa.String()),
+        sa.Column("meaning", sa.String()),
+        sa.Column("explanation", sa.TEXT()),
+        sa.Column("examples", sa.ARRAY(sa.String())),
+        sa.Column("frequency_of_use", sa.FLOAT()),
+        sa.Column("category_theme", sa.ARRAY(sa.String())),
+        sa.Column("sentiment", sa.ARRAY(sa.String())),
+        sa.Column("context_diversity", sa.ARRAY(sa.String())),
+        sa.Column("literal_transparency", sa.FLOAT()),
+        sa.Column("translation_difficulty", sa.FLOAT()),
+        sa.Column("depiction", sa.ARRAY(sa.String())),
+        sa.Column("alternative_depiction", sa.ARRAY(sa.String())),
+        sa.Column("meaning_depiction", sa.ARRAY(sa.String())),
+        sa.Column("favorite", sa.BOOLEAN()),
+        sa.Column("upvotes", sa.INTEGER()),
+        sa.Column("downvotes", sa.INTEGER()),
+        sa.Column("created_at", sa.TIMESTAMP(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.TIMESTAMP(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_idioms_id", "idioms", ["id"])
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.UUID(), primary_key=True),
+        sa.Column("api_key", sa.String()),
+        sa.Column("installation_id", sa.String()),
+        sa.Column("created_at", sa.TIMESTAMP(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.TIMESTAMP(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_api_key", "users", ["api_key"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table("users")
+    op.drop_table("idioms")
@@ -0,0 +1,49 @@
+"""Shuffle key for the seeded random feed
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: str | Sequence[str] | None = "0003"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # The default is volatile, so every existing row gets its own random key
+    op.add_column(
+        "idioms",
+        sa.Column(
+            "shuffle_key",
+            sa.INTEGER(),
+            nullable=False,
+            server_default=sa.text("floor(random() * 2147483647)::int"),
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_idioms_shuffle_key_id",
+            "idioms",
+            ["shuffle_key", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_idioms_shuffle_key_id",
+            table_name="idioms",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("idioms", "shuffle_key")
@@ -0,0 +1,102 @@
+"""Category vocabulary maintained by triggers on idioms
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: str | Sequence[str] | None = "0004"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+SYNC_CATEGORIES_FUNCTION = """
+CREATE OR REPLACE FUNCTION sync_idiom_categories() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO idiom_categories AS c (name, idiom_count)
+        SELECT name, count(*)
+        FROM (
+            SELECT DISTINCT id, unnest(context_diversity) AS name FROM new_idioms
+        ) AS added
+        GROUP BY name
+        ON CONFLICT (name) DO UPDATE
+        SET idiom_count = c.idiom_count + EXCLUDED.idiom_count;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE idiom_categories AS c
+        SET idiom_count = c.idiom_count - removed.idiom_count
+        FROM (
+            SELECT name, count(*) AS idiom_count
+            FROM (
+                SELECT DISTINCT id, unnest(context_diversity) AS name FROM old_idioms
+            ) AS deleted
+            GROUP BY name
+        ) AS removed
+        WHERE c.name = removed.name;
+    ELSE
+        -- Only rows whose categories changed, so vote updates touch nothing
+        INSERT INTO idiom_categories AS c (name, idiom_count)
+        SELECT name, sum(delta)
+        FROM (
+            SELECT DISTINCT n.id, unnest(n.context_diversity) AS name, 1 AS delta
+            FROM new_idioms AS n JOIN old_idioms AS o ON o.id = n.id
+            WHERE o.context_diversity IS DISTINCT FROM n.context_diversity
+            UNION ALL
+            SELECT DISTINCT o.id, unnest(o.context_diversity) AS name, -1 AS delta
+            FROM old_idioms AS o JOIN new_idioms AS n ON n.id = o.id
+            WHERE o.context_diversity IS DISTINCT FROM n.context_diversity
+        ) AS changes
+        GROUP BY name
+        HAVING sum(delta) <> 0
+        ON CONFLICT (name) DO UPDATE
+        SET idiom_count = c.idiom_count + EXCLUDED.idiom_count;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+SYNC_CATEGORIES_TRIGGERS = [
+    "CREATE TRIGGER idioms_sync_categories_insert AFTER INSERT ON idioms "
+    "REFERENCING NEW TABLE AS new_idioms "
+    "FOR EACH STATEMENT EXECUTE FUNCTION sync_idiom_categories()",
+    "CREATE TRIGGER idioms_sync_categories_update AFTER UPDATE ON idioms "
+    "REFERENCING OLD TABLE AS old_idioms NEW TABLE AS new_idioms "
+    "FOR EACH STATEMENT EXECUTE FUNCTION sync_idiom_categories()",
+    "CREATE TRIGGER idioms_sync_categories_delete AFTER DELETE ON idioms "
+    "REFERENCING OLD TABLE AS old_idioms "
+    "FOR EACH STATEMENT EXECUTE FUNCTION sync_idiom_categories()",
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "idiom_categories",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("idiom_count", sa.INTEGER(), nullable=False),
+    )
+    op.execute(SYNC_CATEGORIES_FUNCTION)
+    for statement in SYNC_CATEGORIES_TRIGGERS:
+        op.execute(statement)
+    op.execute(
+        "INSERT INTO idiom_categories (name, idiom_count) "
+        "SELECT name, count(*) FROM ("
+        "SELECT DISTINCT id, unnest(context_diversity) AS name FROM idioms"
+        ") AS categories GROUP BY name"
+    )
+
+
+def downgrade() -> None:
+    for operation in ["insert", "update", "delete"]:
+        op.execute(f"DROP TRIGGER idioms_sync_categories_{operation} ON idioms")
+    op.execute("DROP FUNCTION sync_idiom_categories()")
+    op.drop_table("idiom_categories")
@@ -0,0 +1,96 @@
+"""Per-user favorite and vote state in user_idiom
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: str | Sequence[str] | None = "0006"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+SYNC_VOTES_FUNCTION = """
+CREATE OR REPLACE FUNCTION sync_idiom_votes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    old_vote smallint := 0;
+    new_vote smallint := 0;
+    changed_idiom uuid;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        old_vote := OLD.vote;
+        changed_idiom := OLD.idiom_id;
+    ELSE
+        new_vote := NEW.vote;
+        changed_idiom := NEW.idiom_id;
+        IF TG_OP = 'UPDATE' THEN
+            old_vote := OLD.vote;
+        END IF;
+    END IF;
+    IF old_vote <> new_vote THEN
+        UPDATE idioms
+        SET upvotes = upvotes + (new_vote = 1)::int - (old_vote = 1)::int,
+            downvotes = downvotes + (new_vote = -1)::int - (old_vote = -1)::int
+        WHERE id = changed_idiom;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+SYNC_VOTES_TRIGGER = (
+    "CREATE TRIGGER user_idiom_sync_votes "
+    "AFTER INSERT OR DELETE OR UPDATE OF vote ON user_idiom "
+    "FOR EACH ROW EXECUTE FUNCTION sync_idiom_votes()"
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_idiom",
+        sa.Column(
+            "user_id",
+            sa.UUID(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "idiom_id",
+            sa.UUID(),
+            sa.ForeignKey("idioms.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("idiom_text", sa.String(), nullable=False),
+        sa.Column(
+            "favorite", sa.BOOLEAN(), nullable=False, server_default=sa.text("false")
+        ),
+        sa.Column("vote", sa.SMALLINT(), nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.TIMESTAMP(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.TIMESTAMP(), server_default=sa.func.now()),
+        sa.CheckConstraint("vote BETWEEN -1 AND 1", name="ck_user_idiom_vote"),
+    )
+    op.create_index(
+        "ix_user_idiom_favorites",
+        "user_idiom",
+        ["user_id", "idiom_text", "idiom_id"],
+        postgresql_where=sa.text("favorite"),
+    )
+    op.execute(SYNC_VOTES_FUNCTION)
+    op.execute(SYNC_VOTES_TRIGGER)
+    # The global flag cannot be attributed to any user
+    op.drop_column("idioms", "favorite")
+
+
+def downgrade() -> None:
+    op.add_column("idioms", sa.Column("favorite", sa.BOOLEAN()))
+    op.drop_table("user_idiom")
+    op.execute("DROP FUNCTION sync_idiom_votes()")
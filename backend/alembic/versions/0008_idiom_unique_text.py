@@ -0,0 +1,44 @@
+"""Unique idiom texts as the key of bulk imports
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: str | Sequence[str] | None = "0007"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Keep the oldest idiom of every text, earlier imports may have duplicated them
+    op.execute(
+        "DELETE FROM idioms WHERE id IN ("
+        "SELECT id FROM ("
+        "SELECT id, row_number() OVER (PARTITION BY text ORDER BY created_at, id) AS n "
+        "FROM idioms"
+        ") AS ranked WHERE n > 1"
+        ")"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ux_idioms_text",
+            "idioms",
+            ["text"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ux_idioms_text", table_name="idioms", postgresql_concurrently=True
+        )
@@ -0,0 +1,45 @@
+"""Drop indexes duplicating primary keys, index user_idiom by idiom
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: str | Sequence[str] | None = "0008"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Same columns as the primary keys, they only slow down writes
+REDUNDANT_INDEXES = {"ix_idioms_id": "idioms", "ix_users_id": "users"}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table in REDUNDANT_INDEXES.items():
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
+        op.create_index(
+            "ix_user_idiom_idiom_id",
+            "user_idiom",
+            ["idiom_id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_user_idiom_idiom_id",
+            table_name="user_idiom",
+            postgresql_concurrently=True,
+        )
+        for name, table in REDUNDANT_INDEXES.items():
+            op.create_index(name, table, ["id"], postgresql_concurrently=True)
@@ -0,0 +1,130 @@
+"""Apply the vote counters of user_idiom once per statement
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: str | Sequence[str] | None = "0009"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+SYNC_VOTES_FUNCTION = """
+CREATE OR REPLACE FUNCTION sync_idiom_votes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    -- The vote changes of the statement summed per idiom, applied in one UPDATE
+    IF TG_OP = 'INSERT' THEN
+        UPDATE idioms AS i
+        SET upvotes = i.upvotes + changes.upvotes,
+            downvotes = i.downvotes + changes.downvotes
+        FROM (
+            SELECT idiom_id,
+                   count(*) FILTER (WHERE vote = 1) AS upvotes,
+                   count(*) FILTER (WHERE vote = -1) AS downvotes
+            FROM new_votes
+            WHERE vote <> 0
+            GROUP BY idiom_id
+        ) AS changes
+        WHERE i.id = changes.idiom_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE idioms AS i
+        SET upvotes = i.upvotes - changes.upvotes,
+            downvotes = i.downvotes - changes.downvotes
+        FROM (
+            SELECT idiom_id,
+                   count(*) FILTER (WHERE vote = 1) AS upvotes,
+                   count(*) FILTER (WHERE vote = -1) AS downvotes
+            FROM old_votes
+            WHERE vote <> 0
+            GROUP BY idiom_id
+        ) AS changes
+        WHERE i.id = changes.idiom_id;
+    ELSE
+        -- Only rows whose vote changed, so favorite updates touch nothing
+        UPDATE idioms AS i
+        SET upvotes = i.upvotes + changes.upvotes,
+            downvotes = i.downvotes + changes.downvotes
+        FROM (
+            SELECT n.idiom_id,
+                   sum((n.vote = 1)::int - (o.vote = 1)::int) AS upvotes,
+                   sum((n.vote = -1)::int - (o.vote = -1)::int) AS downvotes
+            FROM new_votes AS n JOIN old_votes AS o USING (user_id, idiom_id)
+            WHERE n.vote <> o.vote
+            GROUP BY n.idiom_id
+        ) AS changes
+        WHERE i.id = changes.idiom_id;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+SYNC_VOTES_TRIGGERS = [
+    "CREATE TRIGGER user_idiom_sync_votes_insert AFTER INSERT ON user_idiom "
+    "REFERENCING NEW TABLE AS new_votes "
+    "FOR EACH STATEMENT EXECUTE FUNCTION sync_idiom_votes()",
+    "CREATE TRIGGER user_idiom_sync_votes_update AFTER UPDATE ON user_idiom "
+    "REFERENCING OLD TABLE AS old_votes NEW TABLE AS new_votes "
+    "FOR EACH STATEMENT EXECUTE FUNCTION sync_idiom_votes()",
+    "CREATE TRIGGER user_idiom_sync_votes_delete AFTER DELETE ON user_idiom "
+    "REFERENCING OLD TABLE AS old_votes "
+    "FOR EACH STATEMENT EXECUTE FUNCTION sync_idiom_votes()",
+]
+
+# The row-level trigger of 0007
+ROW_SYNC_VOTES_FUNCTION = """
+CREATE OR REPLACE FUNCTION sync_idiom_votes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    old_vote smallint := 0;
+    new_vote smallint := 0;
+    changed_idiom uuid;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        old_vote := OLD.vote;
+        changed_idiom := OLD.idiom_id;
+    ELSE
+        new_vote := NEW.vote;
+        changed_idiom := NEW.idiom_id;
+        IF TG_OP = 'UPDATE' THEN
+            old_vote := OLD.vote;
+        END IF;
+    END IF;
+    IF old_vote <> new_vote THEN
+        UPDATE idioms
+        SET upvotes = upvotes + (new_vote = 1)::int - (old_vote = 1)::int,
+            downvotes = downvotes + (new_vote = -1)::int - (old_vote = -1)::int
+        WHERE id = changed_idiom;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+ROW_SYNC_VOTES_TRIGGER = (
+    "CREATE TRIGGER user_idiom_sync_votes "
+    "AFTER INSERT OR DELETE OR UPDATE OF vote ON user_idiom "
+    "FOR EACH ROW EXECUTE FUNCTION sync_idiom_votes()"
+)
+
+
+def upgrade() -> None:
+    op.execute("DROP TRIGGER user_idiom_sync_votes ON user_idiom")
+    op.execute(SYNC_VOTES_FUNCTION)
+    for statement in SYNC_VOTES_TRIGGERS:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for event in ["insert", "update", "delete"]:
+        op.execute(f"DROP TRIGGER user_idiom_sync_votes_{event} ON user_idiom")
+    op.execute(ROW_SYNC_VOTES_FUNCTION)
+    op.execute(ROW_SYNC_VOTES_TRIGGER)
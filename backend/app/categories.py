@@ -0,0 +1,28 @@
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.categories import CategoryModel
+from app.schemas.idioms import CategorySchema
+
+CATEGORIES_ADAPTER = TypeAdapter(list[CategorySchema])
+NAMES_ADAPTER = TypeAdapter(list[str])
+
+
+async def load_categories(db: AsyncSession) -> list[CategorySchema]:
+    """Categories in use from `idiom_categories`, which triggers keep up to date"""
+    result = await db.scalars(
+        select(CategoryModel)
+        .where(CategoryModel.idiom_count > 0)
+        .order_by(CategoryModel.name)
+    )
+    return [CategorySchema.model_validate(row) for row in result]
+
+
+async def encode_category_names(db: AsyncSession) -> bytes:
+    categories = await load_categories(db)
+    return NAMES_ADAPTER.dump_json([category.name for category in categories])
+
+
+async def encode_category_counts(db: AsyncSession) -> bytes:
+    return CATEGORIES_ADAPTER.dump_json(await load_categories(db))
@@ -0,0 +1,169 @@
+import zlib
+from typing import Any
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # The optional `brotli` extra is not installed
+    brotli = None
+
+
+def accepted_encodings(header: str | None) -> dict[str, float]:
+    """Encodings of an `Accept-Encoding` header with their quality values"""
+    encodings = {}
+    for part in (header or "").split(","):
+        name, *params = (value.strip() for value in part.split(";"))
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[name.lower()] = quality
+    return encodings
+
+
+def negotiate_encoding(header: str | None) -> str | None:
+    """Preferred supported encoding of a request, brotli before gzip on a tie"""
+    encodings = accepted_encodings(header)
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    candidates = [
+        (encodings.get(name, encodings.get("*", 0.0)), -index, name)
+        for index, name in enumerate(supported)
+    ]
+    quality, _, name = max(candidates)
+    return name if quality > 0 else None
+
+
+class Compressor:
+    """Incremental compressor whose chunks can be sent as soon as they are written"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(
+                gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16
+            )
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing responses with gzip or brotli.
+
+    The encoding is negotiated from `Accept-Encoding`, brotli being available with the
+    optional `brotli` extra. Complete bodies below `minimum_size` bytes are sent as
+    they are, streamed bodies are compressed chunk by chunk so that they keep
+    streaming. Compressed responses get a weak `ETag`, as their bytes differ from the
+    identity representation.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1000,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    """Compresses the messages of a single response before passing them to `send`"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start: Message | None = None
+        self.compressor: Compressor | None = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk tells whether to compress
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            if not self.should_compress(start, message):
+                await self._send(start)
+                await self._send(message)
+                return
+            self.compressor = Compressor(
+                self.encoding,
+                self.middleware.gzip_level,
+                self.middleware.brotli_quality,
+            )
+            await self.send_compressed_start(start, message)
+            return
+
+        if self.compressor is None:
+            await self._send(message)
+            return
+        await self._send(self.compress(message))
+
+    def should_compress(self, start: Message, message: Message) -> bool:
+        headers = Headers(raw=start["headers"])
+        if "content-encoding" in headers or start["status"] in {204, 304}:
+            return False
+        if headers.get("content-type", "").startswith("text/event-stream"):
+            return False
+        body = message.get("body", b"")
+        streamed = message.get("more_body", False)
+        return streamed or len(body) >= self.middleware.minimum_size
+
+    async def send_compressed_start(self, start: Message, message: Message) -> None:
+        headers = MutableHeaders(raw=start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if (etag := headers.get("etag")) and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        compressed = self.compress(message)
+        if message.get("more_body", False):
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(compressed["body"]))
+        await self._send(start)
+        await self._send(compressed)
+
+    def compress(self, message: Message) -> dict[str, Any]:
+        assert self.compressor is not None
+        body = self.compressor.compress(message.get("body", b""))
+        more_body = message.get("more_body", False)
+        if not more_body:
+            body += self.compressor.finish()
+        return {"type": "http.response.body", "body": body, "more_body": more_body}
@@ -0,0 +1,353 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Protocol
+from uuid import UUID
+
+from fastapi import Request, Response, status
+
+from app.settings import app_settings
+
+# Response headers stored with cached bodies
+CACHED_HEADERS = ["content-type", "x-next-cursor"]
+
+
+def etag_for(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """Whether the request's `If-None-Match` header matches `etag`"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {
+        candidate.strip().removeprefix("W/") for candidate in header.split(",")
+    }
+    return "*" in candidates or etag in candidates
+
+
+def idiom_tag(id: UUID | str) -> str:
+    return f"idiom:{id}"
+
+
+def favorites_tag(user_id: UUID) -> str:
+    return f"favorites:{user_id}"
+
+
+def cache_key(request: Request, user_id: UUID | None = None) -> str:
+    """Key of a GET request from its path and normalized query parameters.
+
+    Pass the `user_id` when the response holds state of the requesting user.
+    """
+    params = sorted(request.query_params.multi_items())
+    query = "&".join(f"{name}={value}" for name, value in params)
+    return f"{request.url.path}?{query}#{user_id or ''}"
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    headers: dict[str, str]
+    etag: str
+    # What the body was built from, see `ResponseCache.invalidate_tags`
+    tags: tuple[str, ...] = ()
+    built_at: float = 0.0
+
+
+class CacheBackend(Protocol):
+    clock: Callable[[], float]
+
+    async def version(self) -> int: ...
+
+    async def bump_version(self, settle: float = 0) -> int: ...
+
+    async def settling(self) -> bool: ...
+
+    async def invalidate_tags(self, tags: Iterable[str], settle: float = 0) -> None: ...
+
+    async def invalidated_at(self, tags: Iterable[str]) -> float: ...
+
+    async def get(self, key: str) -> CachedResponse | None: ...
+
+    async def set(self, key: str, response: CachedResponse) -> None: ...
+
+    async def size(self) -> int: ...
+
+
+class MemoryCacheBackend:
+    """Bounded LRU of responses in process memory with TTL-based eviction.
+
+    The corpus version is local to the process, so with several workers a write only
+    invalidates the worker that served it; use the Redis backend for those.
+    """
+
+    def __init__(
+        self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._version = 0
+        self._settled_at = 0.0
+        self._entries: OrderedDict[str, tuple[float, CachedResponse]] = OrderedDict()
+        # When each tag was last invalidated and until when that is kept
+        self._tags: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def version(self) -> int:
+        return self._version
+
+    async def bump_version(self, settle: float = 0) -> int:
+        self._version += 1
+        self._settled_at = self.clock() + settle
+        # Entries of older versions can never be read again
+        self._entries.clear()
+        return self._version
+
+    async def settling(self) -> bool:
+        return self.clock() < self._settled_at
+
+    async def invalidate_tags(self, tags: Iterable[str], settle: float = 0) -> None:
+        now = self.clock()
+        for tag in tags:
+            self._tags[tag] = (now, now + self.ttl + settle)
+            self._tags.move_to_end(tag)
+        # Entries built before an expired invalidation have expired as well
+        while self._tags and next(iter(self._tags.values()))[1] <= now:
+            self._tags.popitem(last=False)
+
+    async def invalidated_at(self, tags: Iterable[str]) -> float:
+        return max((self._tags[tag][0] for tag in tags if tag in self._tags), default=0)
+
+    async def get(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    async def set(self, key: str, response: CachedResponse) -> None:
+        self._entries[key] = (self.clock() + self.ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Responses and the corpus version shared by all workers in a Redis server.
+
+    Needs the optional `redis` package. Entries of older versions are not deleted on
+    a version bump, they are left to expire after `ttl` seconds.
+    """
+
+    VERSION_KEY = "idioms:response-cache:version"
+    # Set for the `settle` seconds after a version bump
+    SETTLING_KEY = "idioms:response-cache:settling"
+    ENTRY_PREFIX = "idioms:response-cache:entry:"
+    TAG_PREFIX = "idioms:response-cache:tag:"
+
+    def __init__(self, url: str, ttl: float):
+        from redis import asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        # Invalidation times are compared across workers, so they are wall clock times
+        self.clock = time.time
+
+    async def version(self) -> int:
+        return int(await self.client.get(self.VERSION_KEY) or 0)
+
+    async def bump_version(self, settle: float = 0) -> int:
+        if settle <= 0:
+            return await self.client.incr(self.VERSION_KEY)
+        async with self.client.pipeline() as pipeline:
+            pipeline.incr(self.VERSION_KEY)
+            pipeline.set(self.SETTLING_KEY, 1, px=int(settle * 1000))
+            version, _ = await pipeline.execute()
+        return version
+
+    async def settling(self) -> bool:
+        return bool(await self.client.exists(self.SETTLING_KEY))
+
+    async def invalidate_tags(self, tags: Iterable[str], settle: float = 0) -> None:
+        now = self.clock()
+        async with self.client.pipeline(transaction=False) as pipeline:
+            for tag in tags:
+                pipeline.set(
+                    f"{self.TAG_PREFIX}{tag}", now, px=int((self.ttl + settle) * 1000)
+                )
+            await pipeline.execute()
+
+    async def invalidated_at(self, tags: Iterable[str]) -> float:
+        values = await self.client.mget([f"{self.TAG_PREFIX}{tag}" for tag in tags])
+        return max((float(value) for value in values if value is not None), default=0)
+
+    async def get(self, key: str) -> CachedResponse | None:
+        value = await self.client.get(f"{self.ENTRY_PREFIX}{key}")
+        if value is None:
+            return None
+        meta, _, body = value.partition(b"\n")
+        meta = json.loads(meta)
+        return CachedResponse(
+            body=body,
+            headers=meta["headers"],
+            etag=meta["etag"],
+            tags=tuple(meta["tags"]),
+            built_at=meta["built_at"],
+        )
+
+    async def set(self, key: str, response: CachedResponse) -> None:
+        meta = {
+            "headers": response.headers,
+            "etag": response.etag,
+            "tags": response.tags,
+            "built_at": response.built_at,
+        }
+        value = json.dumps(meta).encode() + b"\n" + response.body
+        await self.client.set(
+            f"{self.ENTRY_PREFIX}{key}", value, px=int(self.ttl * 1000)
+        )
+
+    async def size(self) -> int:
+        # Only the entries of this cache, the database may hold other keys
+        count = 0
+        async for _ in self.client.scan_iter(match=f"{self.ENTRY_PREFIX}*", count=1000):
+            count += 1
+        return count
+
+
+class ResponseCache:
+    """Cache of GET responses invalidated by a corpus version or by tags.
+
+    Writes to idioms bump the version through `invalidate`, which drops every cached
+    response. Votes and favorites only change the idioms they are cast on, so they
+    go through `invalidate_tags` instead: a response stored with `tags` is rebuilt
+    once one of its tags is invalidated after it was built, and the others keep
+    being served. Either way cached responses are never served past a write.
+
+    ETags are hashes of the body, stored with it, so they hold across restarts and
+    workers and a matching `If-None-Match` on a cached response is answered with 304
+    before any query runs.
+
+    A replica may not have replayed a write yet when the version is bumped, so for
+    `replica_lag` seconds after a bump responses read from a replica (see
+    `request.state.replica`) are served but not stored, and responses read from a
+    replica count as built `replica_lag` seconds before they were.
+    """
+
+    def __init__(self, backend: CacheBackend, replica_lag: float = 0):
+        self.backend = backend
+        self.replica_lag = replica_lag
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    async def respond(
+        self,
+        request: Request,
+        key: str,
+        build: Callable[[], Awaitable[Response]],
+        max_age: int = 0,
+        tags: Callable[[bytes], Iterable[str]] | None = None,
+    ) -> Response:
+        """Serve `key` from the cache, building and storing the response on a miss.
+
+        `tags` maps a built body to the tags it is stored with.
+        """
+        version = await self.backend.version()
+        versioned_key = f"{version}:{key}"
+        cache_control = (
+            f"private, max-age={max_age}" if max_age else "private, no-cache"
+        )
+
+        cached = await self.backend.get(versioned_key)
+        if cached is not None and cached.tags:
+            if await self.backend.invalidated_at(cached.tags) > cached.built_at:
+                cached = None
+        if cached is not None:
+            headers = {"ETag": cached.etag, "Cache-Control": cache_control}
+            if if_none_match(request, cached.etag):
+                self.not_modified += 1
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+                )
+            self.hits += 1
+            return Response(
+                content=cached.body,
+                headers={**cached.headers, **headers, "X-Cache": "HIT"},
+            )
+
+        self.misses += 1
+        replica = getattr(request.state, "replica", False)
+        # Before the build, so that a write landing during it stales the response
+        built_at = self.backend.clock() - (self.replica_lag if replica else 0)
+        response = await build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        etag = etag_for(response.body)
+        if not (replica and await self.backend.settling()):
+            await self.backend.set(
+                versioned_key,
+                CachedResponse(
+                    body=response.body,
+                    headers={
+                        name: response.headers[name]
+                        for name in CACHED_HEADERS
+                        if name in response.headers
+                    },
+                    etag=etag,
+                    tags=tuple(tags(response.body)) if tags else (),
+                    built_at=built_at,
+                ),
+            )
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if if_none_match(request, etag):
+            # The client already has this body, only the query was spent
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update({**headers, "X-Cache": "MISS"})
+        return response
+
+    async def invalidate(self) -> None:
+        await self.backend.bump_version(settle=self.replica_lag)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        await self.backend.invalidate_tags(tags, settle=self.replica_lag)
+
+    async def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses + self.not_modified
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "hit_ratio": (self.hits + self.not_modified) / lookups if lookups else 0.0,
+            "size": await self.backend.size(),
+        }
+
+
+def create_backend() -> CacheBackend:
+    if app_settings.response_cache_url:
+        return RedisCacheBackend(
+            app_settings.response_cache_url, app_settings.response_cache_ttl
+        )
+    return MemoryCacheBackend(
+        max_size=app_settings.response_cache_size,
+        ttl=app_settings.response_cache_ttl,
+    )
+
+
+response_cache = ResponseCache(
+    create_backend(),
+    replica_lag=(
+        app_settings.db_replica_sticky_seconds if app_settings.db_replica_url else 0
+    ),
+)
@@ -0,0 +1,164 @@
+import logging
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import Boolean, func, literal_column, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.idioms import IdiomModel
+from app.schemas.idioms import (
+    IdiomCreate,
+    ImportBatchReport,
+    ImportRejection,
+    ImportReport,
+)
+
+logger = logging.getLogger(__name__)
+
+# Only the first rejections are reported back, the counts cover all of them
+MAX_REPORTED_ERRORS = 100
+
+IDIOMS = IdiomModel.__table__
+# Votes are owned by the user_idiom triggers, so an import neither sets nor resets
+# the counters and new idioms start from the column defaults
+VOTE_COLUMNS = {"upvotes", "downvotes"}
+UPDATED_COLUMNS = [
+    name for name in IdiomCreate.model_fields if name not in VOTE_COLUMNS
+]
+
+
+# Inserts idioms or updates the existing idiom with the same text. Rows whose content
+# does not change are left untouched and not returned, and `xmax` is 0 only for rows
+# that were freshly inserted.
+_upsert = insert(IDIOMS)
+UPSERT_IDIOMS = _upsert.on_conflict_do_update(
+    index_elements=[IDIOMS.c.text],
+    set_={
+        **{name: _upsert.excluded[name] for name in UPDATED_COLUMNS},
+        "updated_at": func.now(),
+    },
+    where=tuple_(*(IDIOMS.c[name] for name in UPDATED_COLUMNS)).is_distinct_from(
+        tuple_(*(_upsert.excluded[name] for name in UPDATED_COLUMNS))
+    ),
+).returning(literal_column("xmax = 0", Boolean).label("inserted"))
+
+
+async def upsert_idioms(
+    db: AsyncSession, idioms: Iterable[IdiomCreate]
+) -> tuple[int, int]:
+    """Upsert a batch of idioms with unique texts and return (inserted, updated)"""
+    # A stable lock order keeps concurrent imports from deadlocking
+    rows = sorted(
+        (idiom.model_dump(exclude=VOTE_COLUMNS) for idiom in idioms),
+        key=lambda r: r["text"],
+    )
+    if not rows:
+        return 0, 0
+    inserted = list(await db.scalars(UPSERT_IDIOMS, rows))
+    await db.commit()
+    return inserted.count(True), inserted.count(False)
+
+
+async def ndjson_lines(
+    chunks: AsyncIterable[bytes], max_line_bytes: int
+) -> AsyncIterator[bytes]:
+    """Split a streamed body into lines without holding more than one line.
+
+    A line longer than `max_line_bytes` fails the request with a 413, so a body
+    without newlines is not buffered whole.
+    """
+    # Chunks of the line being read, joined once it is complete so that a long line
+    # costs linear time
+    pending: list[bytes] = []
+    pending_bytes = 0
+    async for chunk in chunks:
+        *lines, tail = chunk.split(b"\n")
+        if lines:
+            lines[0] = b"".join([*pending, lines[0]])
+            pending, pending_bytes = [], 0
+        for line in lines:
+            check_line_length(len(line), max_line_bytes)
+            yield line
+        pending.append(tail)
+        pending_bytes += len(tail)
+        check_line_length(pending_bytes, max_line_bytes)
+    yield b"".join(pending)
+
+
+def check_line_length(length: int, max_line_bytes: int) -> None:
+    if length > max_line_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"NDJSON lines are limited to {max_line_bytes} bytes",
+        )
+
+
+async def import_idioms(
+    db: AsyncSession, lines: AsyncIterable[bytes], batch_size: int
+) -> ImportReport:
+    """Upsert NDJSON idioms keyed on their text, committing every `batch_size` lines.
+
+    Lines that are not valid idioms are rejected without failing the import. When a
+    text appears twice in a batch, the last line wins and the earlier ones are
+    rejected.
+    """
+    report = ImportReport()
+    batch: dict[str, tuple[int, IdiomCreate]] = {}
+    batch_lines = 0
+    batch_rejected = 0
+    started = time.perf_counter()
+
+    def reject(line_number: int, detail: str) -> None:
+        nonlocal batch_rejected
+        batch_rejected += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(ImportRejection(line=line_number, detail=detail))
+
+    async def flush() -> None:
+        nonlocal batch, batch_lines, batch_rejected, started
+        inserted, updated = await upsert_idioms(
+            db, (idiom for _, idiom in batch.values())
+        )
+        seconds = time.perf_counter() - started
+        batch_report = ImportBatchReport(
+            lines=batch_lines,
+            inserted=inserted,
+            updated=updated,
+            unchanged=len(batch) - inserted - updated,
+            rejected=batch_rejected,
+            seconds=round(seconds, 4),
+            lines_per_second=round(batch_lines / seconds, 1) if seconds else 0.0,
+        )
+        report.inserted += batch_report.inserted
+        report.updated += batch_report.updated
+        report.unchanged += batch_report.unchanged
+        report.rejected += batch_report.rejected
+        report.batches.append(batch_report)
+        logger.info("Imported idiom batch %s", batch_report.model_dump_json())
+        batch, batch_lines, batch_rejected = {}, 0, 0
+        started = time.perf_counter()
+
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        batch_lines += 1
+        try:
+            idiom = IdiomCreate.model_validate_json(line)
+        except ValidationError as error:
+            first_error = error.errors(include_url=False)[0]
+            location = ".".join(str(part) for part in first_error["loc"])
+            reject(line_number, f"{location}: {first_error['msg']}".lstrip(": "))
+        else:
+            if idiom.text in batch:
+                reject(batch[idiom.text][0], f"Superseded by line {line_number}")
+            batch[idiom.text] = (line_number, idiom)
+        if batch_lines == batch_size:
+            await flush()
+    if batch_lines:
+        await flush()
+    return report
@@ -1,22 +1,37 @@
 from contextlib import asynccontextmanager
 from typing import Annotated
 
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app import database
-from app.middleware import APIKeyMiddleware
+from app import database, profiling
+from app.compression import CompressionMiddleware
+from app.http_cache import response_cache
+from app.metrics import (
+    MetricsMiddleware,
+    instrument_cache,
+    instrument_engine,
+    prometheus_client,
+    render,
+)
+from app.middleware import APIKeyMiddleware, api_key_cache
+from app.profiling import SQLProfilingMiddleware
 from app.routers import idioms, users
 from app.settings import app_settings
+from app.votes import vote_buffer
 
-SessionDep = Annotated[Session, Depends(database.get_session)]
+SessionDep = Annotated[AsyncSession, Depends(database.get_session)]
 
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
-    database.create_db_and_tables()
+    if app_settings.create_tables_on_startup:
+        database.create_db_and_tables()
+    if app_settings.vote_write_behind:
+        vote_buffer.start()
     yield
+    await vote_buffer.stop()
 
 
 app = FastAPI(
@@ -25,20 +40,81 @@ app = FastAPI(
     redoc_url="/redoc" if app_settings.debug_mode else None,
     openapi_url="/openapi.json" if app_settings.debug_mode else None,
 )
+instrument_engine(database.engine, "sync", app_settings.db_sync_max_overflow)
+instrument_engine(
+    database.async_engine.sync_engine, "async", app_settings.db_max_overflow
+)
+if database.async_replica_engine is not database.async_engine:
+    instrument_engine(
+        database.async_replica_engine.sync_engine,
+        "replica",
+        app_settings.db_max_overflow,
+    )
+if app_settings.sql_profiling:
+    for engine in {
+        database.engine,
+        database.async_engine.sync_engine,
+        database.async_replica_engine.sync_engine,
+    }:
+        profiling.instrument_engine(engine)
+instrument_cache("api_keys", api_key_cache.stats)
+instrument_cache(
+    "responses",
+    lambda: {
+        "hits": response_cache.hits + response_cache.not_modified,
+        "misses": response_cache.misses,
+    },
+)
+
 app.include_router(idioms.router)
 app.include_router(users.router)
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=app_settings.compression_minimum_size,
+    gzip_level=app_settings.gzip_level,
+    brotli_quality=app_settings.brotli_quality,
+)
+
 app.add_middleware(APIKeyMiddleware)
 
+if app_settings.sql_profiling:
+    app.add_middleware(SQLProfilingMiddleware)
+
+app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=app_settings.allowed_origins,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PATCH"],
     allow_headers=["Content-Type", "Accept", "x-api-key"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
 @app.get("/")
 async def status():
     return {"status": "ok"}
+
+
+async def cache_stats():
+    return {
+        "responses": await response_cache.stats(),
+        "api_keys": api_key_cache.stats(),
+    }
+
+
+# Like the docs, only served in debug mode; `/metrics` exports the same counters
+if app_settings.debug_mode:
+    app.add_api_route("/cache/stats", cache_stats, methods=["GET"])
+
+
+async def metrics(request: Request):
+    body, content_type = render(request.headers.get("accept", ""))
+    return Response(body, media_type=content_type)
+
+
+# Served with the optional `metrics` extra
+if prometheus_client is not None:
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
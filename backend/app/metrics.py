@@ -0,0 +1,235 @@
+import collections
+import time
+from collections.abc import Callable, Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import prometheus_client
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+    from prometheus_client.exposition import choose_encoder
+except ImportError:  # The optional `metrics` extra is not installed
+    prometheus_client = None
+
+# Latency buckets in seconds, from cached reads to slow searches on large corpora
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+class CallbackCollector:
+    """Collector whose series are read from other objects on each scrape"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        family: Callable[..., Any],
+        labelnames: tuple[str, ...],
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.family = family
+        self.labelnames = labelnames
+        self._callbacks: list[tuple[list[str], Callable[[], float]]] = []
+
+    def add(self, callback: Callable[[], float], **labels: str) -> None:
+        if labels.keys() != set(self.labelnames):
+            raise ValueError(f"{self.name} is labelled by {self.labelnames}")
+        values = [str(labels[name]) for name in self.labelnames]
+        self._callbacks.append((values, callback))
+
+    def collect(self) -> Iterator[Any]:
+        metric = self.family(self.name, self.documentation, labels=self.labelnames)
+        for values, callback in self._callbacks:
+            metric.add_metric(values, callback())
+        yield metric
+
+
+if prometheus_client is not None:
+    registry = prometheus_client.CollectorRegistry()
+    REQUEST_DURATION = prometheus_client.Histogram(
+        "http_request_duration_seconds",
+        "Latency of HTTP requests by route template.",
+        ("method", "route", "status"),
+        buckets=LATENCY_BUCKETS,
+        registry=registry,
+    )
+    REQUESTS_IN_FLIGHT = prometheus_client.Gauge(
+        "http_requests_in_flight", "HTTP requests being served.", registry=registry
+    )
+    REQUEST_STATEMENTS = prometheus_client.Histogram(
+        "http_request_sql_statements",
+        "SQL statements executed per HTTP request by route template.",
+        ("method", "route"),
+        buckets=STATEMENT_BUCKETS,
+        registry=registry,
+    )
+    POOL_CHECKOUT_WAIT = prometheus_client.Histogram(
+        "db_pool_checkout_wait_seconds",
+        "Time spent waiting for a connection from the pool.",
+        ("engine",),
+        buckets=LATENCY_BUCKETS,
+        registry=registry,
+    )
+    POOL_CONNECTIONS = CallbackCollector(
+        "db_pool_connections",
+        "Connections of the pool by state.",
+        GaugeMetricFamily,
+        ("engine", "state"),
+    )
+    POOL_UTILIZATION = CallbackCollector(
+        "db_pool_utilization",
+        "Checked out connections over the pool size plus its overflow.",
+        GaugeMetricFamily,
+        ("engine",),
+    )
+    CACHE_HITS = CallbackCollector(
+        "cache_hits", "Cache hits.", CounterMetricFamily, ("cache",)
+    )
+    CACHE_MISSES = CallbackCollector(
+        "cache_misses", "Cache misses.", CounterMetricFamily, ("cache",)
+    )
+    CACHE_SIZE = CallbackCollector(
+        "cache_entries", "Entries held by a cache.", GaugeMetricFamily, ("cache",)
+    )
+    for collector in [
+        POOL_CONNECTIONS,
+        POOL_UTILIZATION,
+        CACHE_HITS,
+        CACHE_MISSES,
+        CACHE_SIZE,
+    ]:
+        registry.register(collector)
+
+
+def render(accept: str) -> tuple[bytes, str]:
+    """The metrics in the exposition format negotiated by an `Accept` header"""
+    encoder, content_type = choose_encoder(accept)
+    return encoder(registry), content_type
+
+
+@dataclass
+class RequestContext:
+    """Statements executed while serving the request of `scope`.
+
+    `statement_counts` is only filled when SQL profiling is enabled.
+    """
+
+    scope: Scope = field(repr=False)
+    statements: int = 0
+    statement_counts: collections.Counter[str] = field(
+        default_factory=collections.Counter
+    )
+
+
+current_request: ContextVar[RequestContext | None] = ContextVar(
+    "current_request", default=None
+)
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the matched route, so that ids do not explode the series"""
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording the latency and SQL statements of requests.
+
+    Without the `metrics` extra, it only counts the statements of each request for
+    the SQL profiling.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        context = RequestContext(scope)
+        token = current_request.set(context)
+        if prometheus_client is None:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                current_request.reset(token)
+            return
+
+        REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            seconds = time.perf_counter() - started
+            REQUESTS_IN_FLIGHT.dec()
+            current_request.reset(token)
+            route = route_template(scope)
+            REQUEST_DURATION.labels(scope["method"], route, str(status_code)).observe(
+                seconds
+            )
+            REQUEST_STATEMENTS.labels(scope["method"], route).observe(
+                context.statements
+            )
+
+
+class CheckoutTimer:
+    """Pool mixin observing how long each checkout waits for a usable connection.
+
+    Times the public `Pool.connect`, which includes the pre-ping of the connection.
+    """
+
+    engine_name = "default"
+
+    def connect(self) -> Any:
+        if prometheus_client is None:
+            return super().connect()
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            POOL_CHECKOUT_WAIT.labels(self.engine_name).observe(
+                time.perf_counter() - started
+            )
+
+
+def count_statement(*_args: Any) -> None:
+    if (context := current_request.get()) is not None:
+        context.statements += 1
+
+
+def instrument_engine(engine: Engine, name: str, max_overflow: int) -> None:
+    """Count the statements of `engine` per request and export its pool state"""
+    event.listen(engine, "before_cursor_execute", count_statement)
+    if prometheus_client is None:
+        return
+    pool = engine.pool
+    capacity = pool.size() + max_overflow
+    POOL_CONNECTIONS.add(pool.size, engine=name, state="size")
+    POOL_CONNECTIONS.add(pool.checkedin, engine=name, state="idle")
+    POOL_CONNECTIONS.add(pool.checkedout, engine=name, state="checked_out")
+    POOL_CONNECTIONS.add(lambda: max(pool.overflow(), 0), engine=name, state="overflow")
+    POOL_UTILIZATION.add(lambda: pool.checkedout() / capacity, engine=name)
+
+
+def instrument_cache(name: str, stats: Callable[[], dict[str, int]]) -> None:
+    """Export the `hits`, `misses` and, if reported, `size` of a cache's `stats`"""
+    if prometheus_client is None:
+        return
+    CACHE_HITS.add(lambda: stats()["hits"], cache=name)
+    CACHE_MISSES.add(lambda: stats()["misses"], cache=name)
+    if "size" in stats():
+        CACHE_SIZE.add(lambda: stats()["size"], cache=name)
@@ -1,12 +1,16 @@
+import time
+from collections import OrderedDict
 from collections.abc import Callable
 
-from fastapi import HTTPException, Request, Response, status
+from fastapi import HTTPException, Request, status
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import sessionmaker
-from starlette.middleware.base import BaseHTTPMiddleware
+from sqlalchemy import select
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from app.database import engine
+from app.database import AsyncSessionLocal
 from app.models.users import UserModel
+from app.settings import app_settings
 
 
 def get_current_user(request: Request) -> UserModel:
@@ -17,37 +21,125 @@ def get_current_user(request: Request) -> UserModel:
     return request.state.user
 
 
-class APIKeyMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, exempt_paths: list[str] | None = None):
-        super().__init__(app)
+class APIKeyCache:
+    """Bounded LRU cache of API key lookups with TTL-based eviction.
+
+    Unknown keys are cached as ``None`` for ``negative_ttl`` seconds, so repeated
+    requests with invalid keys do not each reach the database.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        negative_ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, UserModel | None]] = OrderedDict()
+
+    def get(self, api_key: str) -> tuple[bool, UserModel | None]:
+        """Return ``(found, user)``; ``user`` is ``None`` for cached unknown keys"""
+        entry = self._entries.get(api_key)
+        if entry is not None:
+            expires_at, user = entry
+            if expires_at > self.clock():
+                self._entries.move_to_end(api_key)
+                self.hits += 1
+                return True, user
+            del self._entries[api_key]
+        self.misses += 1
+        return False, None
+
+    def set(self, api_key: str, user: UserModel | None) -> None:
+        ttl = self.ttl if user is not None else self.negative_ttl
+        self._entries[api_key] = (self.clock() + ttl, user)
+        self._entries.move_to_end(api_key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, api_key: str) -> None:
+        self._entries.pop(api_key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+api_key_cache = APIKeyCache(
+    max_size=app_settings.api_key_cache_size,
+    ttl=app_settings.api_key_cache_ttl,
+    negative_ttl=app_settings.api_key_negative_cache_ttl,
+)
+
+
+class APIKeyMiddleware:
+    """Pure ASGI middleware that authenticates requests by their `x-api-key` header.
+
+    Users are looked up through the async session, so authentication never blocks the
+    event loop, and stored in the request state (`request.state.user`).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        exempt_paths: list[str] | None = None,
+        cache: APIKeyCache | None = None,
+    ):
+        self.app = app
         self.exempt_paths = exempt_paths or [
             "/",
+            "/metrics",
             "/users/register",
         ]
-        self.session_factory = sessionmaker(bind=engine)
+        self.session_factory = AsyncSessionLocal
+        self.cache = cache or api_key_cache
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        if any(request.url.path.startswith(path) for path in self.exempt_paths):
-            return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.is_exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
 
-        api_key = request.headers.get("x-api-key")
+        api_key = Headers(scope=scope).get("x-api-key")
+        user = await self.authenticate(api_key) if api_key else None
 
-        if not api_key:
-            return JSONResponse(
+        if not user:
+            response = JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": "Unauthorized"},
             )
+            await response(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        state["user"] = user
+        state["api_key"] = api_key
 
-        with self.session_factory() as db:
-            user = db.query(UserModel).filter(UserModel.api_key == api_key).first()
+        await self.app(scope, receive, send)
 
-            if not user:
-                return JSONResponse(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    content={"detail": "Unauthorized"},
-                )
+    def is_exempt(self, path: str) -> bool:
+        # "/" only exempts the status route itself, other entries exempt their subtree
+        return any(
+            path == exempt or (exempt != "/" and path.startswith(exempt + "/"))
+            for exempt in self.exempt_paths
+        )
 
-        request.state.user = user
-        request.state.api_key = api_key
+    async def authenticate(self, api_key: str) -> UserModel | None:
+        found, user = self.cache.get(api_key)
+        if not found:
+            user = await self.lookup_user(api_key)
+            self.cache.set(api_key, user)
+        return user
 
-        return await call_next(request)
+    async def lookup_user(self, api_key: str) -> UserModel | None:
+        async with self.session_factory() as db:
+            return await db.scalar(
+                select(UserModel).where(UserModel.api_key == api_key)
+            )
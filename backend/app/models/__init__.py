@@ -0,0 +1,2 @@
+# Import every model so that `Base.metadata` knows all tables and their DDL hooks
+from app.models import categories, idioms, user_idioms, users  # noqa: F401
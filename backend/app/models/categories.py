@@ -0,0 +1,81 @@
+from sqlalchemy import DDL, INTEGER, Column, String, event
+
+from app.database import Base
+from app.models.idioms import IdiomModel
+
+
+class CategoryModel(Base):
+    """Category vocabulary of `idioms.context_diversity` with idiom counts.
+
+    The table is maintained by statement-level triggers on `idioms`, so every write
+    path keeps it in sync. Categories whose count drops to zero are kept with a count
+    of zero and filtered out when read.
+    """
+
+    __tablename__ = "idiom_categories"
+
+    name = Column(String, primary_key=True)
+    idiom_count = Column(INTEGER, nullable=False, default=0)
+
+
+SYNC_CATEGORIES_FUNCTION = """
+CREATE OR REPLACE FUNCTION sync_idiom_categories() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO idiom_categories AS c (name, idiom_count)
+        SELECT name, count(*)
+        FROM (
+            SELECT DISTINCT id, unnest(context_diversity) AS name FROM new_idioms
+        ) AS added
+        GROUP BY name
+        ON CONFLICT (name) DO UPDATE
+        SET idiom_count = c.idiom_count + EXCLUDED.idiom_count;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE idiom_categories AS c
+        SET idiom_count = c.idiom_count - removed.idiom_count
+        FROM (
+            SELECT name, count(*) AS idiom_count
+            FROM (
+                SELECT DISTINCT id, unnest(context_diversity) AS name FROM old_idioms
+            ) AS deleted
+            GROUP BY name
+        ) AS removed
+        WHERE c.name = removed.name;
+    ELSE
+        -- Only rows whose categories changed, so vote updates touch nothing
+        INSERT INTO idiom_categories AS c (name, idiom_count)
+        SELECT name, sum(delta)
+        FROM (
+            SELECT DISTINCT n.id, unnest(n.context_diversity) AS name, 1 AS delta
+            FROM new_idioms AS n JOIN old_idioms AS o ON o.id = n.id
+            WHERE o.context_diversity IS DISTINCT FROM n.context_diversity
+            UNION ALL
+            SELECT DISTINCT o.id, unnest(o.context_diversity) AS name, -1 AS delta
+            FROM old_idioms AS o JOIN new_idioms AS n ON n.id = o.id
+            WHERE o.context_diversity IS DISTINCT FROM n.context_diversity
+        ) AS changes
+        GROUP BY name
+        HAVING sum(delta) <> 0
+        ON CONFLICT (name) DO UPDATE
+        SET idiom_count = c.idiom_count + EXCLUDED.idiom_count;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+SYNC_CATEGORIES_TRIGGERS = [
+    "CREATE TRIGGER idioms_sync_categories_insert AFTER INSERT ON idioms "
+    "REFERENCING NEW TABLE AS new_idioms "
+    "FOR EACH STATEMENT EXECUTE FUNCTION sync_idiom_categories()",
+    "CREATE TRIGGER idioms_sync_categories_update AFTER UPDATE ON idioms "
+    "REFERENCING OLD TABLE AS old_idioms NEW TABLE AS new_idioms "
+    "FOR EACH STATEMENT EXECUTE FUNCTION sync_idiom_categories()",
+    "CREATE TRIGGER idioms_sync_categories_delete AFTER DELETE ON idioms "
+    "REFERENCING OLD TABLE AS old_idioms "
+    "FOR EACH STATEMENT EXECUTE FUNCTION sync_idiom_categories()",
+]
+
+for statement in [SYNC_CATEGORIES_FUNCTION, *SYNC_CATEGORIES_TRIGGERS]:
+    event.listen(IdiomModel.__table__, "after_create", DDL(statement))
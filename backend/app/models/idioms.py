@@ -1,17 +1,20 @@
 from uuid import uuid4
 
 from sqlalchemy import (
-    ARRAY,
-    BOOLEAN,
+    DDL,
     FLOAT,
     INTEGER,
     TEXT,
     TIMESTAMP,
     UUID,
     Column,
+    Index,
     String,
+    event,
     func,
 )
+from sqlalchemy import text as sql_text
+from sqlalchemy.dialects.postgresql import ARRAY
 
 from app.database import Base
 
@@ -19,7 +22,7 @@ from app.database import Base
 class IdiomModel(Base):
     __tablename__ = "idioms"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     text = Column(String)
     meaning = Column(String)
     explanation = Column(TEXT)
@@ -33,11 +36,46 @@ class IdiomModel(Base):
     depiction = Column(ARRAY(String))
     alternative_depiction = Column(ARRAY(String))
     meaning_depiction = Column(ARRAY(String))
-    favorite = Column(BOOLEAN, default=False)
     upvotes = Column(INTEGER, default=0)
     downvotes = Column(INTEGER, default=0)
+    # Random position in the shuffled feed, drawn once per idiom
+    shuffle_key = Column(
+        INTEGER,
+        nullable=False,
+        server_default=sql_text("floor(random() * 2147483647)::int"),
+    )
 
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(
         TIMESTAMP, server_default=func.now(), server_onupdate=func.now()
     )
+
+    __table_args__ = (
+        # Serves `ILIKE '%...%'` text search, whose matches are ranked by `similarity`
+        Index(
+            "ix_idioms_text_trgm",
+            "text",
+            postgresql_using="gin",
+            postgresql_ops={"text": "gin_trgm_ops"},
+        ),
+        # Idioms are unique by text, which is the key of imports
+        Index("ux_idioms_text", "text", unique=True),
+        # Keyset pagination, one index per sort mode with `id` as tie-breaker
+        Index("ix_idioms_text_id", "text", "id"),
+        Index("ix_idioms_frequency_of_use_id", "frequency_of_use", "id"),
+        Index("ix_idioms_literal_transparency_id", "literal_transparency", "id"),
+        Index("ix_idioms_shuffle_key_id", "shuffle_key", "id"),
+        # Tag filters with the array overlap (`&&`) and containment (`@>`) operators
+        Index(
+            "ix_idioms_context_diversity", "context_diversity", postgresql_using="gin"
+        ),
+        Index("ix_idioms_category_theme", "category_theme", postgresql_using="gin"),
+        Index("ix_idioms_sentiment", "sentiment", postgresql_using="gin"),
+    )
+
+
+event.listen(
+    IdiomModel.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+)
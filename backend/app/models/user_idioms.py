@@ -0,0 +1,133 @@
+from sqlalchemy import (
+    BOOLEAN,
+    DDL,
+    SMALLINT,
+    TIMESTAMP,
+    UUID,
+    CheckConstraint,
+    Column,
+    ForeignKey,
+    Index,
+    String,
+    event,
+    func,
+)
+from sqlalchemy import text as sql_text
+
+from app.database import Base
+
+
+class UserIdiomModel(Base):
+    """Favorite and vote state of one user for one idiom.
+
+    `idiom_text` is a copy of the idiom's text so that a user's favorites can be read
+    in text order from a single index range. `idioms.upvotes` and `idioms.downvotes`
+    are kept in sync with `vote` by statement-level triggers.
+    """
+
+    __tablename__ = "user_idiom"
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    idiom_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("idioms.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    idiom_text = Column(String, nullable=False)
+    favorite = Column(
+        BOOLEAN, nullable=False, default=False, server_default=sql_text("false")
+    )
+    # 1 for an upvote, -1 for a downvote and 0 for no vote
+    vote = Column(SMALLINT, nullable=False, default=0, server_default=sql_text("0"))
+
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(
+        TIMESTAMP, server_default=func.now(), server_onupdate=func.now()
+    )
+
+    __table_args__ = (
+        CheckConstraint("vote BETWEEN -1 AND 1", name="ck_user_idiom_vote"),
+        # A user's favorites in text order, with `idiom_id` as keyset tie-breaker
+        Index(
+            "ix_user_idiom_favorites",
+            "user_id",
+            "idiom_text",
+            "idiom_id",
+            postgresql_where=sql_text("favorite"),
+        ),
+        # Cascades from idioms, the primary key only serves lookups by user
+        Index("ix_user_idiom_idiom_id", "idiom_id"),
+    )
+
+
+SYNC_VOTES_FUNCTION = """
+CREATE OR REPLACE FUNCTION sync_idiom_votes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    -- The vote changes of the statement summed per idiom, applied in one UPDATE
+    IF TG_OP = 'INSERT' THEN
+        UPDATE idioms AS i
+        SET upvotes = i.upvotes + changes.upvotes,
+            downvotes = i.downvotes + changes.downvotes
+        FROM (
+            SELECT idiom_id,
+                   count(*) FILTER (WHERE vote = 1) AS upvotes,
+                   count(*) FILTER (WHERE vote = -1) AS downvotes
+            FROM new_votes
+            WHERE vote <> 0
+            GROUP BY idiom_id
+        ) AS changes
+        WHERE i.id = changes.idiom_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE idioms AS i
+        SET upvotes = i.upvotes - changes.upvotes,
+            downvotes = i.downvotes - changes.downvotes
+        FROM (
+            SELECT idiom_id,
+                   count(*) FILTER (WHERE vote = 1) AS upvotes,
+                   count(*) FILTER (WHERE vote = -1) AS downvotes
+            FROM old_votes
+            WHERE vote <> 0
+            GROUP BY idiom_id
+        ) AS changes
+        WHERE i.id = changes.idiom_id;
+    ELSE
+        -- Only rows whose vote changed, so favorite updates touch nothing
+        UPDATE idioms AS i
+        SET upvotes = i.upvotes + changes.upvotes,
+            downvotes = i.downvotes + changes.downvotes
+        FROM (
+            SELECT n.idiom_id,
+                   sum((n.vote = 1)::int - (o.vote = 1)::int) AS upvotes,
+                   sum((n.vote = -1)::int - (o.vote = -1)::int) AS downvotes
+            FROM new_votes AS n JOIN old_votes AS o USING (user_id, idiom_id)
+            WHERE n.vote <> o.vote
+            GROUP BY n.idiom_id
+        ) AS changes
+        WHERE i.id = changes.idiom_id;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+# Statement-level, so that a batch of votes updates each idiom once. Transition
+# tables need one trigger per event and no column list.
+SYNC_VOTES_TRIGGERS = [
+    "CREATE TRIGGER user_idiom_sync_votes_insert AFTER INSERT ON user_idiom "
+    "REFERENCING NEW TABLE AS new_votes "
+    "FOR EACH STATEMENT EXECUTE FUNCTION sync_idiom_votes()",
+    "CREATE TRIGGER user_idiom_sync_votes_update AFTER UPDATE ON user_idiom "
+    "REFERENCING OLD TABLE AS old_votes NEW TABLE AS new_votes "
+    "FOR EACH STATEMENT EXECUTE FUNCTION sync_idiom_votes()",
+    "CREATE TRIGGER user_idiom_sync_votes_delete AFTER DELETE ON user_idiom "
+    "REFERENCING OLD TABLE AS old_votes "
+    "FOR EACH STATEMENT EXECUTE FUNCTION sync_idiom_votes()",
+]
+
+for statement in [SYNC_VOTES_FUNCTION, *SYNC_VOTES_TRIGGERS]:
+    event.listen(UserIdiomModel.__table__, "after_create", DDL(statement))
@@ -14,7 +14,7 @@ from app.database import Base
 class UserModel(Base):
     __tablename__ = "users"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     api_key = Column(String, default=uuid4, unique=True, index=True)
     installation_id = Column(String)
 
@@ -0,0 +1,104 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from typing import Any
+
+from fastapi import HTTPException, status
+from sqlalchemy import ColumnElement, Select, and_, literal, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# A sort expression and whether it is sorted in descending order. The last key of an
+# ordering must be unique (usually the primary key) for cursors to be stable.
+OrderKey = tuple[ColumnElement[Any], bool]
+
+
+def encode_cursor(scope: str, values: list[Any]) -> str:
+    payload = json.dumps({"scope": scope, "values": values}, default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str, scope: str, order: list[OrderKey]) -> list[Any]:
+    """Decode a cursor created for `scope` into values typed like the `order` keys"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if payload["scope"] != scope or len(payload["values"]) != len(order):
+            raise ValueError("Cursor does not match the requested ordering")
+        return [
+            expression.type.python_type(value)
+            for (expression, _), value in zip(order, payload["values"], strict=True)
+        ]
+    except (binascii.Error, KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def order_by_clauses(order: list[OrderKey]) -> list[ColumnElement[Any]]:
+    return [
+        expression.desc() if descending else expression
+        for expression, descending in order
+    ]
+
+
+def keyset_condition(order: list[OrderKey], values: list[Any]) -> ColumnElement[bool]:
+    """Condition matching the rows that come after `values` in `order`"""
+    if len({descending for _, descending in order}) == 1:
+        # A single row comparison can be served by one index range scan
+        columns = tuple_(*(expression for expression, _ in order))
+        bounds = tuple_(
+            *(
+                literal(value, expression.type)
+                for (expression, _), value in zip(order, values, strict=True)
+            )
+        )
+        return columns < bounds if order[0][1] else columns > bounds
+
+    conditions = []
+    for position, (expression, descending) in enumerate(order):
+        ties = [
+            previous == values[index]
+            for index, (previous, _) in enumerate(order[:position])
+        ]
+        after = (
+            expression < values[position]
+            if descending
+            else expression > values[position]
+        )
+        conditions.append(and_(*ties, after))
+    return or_(*conditions)
+
+
+async def fetch_page(
+    db: AsyncSession,
+    query: Select,
+    order: list[OrderKey],
+    limit: int,
+    page: int = 1,
+    cursor: str | None = None,
+    scope: str = "",
+) -> tuple[list[Sequence[Any]], str | None]:
+    """Run `query` for one page and return its rows with the next page's cursor.
+
+    With a `cursor` the page starts right after the row it points to, so it costs the
+    same at any depth; otherwise `page` is translated into an offset. The returned
+    rows hold the columns selected by `query`, without the ordering keys.
+    """
+    width = len(query.selected_columns)
+    query = (
+        query.add_columns(*(expression for expression, _ in order))
+        .order_by(*order_by_clauses(order))
+        .limit(limit)
+    )
+    if cursor:
+        query = query.where(
+            keyset_condition(order, decode_cursor(cursor, scope, order))
+        )
+    else:
+        query = query.offset((page - 1) * limit)
+
+    rows = (await db.execute(query)).all()
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = encode_cursor(scope, list(rows[-1][width:]))
+    return [row[:width] for row in rows], next_cursor
@@ -0,0 +1,153 @@
+import logging
+import random
+import time
+from typing import Any
+
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.metrics import RequestContext, current_request, route_template
+from app.settings import app_settings
+
+logger = logging.getLogger(__name__)
+
+
+def route_label(request: RequestContext) -> str:
+    return f"{request.scope['method']} {route_template(request.scope)}"
+
+
+def tag_statement(
+    conn: Any,
+    _cursor: Any,
+    statement: str,
+    parameters: Any,
+    _context: Any,
+    _executemany: bool,
+) -> tuple[str, Any]:
+    """Start the statement's timer and tag it with the route that issued it.
+
+    The tag is an SQL comment, so it also shows up in `pg_stat_activity` and the
+    server's logs.
+    """
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+    request = current_request.get()
+    if request is None:
+        return statement, parameters
+    request.statement_counts[statement] += 1
+    route = route_label(request).replace("*/", "* /")
+    return f"{statement} /* route='{route}' */", parameters
+
+
+def parameter_types(parameters: Any) -> Any:
+    """Types of bound parameters, whose values may hold secrets like API keys"""
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [parameter_types(value) for value in parameters]
+    return type(parameters).__name__
+
+
+def log_slow_statement(
+    conn: Any,
+    _cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    seconds = time.perf_counter() - conn.info["query_started"].pop()
+    if seconds < app_settings.slow_query_seconds:
+        return
+    if app_settings.slow_query_log_parameters:
+        logger.warning(
+            "Slow query took %.1f ms: %s; parameters: %r",
+            seconds * 1000,
+            statement,
+            parameters,
+        )
+    else:
+        logger.warning(
+            "Slow query took %.1f ms: %s; parameter types: %r",
+            seconds * 1000,
+            statement,
+            parameter_types(parameters),
+        )
+    streamed = context is not None and context.execution_options.get("stream_results")
+    if (
+        statement.lstrip().upper().startswith("SELECT")
+        and not executemany
+        and not streamed
+        and random.random() < app_settings.sql_explain_sample_rate
+    ):
+        logger.warning(
+            "Plan of the slow query:\n%s", explain(conn, statement, parameters)
+        )
+
+
+def discard_failed_statement(context: Any) -> None:
+    """Drop the timer of a statement that raised, `after_cursor_execute` never runs"""
+    if context.connection is not None and (
+        started := context.connection.info.get("query_started")
+    ):
+        started.pop()
+
+
+def explain(conn: Any, statement: str, parameters: Any) -> str:
+    """Plan of a select, in a savepoint so that a failure keeps the transaction"""
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT sql_profiling_explain")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except Exception as error:
+            cursor.execute("ROLLBACK TO SAVEPOINT sql_profiling_explain")
+            plan = f"EXPLAIN ANALYZE failed: {error}"
+        cursor.execute("RELEASE SAVEPOINT sql_profiling_explain")
+        return plan
+    finally:
+        cursor.close()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Tag, time and log the statements of `engine`"""
+    event.listen(engine, "before_cursor_execute", tag_statement, retval=True)
+    event.listen(engine, "after_cursor_execute", log_slow_statement)
+    event.listen(engine, "handle_error", discard_failed_statement)
+
+
+def check_request(request: RequestContext) -> None:
+    """Flag requests over the statement budget and statements repeated like an N+1"""
+    route = route_label(request)
+    if request.statements > app_settings.sql_statement_budget:
+        logger.warning(
+            "%s issued %d SQL statements, over the budget of %d",
+            route,
+            request.statements,
+            app_settings.sql_statement_budget,
+        )
+    for statement, count in request.statement_counts.items():
+        if count >= app_settings.sql_repeated_statement_threshold:
+            logger.warning(
+                "Possible N+1 on %s, a statement ran %d times: %s",
+                route,
+                count,
+                statement,
+            )
+
+
+class SQLProfilingMiddleware:
+    """Pure ASGI middleware checking the statements of each request once it is served.
+
+    Reads the request context of `MetricsMiddleware`, so it must be added before it.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if scope["type"] == "http" and (request := current_request.get()):
+                check_request(request)
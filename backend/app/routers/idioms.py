@@ -1,158 +1,467 @@
-from typing import Annotated
+import hashlib
+import secrets
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from typing import Annotated, Any, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, or_
-from sqlalchemy import text as sql_text
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic_core import from_json
+from sqlalchemy import (
+    Column,
+    ColumnElement,
+    Float,
+    Integer,
+    Select,
+    and_,
+    func,
+    literal_column,
+    select,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from app import database
+from app.categories import encode_category_counts, encode_category_names
+from app.http_cache import cache_key, favorites_tag, idiom_tag, response_cache
+from app.importer import import_idioms, ndjson_lines, upsert_idioms
 from app.middleware import get_current_user
 from app.models.idioms import IdiomModel
+from app.models.user_idioms import UserIdiomModel
 from app.models.users import UserModel
-from app.schemas.idioms import IdiomCreate, IdiomSchema, IdiomUpdate
+from app.pagination import OrderKey, decode_cursor, fetch_page
+from app.schemas.idioms import (
+    CategorySchema,
+    IdiomCreate,
+    IdiomSchema,
+    IdiomUpdate,
+    ImportReport,
+)
+from app.serialization import (
+    IDIOM_FIELDS,
+    STATE_FIELDS,
+    column_fields,
+    encode_idiom_stream,
+    encode_idioms,
+    idiom_columns,
+    json_response,
+    project_fields,
+)
+from app.settings import app_settings
+from app.user_idioms import UPSERT_FAVORITE, idioms_for_user, load_user_states
+from app.votes import Vote, set_vote, vote_buffer
 
-SessionDep = Annotated[Session, Depends(database.get_session)]
+SessionDep = Annotated[AsyncSession, Depends(database.get_session)]
 CurrentUser = Annotated[UserModel, Depends(get_current_user)]
 
 router = APIRouter(prefix="/idioms", tags=["idioms"])
 
+CursorQuery = Annotated[str | None, Query(max_length=500)]
+TagsQuery = Annotated[str | None, Query(max_length=500)]
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+SHUFFLE_KEY_RANGE = 2**31 - 1
+# Fields that votes and favorites change, see `idiom_tags`
+VOTED_FIELDS = {"upvotes", "downvotes", *STATE_FIELDS}
+
+
+def idiom_order(sort: str | None, text: str) -> list[OrderKey]:
+    """Sort keys for a `sort` mode, ending with `id` so that cursors are unique"""
+    match sort:
+        case "frequency":
+            keys = [(IdiomModel.frequency_of_use, False)]
+        case "-frequency":
+            keys = [(IdiomModel.frequency_of_use, True)]
+        case "imagery":
+            keys = [(IdiomModel.literal_transparency, False)]
+        case "-imagery":
+            keys = [(IdiomModel.literal_transparency, True)]
+        case "relevance" if text:
+            relevance = func.similarity(IdiomModel.text, text, type_=Float)
+            keys = [(relevance, True), (IdiomModel.text, False)]
+        case _:
+            keys = [(IdiomModel.text, False)]
+    return [*keys, (IdiomModel.id, keys[-1][1])]
+
+
+def tags_filter(
+    column: Column, tags: str | None, match: Literal["any", "all"]
+) -> ColumnElement[bool] | None:
+    """Filter on a comma separated list of `tags` in an array column.
+
+    `any` uses the overlap operator (`&&`) and `all` the containment operator (`@>`),
+    both of which are served by the GIN index on the column.
+    """
+    values = [tag.strip() for tag in (tags or "").split(",") if tag.strip()]
+    if not values:
+        return None
+    return column.overlap(values) if match == "any" else column.contains(values)
+
+
+def idioms_query(
+    fields: list[str],
+    text: str = "",
+    category: str | None = None,
+    theme: str | None = None,
+    sentiment: str | None = None,
+    match: Literal["any", "all"] = "any",
+) -> Select:
+    """Idioms matching a text search and tag filters, before ordering and paging"""
+    query = select(*idiom_columns(IdiomModel, fields))
+    if text:
+        query = query.where(IdiomModel.text.ilike(f"%{text}%"))
+    for column, tags in [
+        (IdiomModel.context_diversity, category),
+        (IdiomModel.category_theme, theme),
+        (IdiomModel.sentiment, sentiment),
+    ]:
+        condition = tags_filter(column, tags, match)
+        if condition is not None:
+            query = query.where(condition)
+    return query
+
+
+def shuffled_feed(
+    seed: int, fields: list[str], after: list[Any] | None = None
+) -> tuple[Select, list[OrderKey]]:
+    """Deterministic shuffled order of all idioms for `seed`.
+
+    Idioms are ordered by their random `shuffle_key`, starting at a position derived
+    from the seed and wrapping around at the end. Each half is a range scan on the
+    shuffle key index, so a page costs O(limit) instead of sorting the whole table.
+    `after` holds the `(segment, shuffle_key, id)` of the last idiom already served.
+    Only the columns of `fields` and the ordering keys are selected.
+    """
+    digest = hashlib.blake2b(str(seed).encode(), digest_size=8).digest()
+    start = int.from_bytes(digest) % SHUFFLE_KEY_RANGE
+
+    segments = []
+    for segment, condition in enumerate(
+        [IdiomModel.shuffle_key >= start, IdiomModel.shuffle_key < start]
+    ):
+        if after is not None and segment < after[0]:
+            continue
+        if after is not None and segment == after[0]:
+            position = tuple_(IdiomModel.shuffle_key, IdiomModel.id)
+            condition = and_(condition, position > tuple_(after[1], after[2]))
+        segments.append(
+            select(
+                *idiom_columns(IdiomModel, fields),
+                IdiomModel.shuffle_key,
+                literal_column(str(segment), Integer).label("segment"),
+            ).where(condition)
+        )
+
+    feed = (union_all(*segments) if len(segments) > 1 else segments[0]).subquery()
+    idiom = aliased(IdiomModel, feed)
+    order = [(feed.c.segment, False), (idiom.shuffle_key, False), (idiom.id, False)]
+    return select(*idiom_columns(idiom, fields)), order
+
+
+def set_next_cursor(response: Response, next_cursor: str | None) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def idiom_fields(
+    fields: Annotated[str | None, Query(max_length=500)] = None,
+    view: Literal["full", "card"] = "full",
+) -> list[str]:
+    """Fields to return, from a comma separated `fields` list or a named `view`"""
+    return project_fields(fields, view)
+
+
+IdiomFields = Annotated[list[str], Depends(idiom_fields)]
+
+
+async def idioms_response(
+    db: AsyncSession,
+    user_id: UUID,
+    rows: list[Sequence[Any]],
+    fields: list[str],
+    next_cursor: str | None,
+) -> Response:
+    """Encode a page of `idiom_columns` rows with the state of the requesting user.
+
+    The rows are serialized directly instead of being validated into models and then
+    validated again against the endpoint's `response_model`. The user's state is only
+    loaded when one of its fields is requested.
+    """
+    states = {}
+    if any(name in STATE_FIELDS for name in fields):
+        id_index = column_fields(fields).index("id")
+        states = await load_user_states(db, user_id, (row[id_index] for row in rows))
+    response = json_response(encode_idioms(rows, fields, states))
+    set_next_cursor(response, next_cursor)
+    return response
+
+
+def idiom_tags(body: bytes) -> list[str]:
+    """Tags of a page of idioms, invalidated by votes and favorites on one of them"""
+    return [idiom_tag(idiom["id"]) for idiom in from_json(body)]
+
+
+async def cached_idioms_response(
+    request: Request,
+    user_id: UUID,
+    fields: list[str],
+    build: Callable[[], Awaitable[Response]],
+) -> Response:
+    """Serve a page of idioms through the response cache, per user if it has state.
+
+    Pages showing counters or state are tagged with their idioms, so that a vote
+    only rebuilds the pages its idiom is on.
+    """
+    tags = idiom_tags if VOTED_FIELDS.intersection(fields) else None
+    if not any(name in STATE_FIELDS for name in fields):
+        return await response_cache.respond(
+            request, cache_key(request), build, tags=tags
+        )
+    return await response_cache.respond(
+        request, cache_key(request, user_id), build, tags=tags
+    )
+
 
 @router.get("/categories", response_model=list[str])
-async def get_categories(db: SessionDep) -> list[str]:
+async def get_categories(db: SessionDep, request: Request) -> Response:
     """Get all unique categories from the database"""
-    result = db.execute(
-        sql_text(
-            "SELECT DISTINCT unnest(context_diversity) as context_diversity "
-            "FROM idioms ORDER BY context_diversity"
-        )
+
+    async def build() -> Response:
+        return json_response(await encode_category_names(db))
+
+    return await response_cache.respond(
+        request, cache_key(request), build, max_age=app_settings.categories_cache_ttl
+    )
+
+
+@router.get("/categories/counts", response_model=list[CategorySchema])
+async def get_category_counts(db: SessionDep, request: Request) -> Response:
+    """Get all categories with the number of idioms in each"""
+
+    async def build() -> Response:
+        return json_response(await encode_category_counts(db))
+
+    return await response_cache.respond(
+        request, cache_key(request), build, max_age=app_settings.categories_cache_ttl
     )
-    return [row[0] for row in result.fetchall()]
 
 
 @router.get("/", response_model=list[IdiomSchema])
 async def get_idioms(
     db: SessionDep,
+    request: Request,
+    current_user: CurrentUser,
+    fields: IdiomFields,
     page: Annotated[int, Query(ge=1)] = 1,
     limit: Annotated[int, Query(ge=1, le=50)] = 50,
     text: Annotated[str, Query(max_length=200)] = "",
-    category: Annotated[str | None, Query(max_length=500)] = None,
+    category: TagsQuery = None,
+    theme: TagsQuery = None,
+    sentiment: TagsQuery = None,
+    match: Literal["any", "all"] = "any",
     sort: Annotated[
-        str | None, Query(pattern=r"^-?(frequency|imagery)$")
+        str | None, Query(pattern=r"^(-?(frequency|imagery)|relevance)$")
     ] = None,
-) -> list[IdiomSchema]:
+    cursor: CursorQuery = None,
+) -> Response:
     text = text.strip()
-    offset = (page - 1) * limit
-
-    query = db.query(IdiomModel)
+    query = idioms_query(fields, text, category, theme, sentiment, match)
 
-    if text:
-        query = query.filter(IdiomModel.text.ilike(f"%{text}%"))
-    if category:
-        categories = [cat.strip() for cat in category.split(",") if cat.strip()]
-        if categories:
-            filters = [IdiomModel.context_diversity.any(cat) for cat in categories]
-            query = query.filter(or_(*filters))
-
-    match sort:
-        case "frequency":
-            query = query.order_by(IdiomModel.frequency_of_use.asc())
-        case "-frequency":
-            query = query.order_by(IdiomModel.frequency_of_use.desc())
-        case "imagery":
-            query = query.order_by(IdiomModel.literal_transparency.asc())
-        case "-imagery":
-            query = query.order_by(IdiomModel.literal_transparency.desc())
-        case _:
-            query = query.order_by(IdiomModel.text.asc())
+    async def build() -> Response:
+        rows, next_cursor = await fetch_page(
+            db,
+            query,
+            idiom_order(sort, text),
+            limit,
+            page=page,
+            cursor=cursor,
+            scope=sort or "text",
+        )
+        return await idioms_response(db, current_user.id, rows, fields, next_cursor)
 
-    return [
-        IdiomSchema.model_validate(idiom)
-        for idiom in (query.limit(limit).offset(offset).all())
-    ]
+    return await cached_idioms_response(request, current_user.id, fields, build)
 
 
 @router.get("/random", response_model=list[IdiomSchema])
 async def get_random_idioms(
     db: SessionDep,
+    request: Request,
+    current_user: CurrentUser,
+    fields: IdiomFields,
     page: Annotated[int, Query(ge=1)] = 1,
     limit: Annotated[int, Query(ge=1, le=50)] = 50,
     seed: Annotated[int | None, Query()] = None,
-) -> list[IdiomSchema]:
-    offset = (page - 1) * limit
-    if seed is not None:
-        db.execute(sql_text(f"SELECT setseed({seed % 1000 / 1000.0})"))
-    return [
-        IdiomSchema.model_validate(idiom)
-        for idiom in db.query(IdiomModel)
-        .order_by(func.random())
-        .limit(limit)
-        .offset(offset)
-        .all()
-    ]
+    cursor: CursorQuery = None,
+) -> Response:
+    # Unseeded feeds draw a new seed per request, so they cannot be resumed
+    if cursor and seed is None:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    scope = f"random:{seed}"
+    if seed is None:
+        query, order = shuffled_feed(secrets.randbelow(SHUFFLE_KEY_RANGE), fields)
+    else:
+        query, order = shuffled_feed(seed, fields)
+    if cursor and seed is not None:
+        # The position is applied inside each half of the feed, see shuffled_feed
+        query, order = shuffled_feed(seed, fields, decode_cursor(cursor, scope, order))
+        page = 1
+
+    async def build() -> Response:
+        rows, next_cursor = await fetch_page(
+            db, query, order, limit, page=page, scope=scope
+        )
+        if seed is None:
+            next_cursor = None
+        return await idioms_response(db, current_user.id, rows, fields, next_cursor)
+
+    if seed is None:
+        return await build()
+    return await cached_idioms_response(request, current_user.id, fields, build)
 
 
 @router.get("/favorites", response_model=list[IdiomSchema])
 async def get_favorite_idioms(
     db: SessionDep,
+    request: Request,
+    current_user: CurrentUser,
+    fields: IdiomFields,
     page: Annotated[int, Query(ge=1)] = 1,
     limit: Annotated[int, Query(ge=1, le=50)] = 50,
-) -> list[IdiomSchema]:
-    offset = (page - 1) * limit
+    cursor: CursorQuery = None,
+) -> Response:
+    # Served by the partial favorites index on user_idiom, whatever the user count
+    query = (
+        select(*idiom_columns(IdiomModel, fields))
+        .join(UserIdiomModel, UserIdiomModel.idiom_id == IdiomModel.id)
+        .where(UserIdiomModel.user_id == current_user.id, UserIdiomModel.favorite)
+    )
+
+    async def build() -> Response:
+        rows, next_cursor = await fetch_page(
+            db,
+            query,
+            [(UserIdiomModel.idiom_text, False), (UserIdiomModel.idiom_id, False)],
+            limit,
+            page=page,
+            cursor=cursor,
+            scope="favorites",
+        )
+        return await idioms_response(db, current_user.id, rows, fields, next_cursor)
 
-    return [
-        IdiomSchema.model_validate(idiom)
-        for idiom in db.query(IdiomModel)
-        .filter(IdiomModel.favorite)
-        .order_by(IdiomModel.text.asc())
-        .limit(limit)
-        .offset(offset)
-        .all()
-    ]
+    def tags(body: bytes) -> list[str]:
+        # Favoriting an idiom changes which idioms the pages hold
+        return [favorites_tag(current_user.id), *idiom_tags(body)]
+
+    return await response_cache.respond(
+        request, cache_key(request, current_user.id), build, tags=tags
+    )
+
+
+@router.get("/export", response_model=list[IdiomSchema])
+async def export_idioms(
+    batch_size: Annotated[int, Query(ge=1, le=10_000)] = app_settings.export_batch_size,
+) -> StreamingResponse:
+    """Stream every idiom as one JSON list in text order, without user state.
+
+    Rows are read through a server-side cursor `batch_size` at a time and encoded as
+    they arrive, so memory use stays flat whatever the size of the corpus.
+    """
+
+    async def partitions() -> AsyncIterator[Sequence[Any]]:
+        # The request's session is closed before the body is streamed
+        async with database.AsyncReplicaSessionLocal() as db:
+            result = await db.stream(
+                select(*idiom_columns())
+                .order_by(IdiomModel.text, IdiomModel.id)
+                .execution_options(yield_per=batch_size)
+            )
+            async for rows in result.partitions():
+                yield rows
+
+    return StreamingResponse(
+        encode_idiom_stream(partitions(), IDIOM_FIELDS),
+        media_type="application/json",
+    )
 
 
 @router.post("/", status_code=201)
 async def post_idioms(
     db: SessionDep, current_user: CurrentUser, payload: list[IdiomCreate]
 ) -> None:
-    idioms = [IdiomModel(**idiom.model_dump()) for idiom in payload]
-    db.add_all(idioms)
-    db.commit()
+    # Idioms are unique by text, a repeated text updates the existing idiom
+    idioms = {idiom.text: idiom for idiom in payload}
+    await upsert_idioms(db, idioms.values())
+    await response_cache.invalidate()
 
 
-@router.post("/{id}/upvote", response_model=IdiomSchema)
-async def upvote_idiom(db: SessionDep, id: UUID) -> IdiomSchema:
-    idiom = db.query(IdiomModel).filter(IdiomModel.id == id).first()
+@router.post("/import", response_model=ImportReport)
+async def import_idioms_ndjson(
+    db: SessionDep,
+    request: Request,
+    batch_size: Annotated[int, Query(ge=1, le=10_000)] = app_settings.import_batch_size,
+) -> ImportReport:
+    """Upsert idioms from an NDJSON body, one idiom per line, keyed on their text.
+
+    The body is streamed and committed in batches of `batch_size` lines, so imports of
+    any size run in constant memory and a replayed import updates instead of
+    duplicating idioms.
+    """
+    lines = ndjson_lines(request.stream(), app_settings.import_max_line_bytes)
+    report = await import_idioms(db, lines, batch_size)
+    if report.inserted or report.updated:
+        await response_cache.invalidate()
+    return report
+
+
+async def vote(
+    db: AsyncSession, current_user: UserModel, id: UUID, value: Vote
+) -> IdiomSchema:
+    if app_settings.vote_write_behind:
+        idiom = await db.get(IdiomModel, id)
+        if idiom:
+            vote_buffer.add(current_user.id, id, value)
+    else:
+        idiom = await set_vote(db, current_user.id, id, value)
+        await response_cache.invalidate_tags([idiom_tag(id)])
     if not idiom:
         raise HTTPException(status_code=404, detail="Idiom not found")
-    idiom.upvotes += 1
-    db.add(idiom)
-    db.commit()
-    db.refresh(idiom)
-    return idiom
+    [schema] = await idioms_for_user(db, current_user.id, [idiom])
+    # Buffered votes are not counted until the next flush
+    return schema.model_copy(update={"vote": value})
+
+
+@router.post("/{id}/upvote", response_model=IdiomSchema)
+async def upvote_idiom(
+    db: SessionDep, current_user: CurrentUser, id: UUID
+) -> IdiomSchema:
+    return await vote(db, current_user, id, 1)
 
 
 @router.post("/{id}/downvote", response_model=IdiomSchema)
-async def downvote_idiom(db: SessionDep, id: UUID) -> IdiomSchema:
-    idiom = db.query(IdiomModel).filter(IdiomModel.id == id).first()
-    if not idiom:
-        raise HTTPException(status_code=404, detail="Idiom not found")
-    idiom.downvotes += 1
-    db.add(idiom)
-    db.commit()
-    db.refresh(idiom)
-    return idiom
+async def downvote_idiom(
+    db: SessionDep, current_user: CurrentUser, id: UUID
+) -> IdiomSchema:
+    return await vote(db, current_user, id, -1)
 
 
 @router.patch("/{id}", response_model=IdiomSchema)
-async def update_idiom(db: SessionDep, id: UUID, payload: IdiomUpdate) -> IdiomSchema:
-    idiom = db.query(IdiomModel).filter(IdiomModel.id == id).first()
+async def update_idiom(
+    db: SessionDep, current_user: CurrentUser, id: UUID, payload: IdiomUpdate
+) -> IdiomSchema:
+    """Update the requesting user's state for an idiom"""
+    if payload.favorite is not None:
+        await db.execute(
+            UPSERT_FAVORITE,
+            {"user_id": current_user.id, "idiom_id": id, "favorite": payload.favorite},
+        )
+    idiom = await db.get(IdiomModel, id)
     if not idiom:
         raise HTTPException(status_code=404, detail="Idiom not found")
-    idiom_update = payload.model_dump(exclude_unset=True)
-    for key, value in idiom_update.items():
-        setattr(idiom, key, value)
-    db.add(idiom)
-    db.commit()
-    db.refresh(idiom)
-    return idiom
+    [schema] = await idioms_for_user(db, current_user.id, [idiom])
+    await db.commit()
+    if payload.favorite is not None:
+        await response_cache.invalidate_tags(
+            [idiom_tag(id), favorites_tag(current_user.id)]
+        )
+    return schema
@@ -1,14 +1,14 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import database
-from app.middleware import get_current_user
+from app.middleware import api_key_cache, get_current_user
 from app.models.users import UserModel
 from app.schemas.users import UserCreate, UserPublicSchema, UserSchema
 
-SessionDep = Annotated[Session, Depends(database.get_session)]
+SessionDep = Annotated[AsyncSession, Depends(database.get_session)]
 CurrentUser = Annotated[UserModel, Depends(get_current_user)]
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -18,8 +18,9 @@ router = APIRouter(prefix="/users", tags=["users"])
 async def register_user(db: SessionDep, user: UserCreate) -> UserSchema:
     user_model = UserModel(**user.model_dump())
     db.add(user_model)
-    db.commit()
-    db.refresh(user_model)
+    await db.commit()
+    await db.refresh(user_model)
+    api_key_cache.invalidate(user_model.api_key)
 
     return user_model
 
@@ -19,9 +19,11 @@ class IdiomSchema(BaseModel):
     depiction: list[str]
     alternative_depiction: list[str]
     meaning_depiction: list[str]
-    favorite: bool = False
     upvotes: int = 0
     downvotes: int = 0
+    # State of the requesting user
+    favorite: bool = False
+    vote: int = 0
 
     created_at: datetime
     updated_at: datetime
@@ -29,6 +31,19 @@ class IdiomSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class IdiomCardSchema(BaseModel):
+    """Fields of `IdiomSchema` shown on the list screens, returned by `view=card`"""
+
+    id: UUID
+    text: str
+    meaning: str
+    depiction: list[str]
+    upvotes: int = 0
+    downvotes: int = 0
+    favorite: bool = False
+    vote: int = 0
+
+
 class IdiomCreate(BaseModel):
     text: str = Field(..., min_length=1, max_length=500)
     meaning: str = Field(..., min_length=1, max_length=1000)
@@ -43,10 +58,40 @@ class IdiomCreate(BaseModel):
     depiction: list[str] = Field(..., max_length=10)
     alternative_depiction: list[str] = Field(..., max_length=10)
     meaning_depiction: list[str] = Field(..., max_length=10)
-    favorite: bool = False
     upvotes: int = Field(default=0, ge=0)
     downvotes: int = Field(default=0, ge=0)
 
 
 class IdiomUpdate(BaseModel):
     favorite: bool | None = None
+
+
+class CategorySchema(BaseModel):
+    name: str
+    idiom_count: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ImportRejection(BaseModel):
+    line: int
+    detail: str
+
+
+class ImportBatchReport(BaseModel):
+    lines: int
+    inserted: int
+    updated: int
+    unchanged: int
+    rejected: int
+    seconds: float
+    lines_per_second: float
+
+
+class ImportReport(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    rejected: int = 0
+    batches: list[ImportBatchReport] = []
+    errors: list[ImportRejection] = []
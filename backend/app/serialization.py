@@ -0,0 +1,85 @@
+from collections.abc import AsyncIterable, AsyncIterator, Sequence
+from typing import Any
+from uuid import UUID
+
+from fastapi import HTTPException, Response, status
+from pydantic_core import to_json
+from sqlalchemy import ColumnElement
+
+from app.models.idioms import IdiomModel
+from app.models.user_idioms import UserIdiomModel
+from app.schemas.idioms import IdiomCardSchema, IdiomSchema
+
+# Fields of `IdiomSchema` stored on `idioms`, the others are the user's state
+IDIOM_FIELDS = [
+    name for name in IdiomSchema.model_fields if name in IdiomModel.__table__.c
+]
+STATE_FIELDS = [name for name in IdiomSchema.model_fields if name not in IDIOM_FIELDS]
+STATE_DEFAULTS = {name: IdiomSchema.model_fields[name].default for name in STATE_FIELDS}
+CARD_FIELDS = list(IdiomCardSchema.model_fields)
+
+
+def project_fields(fields: str | None, view: str) -> list[str]:
+    """`IdiomSchema` fields requested by `fields=` or a `view`, always with `id`"""
+    if not fields:
+        return CARD_FIELDS if view == "card" else list(IdiomSchema.model_fields)
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    if unknown := requested - IdiomSchema.model_fields.keys():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    return [
+        name for name in IdiomSchema.model_fields if name in requested or name == "id"
+    ]
+
+
+def column_fields(fields: list[str]) -> list[str]:
+    return [name for name in fields if name in IDIOM_FIELDS]
+
+
+def idiom_columns(
+    idiom: Any = IdiomModel, fields: list[str] = IDIOM_FIELDS
+) -> list[ColumnElement[Any]]:
+    """Columns to select for `fields` of `idiom`, a model or an alias"""
+    return [getattr(idiom, name) for name in column_fields(fields)]
+
+
+def encode_idioms(
+    rows: Sequence[Sequence[Any]],
+    fields: list[str],
+    states: dict[UUID, UserIdiomModel],
+) -> bytes:
+    """Encode rows of `idiom_columns` to a JSON list shaped like `IdiomSchema`.
+
+    The rows come straight from the database, so they are neither validated nor
+    turned into models: plain dicts are encoded by pydantic-core in one pass. Only
+    the state fields listed in `fields` are added.
+    """
+    columns = column_fields(fields)
+    state_fields = [name for name in STATE_FIELDS if name in fields]
+    idioms = []
+    for row in rows:
+        idiom = dict(zip(columns, row, strict=True))
+        if state_fields:
+            state = states.get(idiom["id"])
+            for name in state_fields:
+                idiom[name] = getattr(state, name) if state else STATE_DEFAULTS[name]
+        idioms.append(idiom)
+    return to_json(idioms)
+
+
+async def encode_idiom_stream(
+    partitions: AsyncIterable[Sequence[Sequence[Any]]], fields: list[str]
+) -> AsyncIterator[bytes]:
+    """Encode partitions of `idiom_columns` rows as the chunks of one JSON list"""
+    separator = b"["
+    async for rows in partitions:
+        if rows:
+            yield separator + encode_idioms(rows, fields, {})[1:-1]
+            separator = b","
+    yield b"]" if separator == b"," else b"[]"
+
+
+def json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
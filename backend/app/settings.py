@@ -11,8 +11,43 @@ class AppSettings(BaseSettings):
     db_password: str
     db_name: str
     db_port: str
+    db_host: str = "localhost"
+    # Full URLs take precedence over the parts above
+    db_url: str | None = None
+    db_replica_url: str | None = None
+    db_replica_sticky_seconds: float = 5.0
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    # The sync engine only creates tables and sets up tests, next to the async pools
+    db_sync_pool_size: int = 1
+    db_sync_max_overflow: int = 2
+    # Migrations own the schema, `create_all` is only for throwaway databases
+    create_tables_on_startup: bool = False
     allowed_origins: list[str] = ["http://localhost:8081"]
     debug_mode: bool = False
+    api_key_cache_size: int = 10_000
+    api_key_cache_ttl: float = 300.0
+    api_key_negative_cache_ttl: float = 30.0
+    categories_cache_ttl: int = 60
+    response_cache_size: int = 1024
+    response_cache_ttl: float = 300.0
+    response_cache_url: str | None = None
+    vote_write_behind: bool = False
+    vote_flush_interval: float = 1.0
+    import_batch_size: int = 1000
+    import_max_line_bytes: int = 1_000_000
+    export_batch_size: int = 1000
+    compression_minimum_size: int = 1000
+    gzip_level: int = 6
+    brotli_quality: int = 4
+    sql_profiling: bool = False
+    slow_query_seconds: float = 0.2
+    # Values of bound parameters, which include API keys, so only for debugging
+    slow_query_log_parameters: bool = False
+    sql_explain_sample_rate: float = 0.0
+    sql_statement_budget: int = 20
+    sql_repeated_statement_threshold: int = 5
 
 
 app_settings = AppSettings()
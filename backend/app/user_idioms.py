@@ -0,0 +1,105 @@
+from collections.abc import Iterable, Sequence
+from uuid import UUID
+
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, Insert, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.idioms import IdiomModel
+from app.models.user_idioms import UserIdiomModel
+from app.schemas.idioms import IdiomSchema
+
+
+def upsert_user_idiom(column: str) -> Insert:
+    """Statement setting `column` of a user's state for an idiom.
+
+    It takes the `user_id`, `idiom_id` and `column` parameters, copies the idiom's
+    text for the favorites index, inserts nothing for an unknown idiom and leaves the
+    row untouched when the value does not change.
+    """
+    table = UserIdiomModel.__table__
+    statement = insert(table).from_select(
+        ["user_id", "idiom_id", "idiom_text", column],
+        select(
+            bindparam("user_id", type_=table.c.user_id.type),
+            IdiomModel.id,
+            IdiomModel.text,
+            bindparam(column, type_=table.c[column].type),
+        ).where(IdiomModel.id == bindparam("idiom_id")),
+        include_defaults=False,
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.idiom_id],
+        set_={column: statement.excluded[column], "updated_at": func.now()},
+        where=table.c[column] != statement.excluded[column],
+    )
+
+
+def upsert_user_idioms(column: str) -> Insert:
+    """Statement setting `column` for many users and idioms at once.
+
+    It takes the `user_ids`, `idiom_ids` and `values` array parameters, zipped into
+    rows, so that the triggers of `user_idiom` run once for the whole batch. Pairs
+    must be unique, unknown idioms are skipped like in `upsert_user_idiom`.
+    """
+    table = UserIdiomModel.__table__
+    rows = select(
+        func.unnest(bindparam("user_ids", type_=ARRAY(table.c.user_id.type))).label(
+            "user_id"
+        ),
+        func.unnest(bindparam("idiom_ids", type_=ARRAY(table.c.idiom_id.type))).label(
+            "idiom_id"
+        ),
+        func.unnest(bindparam("values", type_=ARRAY(table.c[column].type))).label(
+            "value"
+        ),
+    ).subquery()
+    statement = insert(table).from_select(
+        ["user_id", "idiom_id", "idiom_text", column],
+        select(rows.c.user_id, IdiomModel.id, IdiomModel.text, rows.c.value).join(
+            IdiomModel, IdiomModel.id == rows.c.idiom_id
+        ),
+        include_defaults=False,
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.idiom_id],
+        set_={column: statement.excluded[column], "updated_at": func.now()},
+        where=table.c[column] != statement.excluded[column],
+    )
+
+
+UPSERT_FAVORITE = upsert_user_idiom("favorite")
+UPSERT_VOTE = upsert_user_idiom("vote")
+UPSERT_VOTES = upsert_user_idioms("vote")
+
+
+async def load_user_states(
+    db: AsyncSession, user_id: UUID, idiom_ids: Iterable[UUID]
+) -> dict[UUID, UserIdiomModel]:
+    """Favorite and vote state of a user for a page of idioms, by idiom id"""
+    idiom_ids = list(idiom_ids)
+    if not idiom_ids:
+        return {}
+    states = await db.scalars(
+        select(UserIdiomModel).where(
+            UserIdiomModel.user_id == user_id,
+            UserIdiomModel.idiom_id.in_(idiom_ids),
+        )
+    )
+    return {state.idiom_id: state for state in states}
+
+
+async def idioms_for_user(
+    db: AsyncSession, user_id: UUID, idioms: Sequence[IdiomModel]
+) -> list[IdiomSchema]:
+    """Serialize idioms with the favorite and vote state of the requesting user"""
+    states = await load_user_states(db, user_id, (idiom.id for idiom in idioms))
+    schemas = []
+    for idiom in idioms:
+        schema = IdiomSchema.model_validate(idiom)
+        if state := states.get(idiom.id):
+            schema = schema.model_copy(
+                update={"favorite": state.favorite, "vote": state.vote}
+            )
+        schemas.append(schema)
+    return schemas
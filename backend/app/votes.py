@@ -0,0 +1,103 @@
+import asyncio
+import contextlib
+import logging
+from typing import Literal
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database
+from app.http_cache import idiom_tag, response_cache
+from app.models.idioms import IdiomModel
+from app.settings import app_settings
+from app.user_idioms import UPSERT_VOTE, UPSERT_VOTES
+
+logger = logging.getLogger(__name__)
+
+# 1 for an upvote, -1 for a downvote
+Vote = Literal[1, -1]
+
+
+async def set_vote(
+    db: AsyncSession, user_id: UUID, id: UUID, vote: Vote
+) -> IdiomModel | None:
+    """Record the vote of a user and return the idiom with its updated counters.
+
+    Voting again in the same direction changes nothing, switching direction moves
+    the vote from one counter to the other. The counters are updated atomically by
+    the `user_idiom` trigger.
+    """
+    await db.execute(UPSERT_VOTE, {"user_id": user_id, "idiom_id": id, "vote": vote})
+    idiom = await db.get(IdiomModel, id)
+    await db.commit()
+    return idiom
+
+
+class VoteBuffer:
+    """Write-behind buffer for votes on hot idioms.
+
+    The latest vote of each user is kept in memory and written in one batch every
+    `interval` seconds, so concurrent votes on the same idiom no longer queue on its
+    row lock. Votes still buffered are lost if the process dies before a flush.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._pending: dict[tuple[UUID, UUID], Vote] = {}
+        self._task: asyncio.Task | None = None
+
+    def add(self, user_id: UUID, id: UUID, vote: Vote) -> None:
+        self._pending[(user_id, id)] = vote
+
+    async def flush(self) -> int:
+        """Write the buffered votes and return how many were written"""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        # A stable order keeps concurrent flushes from deadlocking on row locks
+        votes = sorted(pending.items(), key=lambda item: (item[0][1], item[0][0]))
+        # One statement, so the counters of each idiom are updated once per flush
+        params = {
+            "user_ids": [user_id for (user_id, _), _ in votes],
+            "idiom_ids": [id for (_, id), _ in votes],
+            "values": [vote for _, vote in votes],
+        }
+        try:
+            async with database.AsyncSessionLocal() as db:
+                await db.execute(UPSERT_VOTES, params)
+                await db.commit()
+            # Only the pages showing a voted idiom change
+            await response_cache.invalidate_tags(
+                {idiom_tag(id) for id in params["idiom_ids"]}
+            )
+        except BaseException:
+            # Keep the failed votes unless the user has voted again since, also when
+            # the flush is cancelled at shutdown, which `stop` flushes again
+            for key, vote in pending.items():
+                self._pending.setdefault(key, vote)
+            raise
+        return len(votes)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush buffered votes, retrying later")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            # Wait for a flush in progress to give its votes back before the last one
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+
+vote_buffer = VoteBuffer(interval=app_settings.vote_flush_interval)
@@ -0,0 +1,111 @@
+"""Load benchmark for the API key middleware.
+
+Serves the API in-process twice, once with the pure ASGI `APIKeyMiddleware` and once
+with the previous `BaseHTTPMiddleware` implementation, and reports requests/sec on
+`/idioms/` at 1, 16 and 128 concurrent clients. It needs the local database from
+`docker-compose.yaml`:
+
+    uv run python -m benchmarks.auth_middleware --requests 2000 [--no-cache]
+
+`--no-cache` disables the API key cache, so every request pays for the user lookup.
+"""
+
+import argparse
+import asyncio
+import json
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.database import SessionLocal
+from app.middleware import APIKeyCache, APIKeyMiddleware
+from app.models.users import UserModel
+from app.routers import idioms, users
+from app.settings import app_settings
+from benchmarks.common import register_api_key, run_load, serve
+
+CONCURRENCY_LEVELS = [1, 16, 128]
+
+
+class BaseHTTPAPIKeyMiddleware(BaseHTTPMiddleware):
+    """The previous implementation, with a blocking lookup on the event loop"""
+
+    def __init__(self, app, cache: APIKeyCache):
+        super().__init__(app)
+        self.auth = APIKeyMiddleware(app, cache=cache)
+
+    async def dispatch(self, request: Request, call_next):
+        if self.auth.is_exempt(request.url.path):
+            return await call_next(request)
+
+        api_key = request.headers.get("x-api-key")
+        user = None
+        if api_key:
+            found, user = self.auth.cache.get(api_key)
+            if not found:
+                with SessionLocal() as db:
+                    user = (
+                        db.query(UserModel).filter(UserModel.api_key == api_key).first()
+                    )
+                self.auth.cache.set(api_key, user)
+
+        if not user:
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"detail": "Unauthorized"},
+            )
+
+        request.state.user = user
+        return await call_next(request)
+
+
+def build_app(middleware_class: type, cache: APIKeyCache) -> FastAPI:
+    app = FastAPI()
+    app.include_router(idioms.router)
+    app.include_router(users.router)
+    app.add_middleware(middleware_class, cache=cache)
+    return app
+
+
+def build_cache(enabled: bool) -> APIKeyCache:
+    if not enabled:
+        return APIKeyCache(max_size=0, ttl=0.0, negative_ttl=0.0)
+    return APIKeyCache(
+        max_size=app_settings.api_key_cache_size,
+        ttl=app_settings.api_key_cache_ttl,
+        negative_ttl=app_settings.api_key_negative_cache_ttl,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--path", default="/idioms/?limit=10")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+    for middleware_class in (APIKeyMiddleware, BaseHTTPAPIKeyMiddleware):
+        app = build_app(middleware_class, build_cache(not args.no_cache))
+        with serve(app) as base_url:
+            headers = {"x-api-key": register_api_key(base_url)}
+            runs = [
+                asyncio.run(
+                    run_load(base_url, args.path, level, args.requests, headers)
+                )
+                for level in CONCURRENCY_LEVELS
+            ]
+        results[middleware_class.__name__] = [run.as_dict() for run in runs]
+        for run in runs:
+            print(
+                f"{middleware_class.__name__:<26} clients={run.concurrency:<4} "
+                f"{run.requests_per_second:>8} req/s  p50={run.p50_ms}ms "
+                f"p99={run.p99_ms}ms errors={run.errors}"
+            )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
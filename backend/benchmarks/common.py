@@ -0,0 +1,106 @@
+import asyncio
+import statistics
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+import httpx
+import uvicorn
+
+
+@dataclass
+class LoadResult:
+    concurrency: int
+    requests: int
+    errors: int
+    seconds: float
+    requests_per_second: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@contextmanager
+def serve(app, port: int = 8765) -> Iterator[str]:
+    """Run `app` with uvicorn in a background thread and yield its base URL"""
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def run_load(
+    base_url: str,
+    path: str,
+    concurrency: int,
+    total_requests: int,
+    headers: dict[str, str] | None = None,
+) -> LoadResult:
+    """Issue `total_requests` GETs against `path` from `concurrency` clients"""
+    latencies: list[float] = []
+    errors = 0
+    remaining = total_requests
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal errors, remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, limits=limits, timeout=60.0
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        seconds = time.perf_counter() - started
+
+    return summarize(latencies, errors, seconds, concurrency)
+
+
+def summarize(
+    latencies: list[float], errors: int, seconds: float, concurrency: int
+) -> LoadResult:
+    """Throughput and latency percentiles of requests timed in milliseconds"""
+    return LoadResult(
+        concurrency=concurrency,
+        requests=len(latencies),
+        errors=errors,
+        seconds=round(seconds, 3),
+        requests_per_second=round(len(latencies) / seconds, 1) if seconds else 0.0,
+        p50_ms=round(statistics.median(latencies), 2) if latencies else 0.0,
+        p95_ms=round(percentile(latencies, 0.95), 2),
+        p99_ms=round(percentile(latencies, 0.99), 2),
+    )
+
+
+def register_api_key(base_url: str) -> str:
+    response = httpx.post(
+        f"{base_url}/users/register", json={"installation_id": "benchmark"}
+    )
+    response.raise_for_status()
+    return response.json()["api_key"]
@@ -0,0 +1,80 @@
+"""Synthetic idiom corpora for benchmarks, generated inside Postgres."""
+
+from sqlalchemy import Connection, text
+
+from app.models.idioms import IdiomModel
+
+WORDS = [
+    "apple", "bridge", "cat", "dog", "early", "bird", "feather", "goose", "horse",
+    "iron", "jump", "kettle", "lemon", "moon", "nail", "ocean", "pie", "quiet",
+    "rain", "storm", "tea", "umbrella", "wolf", "bite", "bullet", "spill", "beans",
+    "break", "ice", "cake", "piece", "leg", "arm", "head", "heart", "hand",
+    "water", "fire", "stone", "bush", "barn", "boat", "penny", "dime", "clock",
+]  # fmt: skip
+CATEGORIES = [
+    "business", "daily life", "education", "entertainment", "sports", "music",
+    "relationships", "politics", "science", "military", "parenting", "travel",
+]  # fmt: skip
+SENTIMENTS = ["positive", "negative", "neutral", "humorous", "sarcastic"]
+
+WORD = "w.words[1 + floor(random() * array_length(w.words, 1))::int]"
+CATEGORY = "w.categories[1 + floor(random() * array_length(w.categories, 1))::int]"
+SENTIMENT = "w.sentiments[1 + floor(random() * array_length(w.sentiments, 1))::int]"
+RATING = "round((random() * 10)::numeric, 1)::float"
+
+COLUMN_EXPRESSIONS = {
+    "id": "gen_random_uuid()",
+    "text": f"{WORD} || ' ' || {WORD} || ' ' || {WORD} || ' ' || g",
+    "meaning": f"'To ' || {WORD} || ' the ' || {WORD} || ' when ' || {WORD}",
+    "explanation": f"'A synthetic explanation about ' || {WORD} || ' and ' || {WORD}",
+    "examples": f"ARRAY['Example with ' || {WORD}, 'Another one with ' || {WORD}]",
+    "frequency_of_use": RATING,
+    "category_theme": f"ARRAY[{WORD}, {WORD}]",
+    "sentiment": f"ARRAY[{SENTIMENT}]",
+    "context_diversity": f"ARRAY[{CATEGORY}, {CATEGORY}]",
+    "literal_transparency": RATING,
+    "translation_difficulty": RATING,
+    "depiction": "ARRAY['🌧️', '🐈', '🐕']",
+    "alternative_depiction": "ARRAY['☔']",
+    "meaning_depiction": "ARRAY['💧', '💧']",
+    "upvotes": "0",
+    "downvotes": "0",
+}
+
+
+def create_idioms_table_copy(
+    conn: Connection, table: str, with_indexes: bool = False
+) -> None:
+    """Create an empty scratch table with the columns of `idioms`"""
+    including = "ALL" if with_indexes else "DEFAULTS INCLUDING CONSTRAINTS"
+    conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    conn.execute(text(f"CREATE TABLE {table} (LIKE idioms INCLUDING {including})"))
+
+
+def fill_idioms(
+    conn: Connection, table: str, rows: int, batch_size: int = 100_000
+) -> None:
+    """Insert `rows` synthetic idioms into `table`, batch by batch"""
+    columns = [
+        column for column in COLUMN_EXPRESSIONS if column in IdiomModel.__table__.c
+    ]
+    statement = text(
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"SELECT {', '.join(COLUMN_EXPRESSIONS[column] for column in columns)} "
+        "FROM generate_series(:start, :stop) AS g, "
+        "(SELECT CAST(:words AS text[]) AS words, "
+        "CAST(:categories AS text[]) AS categories, "
+        "CAST(:sentiments AS text[]) AS sentiments) AS w"
+    )
+    for start in range(1, rows + 1, batch_size):
+        conn.execute(
+            statement,
+            {
+                "start": start,
+                "stop": min(start + batch_size - 1, rows),
+                "words": WORDS,
+                "categories": CATEGORIES,
+                "sentiments": SENTIMENTS,
+            },
+        )
+    conn.execute(text(f"ANALYZE {table}"))
@@ -0,0 +1,353 @@
+"""Load suite driving every idioms and users route on synthetic corpora.
+
+`run` replaces the idioms of the local database from `docker-compose.yaml` with a
+synthetic corpus of each `--rows` size, serves the API in-process and issues a
+weighted mix of requests from every `--concurrency` level of clients. Throughput and
+p50/p95/p99 latencies, overall and per operation, are written to a JSON baseline.
+Replacing the corpus deletes all idioms, votes and favorites, so it has to be
+confirmed with `--replace-corpus`:
+
+    uv run python -m benchmarks.load run --replace-corpus \\
+        --rows 10000 100000 1000000 --concurrency 1 16 64 --output baseline.json
+
+The mix is set with `--mix name=weight ...`, the operations being the keys of
+`OPERATIONS`. `export` streams the whole corpus and is left out of the default mix.
+
+`compare` flags the operations whose latency grew or throughput dropped by more
+than `--tolerance` between two baselines, and exits with status 1 if any did:
+
+    uv run python -m benchmarks.load compare baseline.json candidate.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import text
+
+from app.database import engine
+from app.http_cache import response_cache
+from app.main import app
+from benchmarks.common import register_api_key, serve, summarize
+from benchmarks.corpus import CATEGORIES, WORDS, fill_idioms
+
+# Operations with fewer requests in a run are too noisy to compare
+MIN_COMPARED_REQUESTS = 20
+IMPORT_LINES = 10
+
+Operation = Callable[
+    [httpx.AsyncClient, dict[str, str], list[str], random.Random],
+    Awaitable[httpx.Response],
+]
+_created = itertools.count()
+
+
+def idiom_payload(rng: random.Random) -> dict:
+    word = rng.choice(WORDS)
+    return {
+        "text": f"load {word} {next(_created)} {rng.getrandbits(32)}",
+        "meaning": f"To {word} under load",
+        "explanation": "An idiom created by the load suite.",
+        "examples": [f"They had to {word} under load."],
+        "frequency_of_use": rng.random(),
+        "category_theme": [word],
+        "sentiment": ["neutral"],
+        "context_diversity": [rng.choice(CATEGORIES)],
+        "literal_transparency": rng.random(),
+        "translation_difficulty": rng.random(),
+        "depiction": ["⚙️"],
+        "alternative_depiction": [],
+        "meaning_depiction": ["📈"],
+    }
+
+
+def get(path: Callable[[list[str], random.Random], str]) -> Operation:
+    async def operation(client, headers, ids, rng):
+        return await client.get(path(ids, rng), headers=headers)
+
+    return operation
+
+
+async def create(client, headers, _ids, rng):
+    return await client.post("/idioms/", headers=headers, json=[idiom_payload(rng)])
+
+
+async def import_ndjson(client, headers, _ids, rng):
+    lines = (json.dumps(idiom_payload(rng)) for _ in range(IMPORT_LINES))
+    return await client.post(
+        "/idioms/import",
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+        content="\n".join(lines).encode(),
+    )
+
+
+async def upvote(client, headers, ids, rng):
+    return await client.post(f"/idioms/{rng.choice(ids)}/upvote", headers=headers)
+
+
+async def downvote(client, headers, ids, rng):
+    return await client.post(f"/idioms/{rng.choice(ids)}/downvote", headers=headers)
+
+
+async def favorite(client, headers, ids, rng):
+    return await client.patch(
+        f"/idioms/{rng.choice(ids)}",
+        headers=headers,
+        json={"favorite": rng.random() < 0.8},
+    )
+
+
+async def register(client, _headers, _ids, _rng):
+    return await client.post("/users/register", json={"installation_id": "load"})
+
+
+OPERATIONS: dict[str, Operation] = {
+    "list": get(lambda _ids, _rng: "/idioms/?limit=50"),
+    "list_card": get(lambda _ids, _rng: "/idioms/?limit=50&view=card"),
+    "search": get(lambda _ids, rng: f"/idioms/?text={rng.choice(WORDS)}"),
+    "search_relevance": get(
+        lambda _ids, rng: f"/idioms/?text={rng.choice(WORDS)}&sort=relevance"
+    ),
+    "filter": get(lambda _ids, rng: f"/idioms/?category={rng.choice(CATEGORIES)}"),
+    "sort_frequency": get(lambda _ids, _rng: "/idioms/?sort=-frequency"),
+    "random": get(lambda _ids, rng: f"/idioms/random?seed={rng.randrange(1000)}"),
+    "favorites": get(lambda _ids, _rng: "/idioms/favorites"),
+    "categories": get(lambda _ids, _rng: "/idioms/categories"),
+    "category_counts": get(lambda _ids, _rng: "/idioms/categories/counts"),
+    "export": get(lambda _ids, _rng: "/idioms/export"),
+    "create": create,
+    "import": import_ndjson,
+    "upvote": upvote,
+    "downvote": downvote,
+    "favorite": favorite,
+    "register": register,
+    "me": get(lambda _ids, _rng: "/users/me"),
+}
+DEFAULT_MIX = {
+    "list": 20,
+    "list_card": 10,
+    "search": 10,
+    "search_relevance": 5,
+    "filter": 10,
+    "sort_frequency": 5,
+    "random": 10,
+    "favorites": 5,
+    "categories": 3,
+    "category_counts": 3,
+    "export": 0,
+    "create": 1,
+    "import": 1,
+    "upvote": 6,
+    "downvote": 3,
+    "favorite": 4,
+    "register": 1,
+    "me": 3,
+}
+
+
+def parse_mix(values: list[str]) -> dict[str, int]:
+    mix = dict(DEFAULT_MIX)
+    for value in values:
+        name, _, weight = value.partition("=")
+        if name not in OPERATIONS:
+            raise SystemExit(
+                f"Unknown operation {name!r}, use one of {list(OPERATIONS)}"
+            )
+        mix[name] = int(weight)
+    return mix
+
+
+def replace_corpus(rows: int) -> list[str]:
+    """Replace the idioms by `rows` synthetic ones and return a sample of their ids"""
+    with engine.begin() as conn:
+        # TRUNCATE does not fire the triggers counting idioms per category
+        conn.execute(text("TRUNCATE idioms, idiom_categories CASCADE"))
+        fill_idioms(conn, "idioms", rows)
+        ids = conn.scalars(
+            text("SELECT id FROM idioms ORDER BY shuffle_key LIMIT 1000")
+        )
+        sample = [str(id) for id in ids]
+    # The corpus changed behind the API's back
+    asyncio.run(response_cache.invalidate())
+    return sample
+
+
+async def run_mix(
+    base_url: str,
+    mix: dict[str, int],
+    concurrency: int,
+    total_requests: int,
+    ids: list[str],
+    seed: int,
+) -> dict[str, dict]:
+    """Issue `total_requests` operations drawn from `mix` by `concurrency` clients"""
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: Counter[str] = Counter()
+    remaining = total_requests
+    # Every client votes and favorites as a user of its own
+    headers = [{"x-api-key": register_api_key(base_url)} for _ in range(concurrency)]
+
+    async def worker(client: httpx.AsyncClient, index: int) -> None:
+        nonlocal remaining
+        rng = random.Random(seed + index)
+        while remaining > 0:
+            remaining -= 1
+            [name] = rng.choices(names, weights)
+            started = time.perf_counter()
+            response = await OPERATIONS[name](client, headers[index], ids, rng)
+            latencies[name].append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors[name] += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=120.0
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client, index) for index in range(concurrency)))
+        seconds = time.perf_counter() - started
+
+    everything = [latency for samples in latencies.values() for latency in samples]
+    results = {"all": summarize(everything, errors.total(), seconds, concurrency)}
+    for name in names:
+        results[name] = summarize(latencies[name], errors[name], seconds, concurrency)
+    return {name: result.as_dict() for name, result in results.items()}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> None:
+    if not args.replace_corpus:
+        raise SystemExit(
+            "Replacing the corpus deletes all idioms, pass --replace-corpus"
+        )
+    mix = parse_mix(args.mix)
+    baseline = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "requests": args.requests,
+            "mix": mix,
+        },
+        "results": {},
+    }
+    for rows in args.rows:
+        ids = replace_corpus(rows)
+        levels = baseline["results"][str(rows)] = {}
+        with serve(app) as base_url:
+            for concurrency in args.concurrency:
+                levels[str(concurrency)] = asyncio.run(
+                    run_mix(base_url, mix, concurrency, args.requests, ids, args.seed)
+                )
+                overall = levels[str(concurrency)]["all"]
+                print(
+                    f"rows={rows:<8} clients={concurrency:<4} "
+                    f"{overall['requests_per_second']:>8} req/s  "
+                    f"p50={overall['p50_ms']}ms p95={overall['p95_ms']}ms "
+                    f"p99={overall['p99_ms']}ms errors={overall['errors']}"
+                )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+    print(f"Baseline written to {args.output}")
+
+
+def find_regressions(baseline: dict, candidate: dict, tolerance: float) -> list[str]:
+    """Operations of `candidate` slower, or with more errors, than in `baseline`"""
+    regressions = []
+    for rows, levels in candidate["results"].items():
+        for concurrency, operations in levels.items():
+            previous = baseline["results"].get(rows, {}).get(concurrency, {})
+            for name, new in operations.items():
+                old = previous.get(name)
+                if old is None or min(old["requests"], new["requests"]) < (
+                    MIN_COMPARED_REQUESTS
+                ):
+                    continue
+                where = f"rows={rows} clients={concurrency} {name}"
+                for metric in ["p50_ms", "p95_ms", "p99_ms"]:
+                    if old[metric] and new[metric] > old[metric] * (1 + tolerance):
+                        change = new[metric] / old[metric] - 1
+                        regressions.append(
+                            f"{where}: {metric} {old[metric]} -> {new[metric]} "
+                            f"(+{change:.0%})"
+                        )
+                if name == "all" and new["requests_per_second"] < old[
+                    "requests_per_second"
+                ] * (1 - tolerance):
+                    regressions.append(
+                        f"{where}: requests_per_second {old['requests_per_second']} "
+                        f"-> {new['requests_per_second']}"
+                    )
+                old_rate = old["errors"] / old["requests"]
+                new_rate = new["errors"] / new["requests"]
+                if new_rate > old_rate:
+                    regressions.append(
+                        f"{where}: error rate {old_rate:.1%} -> {new_rate:.1%}"
+                    )
+    return regressions
+
+
+def compare(args: argparse.Namespace) -> None:
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+
+    regressions = find_regressions(baseline, candidate, args.tolerance)
+    for regression in regressions:
+        print(regression)
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions beyond {args.tolerance:.0%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(required=True)
+
+    run_parser = commands.add_parser("run", help="Record a baseline")
+    run_parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    run_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    run_parser.add_argument("--requests", type=int, default=2000)
+    run_parser.add_argument("--mix", nargs="*", default=[], metavar="NAME=WEIGHT")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", default="load_baseline.json")
+    run_parser.add_argument("--replace-corpus", action="store_true")
+    run_parser.set_defaults(command=run)
+
+    compare_parser = commands.add_parser("compare", help="Compare two baselines")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--tolerance", type=float, default=0.15)
+    compare_parser.set_defaults(command=compare)
+
+    args = parser.parse_args()
+    args.command(args)
+
+
+if __name__ == "__main__":
+    main()
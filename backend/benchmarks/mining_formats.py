@@ -0,0 +1,137 @@
+"""Benchmark of the intermediate file formats of the data_mining scripts.
+
+Compares the chunk files the scripts used to write (`json.dump(..., indent=4)` per
+chunk of 20 idioms, read back with `rglob` and `json.load`) with the record files of
+`data_mining/records.py`, in each compression available. Records are synthetic
+idioms with non-ASCII translations, or those of existing JSON chunk files:
+
+    uv run python -m benchmarks.mining_formats --records 100000
+    uv run python -m benchmarks.mining_formats --from-dir data_mining/resources/stats
+"""
+
+import argparse
+import json
+import pathlib
+import random
+import tempfile
+import time
+
+from data_mining.records import read_records, write_records, zstandard
+
+CHUNK_SIZE = 20
+# Not `benchmarks.corpus`, which needs the settings of the app and its database
+WORDS = ["apple", "bridge", "cat", "dog", "early", "bird", "feather", "goose", "moon"]
+CATEGORIES = ["business", "daily life", "education", "entertainment", "sports"]
+SENTIMENTS = ["positive", "negative", "neutral", "humorous", "sarcastic"]
+TRANSLATIONS = ["Avoir le cafard", "Tomaten auf den Augen haben", "猫の手も借りたい"]
+
+
+def synthetic_records(count: int) -> list[dict]:
+    rng = random.Random(0)
+
+    def sentence(words: int) -> str:
+        return " ".join(rng.choices(WORDS + TRANSLATIONS, k=words)).capitalize() + "."
+
+    return [
+        {
+            "text": f"{WORDS[index % len(WORDS)]} the {WORDS[-index % len(WORDS)]} "
+            f"{index}",
+            "meaning": sentence(8),
+            "explanation": " ".join(sentence(12) for _ in range(3)),
+            "examples": [sentence(10) for _ in range(3)],
+            "frequency_of_use": round(rng.uniform(0, 10), 1),
+            "category_theme": rng.sample(WORDS, 2),
+            "sentiment": rng.sample(SENTIMENTS, 2),
+            "context_diversity": rng.sample(CATEGORIES, 3),
+            "literal_transparency": round(rng.uniform(0, 10), 1),
+            "translation_difficulty": round(rng.uniform(0, 10), 1),
+            "depiction": ["🌧️", "🐈", "🐕"],
+        }
+        for index in range(count)
+    ]
+
+
+def write_chunks(directory: pathlib.Path, records: list[dict]) -> None:
+    for chunk, start in enumerate(range(0, len(records), CHUNK_SIZE)):
+        with open(directory / f"chunk_{chunk}.json", "w", encoding="utf-8") as f:
+            json.dump(
+                records[start : start + CHUNK_SIZE], f, indent=4, ensure_ascii=False
+            )
+
+
+def read_chunks(directory: pathlib.Path) -> int:
+    result = []
+    for file in directory.rglob("*.json"):
+        with open(file) as f:
+            result.extend(json.load(f))
+    return len(result)
+
+
+def measure(records: list[dict], write, read, path: pathlib.Path) -> dict:
+    """Throughput of writing and parsing `records`, in records and in MB of compact
+    JSON per second, whatever the size of the files
+    """
+    payload = sum(len(json.dumps(x, ensure_ascii=False).encode()) for x in records)
+    started = time.perf_counter()
+    write()
+    written = time.perf_counter() - started
+    started = time.perf_counter()
+    count = read()
+    parsed = time.perf_counter() - started
+    assert count == len(records), "Every record must be read back"
+    files = [path] if path.is_file() else list(path.rglob("*"))
+    size = sum(file.stat().st_size for file in files)
+    return {
+        "bytes": size,
+        "write_records_per_second": round(len(records) / written),
+        "parse_records_per_second": round(len(records) / parsed),
+        "write_mb_per_second": round(payload / written / 1e6, 1),
+        "parse_mb_per_second": round(payload / parsed / 1e6, 1),
+    }
+
+
+def benchmark(records: list[dict]) -> dict:
+    suffixes = [".ndjson", ".ndjson.gz"] + ([".ndjson.zst"] if zstandard else [])
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        chunks = pathlib.Path(directory) / "chunks"
+        chunks.mkdir()
+        results["json_chunks"] = measure(
+            records,
+            lambda: write_chunks(chunks, records),
+            lambda: read_chunks(chunks),
+            chunks,
+        )
+        for suffix in suffixes:
+            path = pathlib.Path(directory) / f"records{suffix}"
+            results[suffix.lstrip(".")] = measure(
+                records,
+                lambda path=path: write_records(str(path), records),
+                lambda path=path: sum(1 for _ in read_records(str(path))),
+                path,
+            )
+    baseline = results["json_chunks"]
+    for timings in results.values():
+        timings["size_ratio"] = round(timings["bytes"] / baseline["bytes"], 3)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--from-dir", help="Use the records of these JSON chunks")
+    args = parser.parse_args()
+
+    if args.from_dir:
+        records = []
+        for file in sorted(pathlib.Path(args.from_dir).rglob("*.json")):
+            records.extend(read_records(str(file)))
+    else:
+        records = synthetic_records(args.records)
+
+    print(f"Throughput and size of {len(records)} records per format:")
+    print(json.dumps(benchmark(records), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Latency benchmark for the seeded random feed behind `GET /idioms/random`.
+
+Compares the previous `ORDER BY random()` query with the shuffle key feed, paged by
+offset and by cursor, on scratch tables of 100k and 1M synthetic idioms. It needs
+the local database from `docker-compose.yaml`:
+
+    uv run python -m benchmarks.random_feed --rows 100000 1000000
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import Connection, text
+
+from app.database import engine
+from benchmarks.corpus import create_idioms_table_copy, fill_idioms
+
+TABLE = "benchmark_random_idioms"
+LIMIT = 50
+START = 1_234_567_890
+
+
+def feed_query(first_segment_filter: str = "", second_segment_filter: str = "") -> str:
+    return (
+        f"SELECT * FROM (SELECT *, 0 AS segment FROM {TABLE} "
+        f"WHERE shuffle_key >= :start {first_segment_filter} "
+        f"UNION ALL SELECT *, 1 AS segment FROM {TABLE} "
+        f"WHERE shuffle_key < :start {second_segment_filter}) AS feed "
+        "ORDER BY segment, shuffle_key, id LIMIT :limit OFFSET :offset"
+    )
+
+
+QUERIES = {
+    "order_by_random": (
+        f"SELECT * FROM {TABLE} ORDER BY random() LIMIT :limit OFFSET :offset"
+    ),
+    "shuffle_key_offset": feed_query(),
+    "shuffle_key_cursor": feed_query("AND (shuffle_key, id) > (:after_key, :after_id)"),
+}
+
+
+def time_query(conn: Connection, query: str, params: dict, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(text(query), params).all()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 2)
+
+
+def benchmark(conn: Connection, rows: int, pages: list[int], repeat: int) -> dict:
+    with conn.begin():
+        create_idioms_table_copy(conn, TABLE)
+        fill_idioms(conn, TABLE, rows)
+        conn.execute(text(f"CREATE INDEX ON {TABLE} (shuffle_key, id)"))
+        conn.execute(text(f"ANALYZE {TABLE}"))
+
+    results = {}
+    for page in pages:
+        offset = (page - 1) * LIMIT
+        # The cursor of a page points at the last idiom of the page before it
+        after_key, after_id = conn.execute(
+            text(feed_query().replace("SELECT *", "SELECT shuffle_key, id", 1)),
+            {"start": START, "limit": 1, "offset": max(offset - 1, 0)},
+        ).one()
+        params = {
+            "start": START,
+            "limit": LIMIT,
+            "offset": offset,
+            "after_key": after_key,
+            "after_id": after_id,
+        }
+        results[f"page_{page}"] = {
+            name: time_query(
+                conn,
+                query,
+                {**params, "offset": 0} if "cursor" in name else params,
+                repeat,
+            )
+            for name, query in QUERIES.items()
+        }
+
+    with conn.begin():
+        conn.execute(text(f"DROP TABLE {TABLE}"))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        results = {
+            str(rows): benchmark(conn, rows, args.pages, args.repeat)
+            for rows in args.rows
+        }
+
+    print(f"Median latency in ms for pages of {LIMIT} idioms:")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
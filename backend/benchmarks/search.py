@@ -0,0 +1,77 @@
+"""Search latency benchmark for `GET /idioms/?text=`.
+
+Fills a scratch copy of the `idioms` table with synthetic idioms and times the
+queries behind text search, first with a sequential scan and then with the
+`pg_trgm` GIN index used by the API. It needs the local database from
+`docker-compose.yaml`:
+
+    uv run python -m benchmarks.search --rows 1000000
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import Connection, text
+
+from app.database import engine
+from benchmarks.corpus import create_idioms_table_copy, fill_idioms
+
+TABLE = "benchmark_search_idioms"
+TERMS = ["goose", "bridge", "rain", "umbrella", "bite the"]
+QUERIES = {
+    "text": f"SELECT * FROM {TABLE} WHERE text ILIKE :pattern ORDER BY text LIMIT 50",
+    "relevance": (
+        f"SELECT * FROM {TABLE} WHERE text ILIKE :pattern "
+        "ORDER BY similarity(text, :term) DESC, text LIMIT 50"
+    ),
+}
+
+
+def time_query(conn: Connection, query: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        for term in TERMS:
+            started = time.perf_counter()
+            conn.execute(text(query), {"pattern": f"%{term}%", "term": term}).all()
+            samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch table")
+    args = parser.parse_args()
+
+    results: dict[str, dict[str, float]] = {}
+    with engine.connect() as conn:
+        with conn.begin():
+            create_idioms_table_copy(conn, TABLE)
+            fill_idioms(conn, TABLE, args.rows)
+
+        results["sequential_scan"] = {
+            name: time_query(conn, query, args.repeat)
+            for name, query in QUERIES.items()
+        }
+
+        with conn.begin():
+            conn.execute(text(f"CREATE INDEX ON {TABLE} USING gin (text gin_trgm_ops)"))
+            conn.execute(text(f"ANALYZE {TABLE}"))
+        results["trigram_index"] = {
+            name: time_query(conn, query, args.repeat)
+            for name, query in QUERIES.items()
+        }
+
+        if not args.keep:
+            with conn.begin():
+                conn.execute(text(f"DROP TABLE {TABLE}"))
+
+    print(f"Median search latency in ms over {args.rows} idioms:")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
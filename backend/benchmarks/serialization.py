@@ -0,0 +1,135 @@
+"""Micro-benchmark for serializing pages of idioms.
+
+Compares, per page size, the previous path (ORM objects validated into `IdiomSchema`
+and validated again by FastAPI against `response_model`) with the fast path used by
+the listing endpoints (selected column rows encoded straight to JSON bytes), and
+reports the latency and payload of the `view=card` projection. All of them run through
+a FastAPI app in-process, so the numbers include the framework's work but no database
+or network:
+
+    uv run python -m benchmarks.serialization --pages 1 10 50 --repeat 500
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime
+from uuid import uuid4
+
+import httpx
+from fastapi import FastAPI, Response
+
+from app.models.idioms import IdiomModel
+from app.schemas.idioms import IdiomSchema
+from app.serialization import (
+    CARD_FIELDS,
+    IDIOM_FIELDS,
+    column_fields,
+    encode_idioms,
+    json_response,
+)
+from benchmarks.corpus import CATEGORIES, SENTIMENTS, WORDS
+
+FULL_FIELDS = list(IdiomSchema.model_fields)
+
+
+def synthetic_idioms(count: int) -> list[IdiomModel]:
+    now = datetime.now()
+    return [
+        IdiomModel(
+            id=uuid4(),
+            text=f"{WORDS[index % len(WORDS)]} the {WORDS[-index % len(WORDS)]}",
+            meaning="To do something with a " + WORDS[index % len(WORDS)],
+            explanation="A synthetic explanation. " * 10,
+            examples=[f"Example {number} of the idiom in use." for number in range(3)],
+            frequency_of_use=0.5,
+            category_theme=WORDS[:3],
+            sentiment=SENTIMENTS[:2],
+            context_diversity=CATEGORIES[:4],
+            literal_transparency=0.25,
+            translation_difficulty=0.75,
+            depiction=["🌧️", "🐈", "🐕"],
+            alternative_depiction=["☔"],
+            meaning_depiction=["💧", "💧"],
+            upvotes=index,
+            downvotes=0,
+            created_at=now,
+            updated_at=now,
+        )
+        for index in range(count)
+    ]
+
+
+def build_app(idioms: list[IdiomModel]) -> FastAPI:
+    rows = [[getattr(idiom, name) for name in IDIOM_FIELDS] for idiom in idioms]
+    card_rows = [
+        [getattr(idiom, name) for name in column_fields(CARD_FIELDS)]
+        for idiom in idioms
+    ]
+    app = FastAPI()
+
+    @app.get("/validated", response_model=list[IdiomSchema])
+    async def validated(limit: int) -> list[IdiomSchema]:
+        return [IdiomSchema.model_validate(idiom) for idiom in idioms[:limit]]
+
+    @app.get("/encoded", response_model=list[IdiomSchema])
+    async def encoded(limit: int) -> Response:
+        return json_response(encode_idioms(rows[:limit], FULL_FIELDS, {}))
+
+    @app.get("/card", response_model=list[IdiomSchema])
+    async def card(limit: int) -> Response:
+        return json_response(encode_idioms(card_rows[:limit], CARD_FIELDS, {}))
+
+    return app
+
+
+async def time_requests(client: httpx.AsyncClient, path: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get(path)
+        samples.append((time.perf_counter() - started) * 1_000_000)
+        response.raise_for_status()
+    return round(statistics.median(samples), 1)
+
+
+async def benchmark(pages: list[int], repeat: int) -> dict:
+    app = build_app(synthetic_idioms(max(pages)))
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for limit in pages:
+            validated = await client.get(f"/validated?limit={limit}")
+            encoded = await client.get(f"/encoded?limit={limit}")
+            assert validated.json() == encoded.json(), "Both paths must agree"
+
+            timings = {
+                name: await time_requests(client, f"/{name}?limit={limit}", repeat)
+                for name in ["validated", "encoded", "card"]
+            }
+            timings["speedup"] = round(timings["validated"] / timings["encoded"], 2)
+            card = await client.get(f"/card?limit={limit}")
+            timings["full_bytes"] = len(encoded.content)
+            timings["card_bytes"] = len(card.content)
+            results[f"page_{limit}"] = timings
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args.pages, args.repeat))
+
+    print("Median latency in µs per request and payload sizes in bytes:")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
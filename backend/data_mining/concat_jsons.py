@@ -1,14 +1,90 @@
-import json
+"""Concatenates the record files of a directory into a single file of `records.py`.
+
+Concatenated gzip or zstandard files are valid ones, so inputs already in the format
+of the output are appended byte for byte, with `os.sendfile` when the platform has
+it. The others, like the JSON array chunks of older runs, are converted in a process
+pool first. The inputs are concatenated in the order of their paths.
+"""
+
+import argparse
+import os
 import pathlib
+import shutil
+import tempfile
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import BinaryIO
+
+from records import SUFFIX, compression, is_ndjson, read_records, write_records
 
 INPUT_DIR = "resources/corrected_stats"
-OUTFILE = f"{INPUT_DIR}.json"
 
-result = []
-for file in pathlib.Path(INPUT_DIR).rglob("*.json"):
-    print(f"Processing {file}")
-    with open(file) as f:
-        result.extend(json.load(f))
 
-with open(OUTFILE, "w", encoding="utf-8") as f:
-    json.dump(result, f, indent=4, ensure_ascii=False)
+def record_files(directory: str) -> list[str]:
+    paths = (path for path in pathlib.Path(directory).rglob("*") if path.is_file())
+    return sorted(
+        str(path) for path in paths if path.suffix == ".json" or is_ndjson(str(path))
+    )
+
+
+def convert(path: str, directory: str, suffix: str) -> str:
+    """Rewrite `path` as a temporary record file with `suffix` in `directory`"""
+    fd, part = tempfile.mkstemp(suffix=suffix, dir=directory)
+    os.close(fd)
+    write_records(part, read_records(path))
+    return part
+
+
+def append(out: BinaryIO, path: str) -> None:
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        offset = 0
+        try:
+            while offset < size:
+                sent = os.sendfile(out.fileno(), f.fileno(), offset, size - offset)
+                if not sent:
+                    break
+                offset += sent
+        except (AttributeError, OSError):
+            # No sendfile, or not between these files
+            f.seek(offset)
+            shutil.copyfileobj(f, out)
+
+
+def concat(paths: Sequence[str], outfile: str, workers: int | None = None) -> None:
+    output_compression = compression(outfile)
+    suffix = ".ndjson" + (pathlib.Path(outfile).suffix if output_compression else "")
+    # Plain NDJSON may lack its last newline, it is converted rather than appended
+    as_is = {
+        path
+        for path in paths
+        if output_compression is not None
+        and compression(path) == output_compression
+        and is_ndjson(path)
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        to_convert = [path for path in paths if path not in as_is]
+        with ProcessPoolExecutor(workers) as pool:
+            converted = dict(
+                zip(
+                    to_convert,
+                    pool.map(convert, to_convert, repeat(directory), repeat(suffix)),
+                    strict=True,
+                )
+            )
+        # Unbuffered, so that `sendfile` and Python writes land in order
+        with open(outfile, "wb", buffering=0) as out:
+            for path in paths:
+                print(f"Appending {path}")
+                append(out, path if path in as_is else converted[path])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input_dir", nargs="?", default=INPUT_DIR)
+    parser.add_argument("--output", help=f"Defaults to the directory name + {SUFFIX}")
+    parser.add_argument("--workers", type=int, help="Processes converting files")
+    args = parser.parse_args()
+    outfile = args.output or f"{args.input_dir.rstrip('/')}{SUFFIX}"
+    concat(record_files(args.input_dir), outfile, args.workers)
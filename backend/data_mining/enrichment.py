@@ -0,0 +1,331 @@
+"""Concurrent runner for the `pydantic_ai` agent calls of the mining scripts.
+
+Prompts are sent by a bounded pool of workers, paced by a token bucket and retried
+with jittered exponential backoff, and their results come back in prompt order:
+
+    runner = EnrichmentRunner(agent, concurrency=8, requests_per_second=5)
+    for result in runner.run_sync(prompts):
+        print(result.output if result.ok else result.error)
+
+Given a `ResultCache`, outputs are stored in SQLite as soon as each call succeeds,
+so an interrupted or repeated run only calls the model for the items that are missing
+or whose prompt changed.
+
+Anything with an async `run(prompt)` returning an object with `output` can stand in
+for the agent, which is how the runner is tested offline.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import sqlite3
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+from pydantic import TypeAdapter, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Quotes, bullets and punctuation that models add around the idioms they echo
+ECHO_DECORATIONS = " -.,;:!?\"'“”‘’"
+
+
+class RunnableAgent(Protocol):
+    async def run(self, user_prompt: str) -> Any: ...
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average and bursts of `capacity`"""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # Waiters are served one at a time, in the order they arrived
+        async with self._lock:
+            while True:
+                now = self.clock()
+                elapsed = now - self.updated
+                self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await self.sleep((1 - self.tokens) / self.rate)
+
+
+def normalize_text(text: str) -> str:
+    """Idiom text as compared with the ones echoed in batch outputs"""
+    return " ".join(text.split()).strip(ECHO_DECORATIONS).casefold()
+
+
+def backoff_delay(
+    attempt: int, base_delay: float, max_delay: float, rng: random.Random
+) -> float:
+    """Full jitter backoff: uniform up to `base_delay * 2**attempt`, capped"""
+    return rng.uniform(0, min(max_delay, base_delay * 2**attempt))
+
+
+@dataclass
+class EnrichmentResult:
+    """Outcome of one prompt, `error` being the last one if every attempt failed.
+
+    `text` is the idiom the result is about, and `cached` tells that the output was
+    read from the cache, in which case `tokens` are the ones the model call cost.
+    """
+
+    prompt: str
+    text: str = ""
+    output: Any = None
+    error: BaseException | None = None
+    attempts: int = 0
+    tokens: int = 0
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and (self.attempts > 0 or self.cached)
+
+
+class ResultCache:
+    """Outputs of an agent in SQLite, keyed by model, prompts, output schema and idiom.
+
+    Entries are committed one by one, so the cache doubles as the checkpoint of a run.
+    A single file can be shared by several scripts as their keys never collide, and
+    an entry that no longer validates against the output type is a miss.
+    """
+
+    def __init__(
+        self, path: str, model: str, system_prompt: str, output_type: Any = Any
+    ):
+        self.model = model
+        self.system_prompt = system_prompt
+        self.adapter = TypeAdapter(output_type)
+        self.schema = json.dumps(self.adapter.json_schema(), sort_keys=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, text TEXT NOT NULL, "
+            "output TEXT NOT NULL, tokens INTEGER NOT NULL, created REAL NOT NULL)"
+        )
+        self.connection.commit()
+
+    def key(self, prompt: str, text: str) -> str:
+        content = [self.model, self.system_prompt, self.schema, prompt, text]
+        return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+    def get(self, prompt: str, text: str) -> tuple[Any, int] | None:
+        """Output and token cost of a cached call"""
+        row = self.connection.execute(
+            "SELECT output, tokens FROM results WHERE key = ?",
+            (self.key(prompt, text),),
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return self.adapter.validate_json(row[0]), row[1]
+        except ValidationError:
+            return None
+
+    def put(self, prompt: str, text: str, output: Any, tokens: int) -> None:
+        self.connection.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                self.key(prompt, text),
+                self.model,
+                text,
+                self.adapter.dump_json(output).decode(),
+                tokens,
+                time.time(),
+            ),
+        )
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def report(results: Sequence[EnrichmentResult]) -> dict[str, int]:
+    """Cache hits, model calls and the tokens they cost or the cache saved"""
+    cached = [result for result in results if result.cached]
+    called = [result for result in results if not result.cached]
+    return {
+        "items": len(results),
+        "cache_hits": len(cached),
+        "model_calls": sum(result.attempts for result in called),
+        "failed": sum(not result.ok for result in results),
+        "tokens_used": sum(result.tokens for result in called),
+        "tokens_saved": sum(result.tokens for result in cached),
+    }
+
+
+class EnrichmentRunner:
+    def __init__(
+        self,
+        agent: RunnableAgent,
+        concurrency: int = 8,
+        requests_per_second: float = 5.0,
+        max_attempts: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        rng: random.Random | None = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        cache: ResultCache | None = None,
+    ):
+        self.agent = agent
+        self.concurrency = concurrency
+        self.requests_per_second = requests_per_second
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+        self.sleep = sleep
+        self.cache = cache
+
+    async def run(
+        self, prompts: Sequence[str], texts: Sequence[str] | None = None
+    ) -> list[EnrichmentResult]:
+        """Run every prompt and return their results in the order of `prompts`.
+
+        `texts` are the idioms of the prompts, which default to the prompts.
+        """
+        texts = prompts if texts is None else texts
+        results = [
+            EnrichmentResult(prompt, text)
+            for prompt, text in zip(prompts, texts, strict=True)
+        ]
+        pending = [result for result in results if not self.load(result)]
+        await self.call_all(pending, self.store)
+        self.log(results)
+        return results
+
+    async def run_batches(
+        self, texts: Sequence[str], template: str, batch_size: int
+    ) -> list[EnrichmentResult]:
+        """Run `template` over lists of idioms, for agents returning one item per idiom.
+
+        Only the idioms missing from the cache are batched, so a new idiom costs one
+        batch rather than shifting all of them. The output items are matched to the
+        idioms on their `text`, ignoring case, spacing and surrounding quotes or
+        punctuation, and take the text of their idiom back; idioms that the model left
+        out fail. The tokens of a batch are split evenly between its idioms.
+        """
+        results = [EnrichmentResult(template, text) for text in texts]
+        pending = [result for result in results if not self.load(result)]
+        batches = [
+            pending[start : start + batch_size]
+            for start in range(0, len(pending), batch_size)
+        ]
+        calls = [
+            EnrichmentResult(template.format("\n- ".join(r.text for r in batch)))
+            for batch in batches
+        ]
+        batch_of = {id(call): batch for call, batch in zip(calls, batches, strict=True)}
+
+        def split(call: EnrichmentResult) -> None:
+            batch = batch_of[id(call)]
+            outputs = {normalize_text(item.text): item for item in call.output or []}
+            for result in batch:
+                result.attempts = call.attempts
+                result.tokens = call.tokens // len(batch)
+                if not call.ok:
+                    result.error = call.error
+                elif (output := outputs.get(normalize_text(result.text))) is None:
+                    result.error = LookupError(f"No output for {result.text!r}")
+                else:
+                    # Merges and the cache join on the exact text of the idiom
+                    result.output = output.model_copy(update={"text": result.text})
+                    self.store(result)
+
+        await self.call_all(calls, split)
+        self.log(results)
+        return results
+
+    def run_sync(
+        self, prompts: Sequence[str], texts: Sequence[str] | None = None
+    ) -> list[EnrichmentResult]:
+        return asyncio.run(self.run(prompts, texts))
+
+    def run_batches_sync(
+        self, texts: Sequence[str], template: str, batch_size: int
+    ) -> list[EnrichmentResult]:
+        return asyncio.run(self.run_batches(texts, template, batch_size))
+
+    def load(self, result: EnrichmentResult) -> bool:
+        """Fill `result` from the cache, telling whether it was there"""
+        if self.cache is None:
+            return False
+        cached = self.cache.get(result.prompt, result.text)
+        if cached is None:
+            return False
+        result.output, result.tokens = cached
+        result.cached = True
+        return True
+
+    def store(self, result: EnrichmentResult) -> None:
+        if result.ok and self.cache is not None:
+            self.cache.put(result.prompt, result.text, result.output, result.tokens)
+
+    async def call_all(
+        self,
+        results: Sequence[EnrichmentResult],
+        done: Callable[[EnrichmentResult], None],
+    ) -> None:
+        """Call the agent for `results`, passing each one to `done` once it is over"""
+        bucket = TokenBucket(self.requests_per_second, sleep=self.sleep)
+        pending = iter(results)
+
+        async def worker() -> None:
+            # The iterator is shared, so each result is taken by exactly one worker
+            for result in pending:
+                await self.enrich(result, bucket)
+                done(result)
+
+        workers = min(self.concurrency, len(results))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+    def log(self, results: Sequence[EnrichmentResult]) -> None:
+        summary = report(results)
+        logger.info("Enrichment report: %s", summary)
+        if summary["failed"]:
+            logger.warning("%d of %d items failed", summary["failed"], len(results))
+
+    async def enrich(self, result: EnrichmentResult, bucket: TokenBucket) -> None:
+        for attempt in range(self.max_attempts):
+            await bucket.acquire()
+            result.attempts += 1
+            try:
+                run = await self.agent.run(result.prompt)
+            except Exception as error:
+                result.error = error
+                logger.warning(
+                    "Attempt %d of %r failed: %r", result.attempts, result.prompt, error
+                )
+                if attempt + 1 < self.max_attempts:
+                    await self.sleep(
+                        backoff_delay(
+                            attempt, self.base_delay, self.max_delay, self.rng
+                        )
+                    )
+                continue
+            result.output = run.output
+            result.error = None
+            usage = run.usage() if callable(getattr(run, "usage", None)) else None
+            result.tokens = getattr(usage, "total_tokens", None) or 0
+            return
@@ -1,10 +1,13 @@
-import json
-
 from dotenv import load_dotenv
+from enrichment import EnrichmentRunner, ResultCache, report
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent
+from records import SUFFIX, read_records, write_records
 
 MODEL = "openai:gpt-4o-mini"
+CACHE_FILENAME = "enrichment_cache.sqlite"
+MINER_FILENAME = f"miner_list{SUFFIX}"
+EXPLAINER_FILENAME = f"explainer_list{SUFFIX}"
 
 load_dotenv()
 
@@ -16,33 +19,24 @@ class ExpandedIdiom(BaseModel):
     examples: list[str] = Field(description="Examples of the idiom")
 
 
-agent = Agent(
-    MODEL,
-    result_type=ExpandedIdiom,
-    system_prompt="You are an idiom search engine. "
+EXPLAINER_PROMPT = (
+    "You are an idiom search engine. "
     "You are an expert in idioms, can explain their meanings, and give examples. "
     "You can also explain the origin or logic behind the idioms."
     "I'm going to give you an idiom. "
     "Give me back: the idioms text, its meaning, and a short explanation regarding its origin or the logic behind it. "
-    "Also provide three short, simple, funny examples capturing the idea of the idiom.",
+    "Also provide three short, simple, funny examples capturing the idea of the idiom."
 )
 
-with open("miner_list.json") as f:
-    idioms = json.load(f)
-
-for chunk in range(2, 10):
-    chunk_size = 20
-    results = []
-    for idiom in idioms[chunk * chunk_size : (chunk + 1) * chunk_size]:
-        expanded_idiom = agent.run_sync(f"Here is the idiom: '{idiom['text']}'.")
-        results.append(expanded_idiom.data)
-
-    print(results)
-
-    with open(f"explainer_list_chunk_{chunk}.json", "w", encoding="utf-8") as f:
-        json.dump(
-            [x.model_dump() for x in results],
-            f,
-            indent=4,
-            ensure_ascii=False,
-        )
+
+agent = Agent(MODEL, output_type=ExpandedIdiom, system_prompt=EXPLAINER_PROMPT)
+
+idioms = list(read_records(MINER_FILENAME))
+
+cache = ResultCache(CACHE_FILENAME, MODEL, EXPLAINER_PROMPT, ExpandedIdiom)
+runner = EnrichmentRunner(agent, concurrency=8, requests_per_second=5, cache=cache)
+texts = [idiom["text"] for idiom in idioms]
+expanded = runner.run_sync([f"Here is the idiom: '{text}'." for text in texts], texts)
+print(report(expanded))
+
+write_records(EXPLAINER_FILENAME, (x.output.model_dump() for x in expanded if x.ok))
@@ -0,0 +1,122 @@
+"""Loads the merged idioms into the database through `POST /idioms/import` of the API.
+
+Only the records that changed since they were last loaded are sent, the hashes of the
+loaded records being kept in `LOADED_FILENAME`, so a run after adding idioms imports
+those idioms only. The import upserts on the text, so sending a record twice is
+harmless. The script fails if the API rejected any record.
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+
+import requests
+from dotenv import load_dotenv
+
+LOADED_FILENAME = "loaded_idioms.sqlite"
+IDIOMS_FILENAME = "idioms.ndjson"
+BATCH_SIZE = 10_000
+REPORT_COUNTS = ("inserted", "updated", "unchanged", "rejected")
+
+load_dotenv()
+
+
+class LoadedRecords:
+    """Hashes of the NDJSON lines that the API accepted"""
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS loaded (hash TEXT PRIMARY KEY)"
+        )
+        self.connection.commit()
+
+    def __contains__(self, digest: str) -> bool:
+        query = "SELECT 1 FROM loaded WHERE hash = ?"
+        return self.connection.execute(query, (digest,)).fetchone() is not None
+
+    def add(self, digests: Iterable[str]) -> None:
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO loaded VALUES (?)", ((x,) for x in digests)
+        )
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def pending_batches(
+    path: str, loaded: LoadedRecords, batch_size: int
+) -> Iterator[list[tuple[str, bytes]]]:
+    """Batches of the (hash, line) of the records that were not loaded yet"""
+    batch = []
+    with open(path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            digest = hashlib.sha256(line).hexdigest()
+            if digest in loaded:
+                continue
+            batch.append((digest, line))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def load(
+    path: str,
+    loaded: LoadedRecords,
+    post: Callable[[bytes], dict],
+    batch_size: int = BATCH_SIZE,
+) -> Counter[str]:
+    """Send the new records of `path` to `post` and sum the import reports"""
+    totals: Counter[str] = Counter()
+    for batch in pending_batches(path, loaded, batch_size):
+        report = post(b"\n".join(line for _, line in batch))
+        rejected = {error["line"] for error in report["errors"]}
+        # Only the first rejections are listed, the batch is sent again if some miss
+        if report["rejected"] == len(rejected):
+            loaded.add(
+                digest
+                for number, (digest, _) in enumerate(batch, start=1)
+                if number not in rejected
+            )
+        totals.update({name: report[name] for name in REPORT_COUNTS})
+    return totals
+
+
+def import_endpoint(url: str, api_key: str) -> Callable[[bytes], dict]:
+    def post(body: bytes) -> dict:
+        response = requests.post(
+            f"{url.rstrip('/')}/idioms/import",
+            data=body,
+            headers={"x-api-key": api_key, "Content-Type": "application/x-ndjson"},
+            timeout=600,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    return post
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("idioms", nargs="?", default=IDIOMS_FILENAME)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    post = import_endpoint(
+        os.environ.get("IDIOMS_API_URL", "http://localhost:8000"),
+        os.environ["IDIOMS_API_KEY"],
+    )
+    loaded = LoadedRecords(LOADED_FILENAME)
+    totals = load(args.idioms, loaded, post, args.batch_size)
+    loaded.close()
+    print(dict(totals))
+    sys.exit(1 if totals["rejected"] else 0)
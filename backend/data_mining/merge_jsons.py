@@ -1,34 +1,145 @@
-import json
-from collections import defaultdict
+"""Joins the outputs of the mining scripts on the idiom's text into NDJSON records.
+
+The inputs are NDJSON files, see `records.py`, or JSON arrays. They are read as
+streams, sorted in runs spilled to disk and merged k-way, so memory stays bounded by
+the run size whatever the size of the corpus. Idioms missing from some of the inputs
+are written with the fields that were found, and a coverage report tells how
+complete each input is.
+"""
+
+import argparse
+import heapq
+import itertools
+import tempfile
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any
+
+from records import SUFFIX, read_records, write_ndjson, write_records
 
 JSONS_TO_MERGE = [
-    "explainer_list.json",
-    "stats.json",
-    "corrected_stats.json",
-    "depicted_idioms.json",
-    "depicted_idioms_2.json",
-    "depicted_meaning.json",
+    f"explainer_list{SUFFIX}",
+    f"stats{SUFFIX}",
+    f"corrected_stats{SUFFIX}",
+    f"depicted_idioms{SUFFIX}",
+    f"depicted_idioms_2{SUFFIX}",
+    f"depicted_meaning{SUFFIX}",
 ]
 MERGE_KEY = "text"
-OUTFILE = "idioms.json"
-
-files = {}
-for file in JSONS_TO_MERGE:
-    print(f"Reading {file}...")
-    with open(file) as f:
-        data = json.load(f)
-        files[file] = sorted(data, key=lambda x: x[MERGE_KEY])
-
-if len({len(data) for data in files.values()}) > 1:
-    print("Warning: JSON files have different lengths, merging will not be perfect.")
-    print("Lengths:", {file: len(data) for file, data in files.items()})
-    exit(1)
-
-result = defaultdict(dict)
-for file, data in files.items():
-    print(f"Processing {file}...")
-    for item in data:
-        result[item[MERGE_KEY]].update(item)
-
-with open(OUTFILE, "w", encoding="utf-8") as f:
-    json.dump(result, f, indent=4, ensure_ascii=False)
+OUTFILE = "idioms.ndjson"
+RUN_SIZE = 100_000
+
+
+def external_sort(
+    records: Iterable[dict[str, Any]],
+    key: str,
+    directory: str,
+    run_size: int = RUN_SIZE,
+) -> Iterator[dict[str, Any]]:
+    """Records sorted on `key`, spilling sorted runs of `run_size` into `directory`"""
+    records = iter(records)
+    runs = []
+    while run := sorted(itertools.islice(records, run_size), key=lambda x: x[key]):
+        if len(run) < run_size and not runs:
+            # Everything fits in a single run, no need to go through the disk
+            yield from run
+            return
+        fd, path = tempfile.mkstemp(suffix=".ndjson", dir=directory)
+        with open(fd, "w", encoding="utf-8") as f:
+            write_ndjson(run, f)
+        runs.append(path)
+    yield from heapq.merge(*(read_records(run) for run in runs), key=lambda x: x[key])
+
+
+class Coverage:
+    """How many of the joined idioms each source has a record for"""
+
+    def __init__(self, sources: Sequence[str], key: str):
+        self.sources = list(sources)
+        self.key = key
+        self.records: Counter[str] = Counter()
+        self.unkeyed: Counter[str] = Counter()
+        self.covered: Counter[str] = Counter()
+        self.idioms = 0
+        self.complete = 0
+
+    def keyed(
+        self, source: str, records: Iterable[dict[str, Any]]
+    ) -> Iterator[dict[str, Any]]:
+        """Count the records of `source`, dropping those without the key"""
+        for record in records:
+            self.records[source] += 1
+            if record.get(self.key) is None:
+                self.unkeyed[source] += 1
+                continue
+            yield record
+
+    def add(self, present: set[str]) -> None:
+        self.idioms += 1
+        self.covered.update(present)
+        self.complete += len(present) == len(self.sources)
+
+    def report(self) -> str:
+        lines = [f"{self.idioms} idioms, {self.complete} found in every source"]
+        for source in self.sources:
+            covered = self.covered[source]
+            share = covered / self.idioms if self.idioms else 0.0
+            lines.append(
+                f"{source}: {covered} idioms ({share:.1%}), "
+                f"{self.idioms - covered} missing, {self.records[source]} records, "
+                f"{self.unkeyed[source]} without {self.key!r}"
+            )
+        return "\n".join(lines)
+
+
+def tag(source: str, records: Iterable[dict[str, Any]], key: str) -> Iterator[tuple]:
+    for record in records:
+        yield record[key], source, record
+
+
+def join(
+    sources: dict[str, Iterable[dict[str, Any]]], key: str, coverage: Coverage
+) -> Iterator[dict[str, Any]]:
+    """Merge sources sorted on `key` into one record per key.
+
+    Later sources override the fields of earlier ones, and records of a source that
+    share a key are merged in the order they were read.
+    """
+    order = {source: index for index, source in enumerate(sources)}
+    streams = [tag(source, records, key) for source, records in sources.items()]
+    merged = heapq.merge(*streams, key=lambda x: (x[0], order[x[1]]))
+    for _, group in itertools.groupby(merged, key=lambda x: x[0]):
+        record: dict[str, Any] = {}
+        present = set()
+        for _, source, item in group:
+            record.update(item)
+            present.add(source)
+        coverage.add(present)
+        yield record
+
+
+def merge(
+    paths: Sequence[str], outfile: str, key: str = MERGE_KEY, run_size: int = RUN_SIZE
+) -> Coverage:
+    coverage = Coverage(paths, key)
+    with tempfile.TemporaryDirectory() as directory:
+        sources = {
+            path: external_sort(
+                coverage.keyed(path, read_records(path)), key, directory, run_size
+            )
+            for path in paths
+        }
+        write_records(outfile, join(sources, key, coverage))
+    return coverage
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="*", default=JSONS_TO_MERGE)
+    parser.add_argument("--output", default=OUTFILE)
+    parser.add_argument(
+        "--run-size", type=int, default=RUN_SIZE, help="Records sorted in memory"
+    )
+    args = parser.parse_args()
+    print(f"Merging {', '.join(args.inputs)} into {args.output}...")
+    print(merge(args.inputs, args.output, run_size=args.run_size).report())
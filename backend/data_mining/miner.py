@@ -1,10 +1,12 @@
-import json
+import pathlib
 
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent
+from records import SUFFIX, read_records, write_records
 
 MODEL = "openai:gpt-4o-mini"
+MINER_FILENAME = f"miner_list{SUFFIX}"
 
 load_dotenv()
 
@@ -15,7 +17,7 @@ class Idiom(BaseModel):
 
 agent = Agent(
     MODEL,
-    result_type=list[Idiom],
+    output_type=list[Idiom],
     system_prompt="You are an idiom search engine. "
     "You are an expert in idioms and phrases. You can provide endless list of well-known and also not so more exotic idioms, phrases and manners of speech."
     "You are very creative and very well read. You know all idioms and phrases in the world in any given language",
@@ -26,7 +28,12 @@ result = agent.run_sync(
 )
 
 print(result)
-print(result.data)
-
-with open("miner_list.json", "w") as f:
-    json.dump([x.model_dump() for x in result.data], f, indent=4)
+print(result.output)
+
+# New idioms are added to those mined before, whose enrichment is then cached
+idioms = {}
+if pathlib.Path(MINER_FILENAME).exists():
+    idioms = {idiom["text"]: idiom for idiom in read_records(MINER_FILENAME)}
+mined = {x.text: x.model_dump() for x in result.output if x.text not in idioms}
+print(f"Mined {len(mined)} new idioms")
+write_records(MINER_FILENAME, [*idioms.values(), *mined.values()])
@@ -0,0 +1,59 @@
+"""Maps the merged idioms onto the records that `POST /idioms/import` accepts.
+
+`stats_generator.py` rates idioms on a scale of 0 to 10 where the API takes 0 to 1,
+the depiction stages only write `depiction`, and the model sometimes answers with
+longer lists than the API keeps. Idioms missing a field the API requires, because an
+enrichment failed for them, are left out and counted, so that the load only sends
+records it can import.
+"""
+
+import argparse
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from records import read_records, write_records
+
+MERGED_FILENAME = "merged_idioms.ndjson"
+IDIOMS_FILENAME = "idioms.ndjson"
+TEXTS = ("text", "meaning", "explanation")
+# Lists the API requires at least one item in
+LISTS = ("examples", "category_theme", "sentiment", "context_diversity")
+DEPICTIONS = ("depiction", "alternative_depiction", "meaning_depiction")
+RATINGS = ("frequency_of_use", "literal_transparency", "translation_difficulty")
+RATING_SCALE = 10
+MAX_ITEMS = 10
+
+
+def normalize(record: dict[str, Any]) -> dict[str, Any] | None:
+    """Importable record of a merged one, None if it misses a required field"""
+    if any(not record.get(name) for name in (*TEXTS, *LISTS)):
+        return None
+    if any(record.get(name) is None for name in RATINGS):
+        return None
+    normalized = {name: record[name] for name in TEXTS}
+    for name in (*LISTS, *DEPICTIONS):
+        normalized[name] = list(record.get(name) or [])[:MAX_ITEMS]
+    for name in RATINGS:
+        normalized[name] = min(max(record[name] / RATING_SCALE, 0.0), 1.0)
+    return normalized
+
+
+def normalize_all(
+    records: Iterable[dict[str, Any]], counts: Counter[str]
+) -> Iterator[dict[str, Any]]:
+    for record in records:
+        normalized = normalize(record)
+        counts["kept" if normalized is not None else "incomplete"] += 1
+        if normalized is not None:
+            yield normalized
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("merged", nargs="?", default=MERGED_FILENAME)
+    parser.add_argument("--output", default=IDIOMS_FILENAME)
+    args = parser.parse_args()
+    counts: Counter[str] = Counter()
+    write_records(args.output, normalize_all(read_records(args.merged), counts))
+    print(f"{counts['kept']} idioms kept, {counts['incomplete']} incomplete left out")
@@ -0,0 +1,224 @@
+"""Runs the mining scripts as a pipeline, from mining idioms to loading them in the API.
+
+Each stage is a script with the files it reads and writes. A stage runs once the
+stages writing its inputs are done, stages that do not depend on each other running
+in parallel. A stage is skipped when its script and inputs hash the same as on its
+last successful run and its outputs are unchanged, the fingerprints being kept in
+`STATE_FILENAME`. Together with the result cache of the enrichment scripts and the
+incremental load, new idioms only cost the model calls and imports of those idioms:
+
+    python pipeline.py
+    python pipeline.py --force miner  # Mine more idioms
+"""
+
+import argparse
+import hashlib
+import pathlib
+import sqlite3
+import subprocess
+import sys
+import threading
+from collections.abc import Iterable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from records import SUFFIX
+
+STATE_FILENAME = "pipeline_state.sqlite"
+MINER_FILENAME = f"miner_list{SUFFIX}"
+EXPLAINER_FILENAME = f"explainer_list{SUFFIX}"
+STATS_FILENAME = f"stats{SUFFIX}"
+CORRECTED_STATS_FILENAME = f"corrected_stats{SUFFIX}"
+DEPICTION_FILENAME = f"depicted_meaning{SUFFIX}"
+MERGED_FILENAME = "merged_idioms.ndjson"
+IDIOMS_FILENAME = "idioms.ndjson"
+ENRICHED = (
+    EXPLAINER_FILENAME,
+    STATS_FILENAME,
+    CORRECTED_STATS_FILENAME,
+    DEPICTION_FILENAME,
+)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """A script run with `args`, reading `inputs` and writing `outputs`.
+
+    Paths are relative to the directory of the pipeline, where the scripts run.
+    """
+
+    name: str
+    script: str
+    args: tuple[str, ...] = ()
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+
+
+STAGES = [
+    Stage("miner", "miner.py", outputs=(MINER_FILENAME,)),
+    Stage(
+        "explainer",
+        "explainer.py",
+        inputs=(MINER_FILENAME,),
+        outputs=(EXPLAINER_FILENAME,),
+    ),
+    Stage(
+        "stats",
+        "stats_generator.py",
+        inputs=(MINER_FILENAME,),
+        outputs=(STATS_FILENAME,),
+    ),
+    Stage(
+        "corrected_stats",
+        "stats_generator_correction.py",
+        inputs=(MINER_FILENAME,),
+        outputs=(CORRECTED_STATS_FILENAME,),
+    ),
+    Stage(
+        "smiley",
+        "smiley_generator.py",
+        inputs=(MINER_FILENAME,),
+        outputs=(DEPICTION_FILENAME,),
+    ),
+    Stage(
+        "merge",
+        "merge_jsons.py",
+        args=(*ENRICHED, "--output", MERGED_FILENAME),
+        inputs=ENRICHED,
+        outputs=(MERGED_FILENAME,),
+    ),
+    Stage(
+        "normalize",
+        "normalize_idioms.py",
+        args=(MERGED_FILENAME, "--output", IDIOMS_FILENAME),
+        inputs=(MERGED_FILENAME,),
+        outputs=(IDIOMS_FILENAME,),
+    ),
+    Stage("load", "load_idioms.py", args=(IDIOMS_FILENAME,), inputs=(IDIOMS_FILENAME,)),
+]
+
+
+def file_hash(path: pathlib.Path) -> str | None:
+    if not path.exists():
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Pipeline:
+    def __init__(
+        self,
+        stages: Sequence[Stage],
+        directory: str,
+        state_path: str | None = None,
+        workers: int = 4,
+    ):
+        self.stages = list(stages)
+        self.directory = pathlib.Path(directory)
+        self.workers = workers
+        self.producers = {
+            output: stage.name for stage in self.stages for output in stage.outputs
+        }
+        # Stages record their fingerprints from the threads of the pool
+        self.lock = threading.Lock()
+        self.state = sqlite3.connect(
+            state_path or self.directory / STATE_FILENAME, check_same_thread=False
+        )
+        self.state.execute(
+            "CREATE TABLE IF NOT EXISTS stages ("
+            "name TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, outputs TEXT NOT NULL)"
+        )
+        self.state.commit()
+
+    def dependencies(self, stage: Stage) -> set[str]:
+        return {self.producers[x] for x in stage.inputs if x in self.producers}
+
+    def fingerprint(self, stage: Stage) -> str:
+        """Hash of what a stage computes from: its script, arguments and inputs"""
+        parts = [stage.script, *stage.args, file_hash(self.directory / stage.script)]
+        parts += [f"{x}:{file_hash(self.directory / x)}" for x in stage.inputs]
+        return hashlib.sha256("\n".join(map(str, parts)).encode()).hexdigest()
+
+    def outputs_hash(self, stage: Stage) -> str:
+        hashes = (f"{x}:{file_hash(self.directory / x)}" for x in stage.outputs)
+        return hashlib.sha256("\n".join(hashes).encode()).hexdigest()
+
+    def is_fresh(self, stage: Stage) -> bool:
+        with self.lock:
+            row = self.state.execute(
+                "SELECT fingerprint, outputs FROM stages WHERE name = ?", (stage.name,)
+            ).fetchone()
+        if row is None or any(not (self.directory / x).exists() for x in stage.outputs):
+            return False
+        return row == (self.fingerprint(stage), self.outputs_hash(stage))
+
+    def execute(self, stage: Stage) -> bool:
+        """Run the script of `stage` and record its fingerprint if it succeeds"""
+        fingerprint = self.fingerprint(stage)
+        print(f"Running {stage.name}...")
+        process = subprocess.run(
+            [sys.executable, stage.script, *stage.args], cwd=self.directory
+        )
+        if process.returncode != 0:
+            print(f"{stage.name} failed with status {process.returncode}")
+            return False
+        outputs = self.outputs_hash(stage)
+        with self.lock:
+            self.state.execute(
+                "INSERT OR REPLACE INTO stages VALUES (?, ?, ?)",
+                (stage.name, fingerprint, outputs),
+            )
+            self.state.commit()
+        return True
+
+    def run(self, force: Iterable[str] = ()) -> dict[str, str]:
+        """Run the stages, telling for each one whether it ran, was skipped, failed or
+        was blocked by a failed dependency
+        """
+        force = set(force)
+        statuses: dict[str, str] = {}
+        waiting = list(self.stages)
+        running: dict[Future, Stage] = {}
+        with ThreadPoolExecutor(self.workers) as pool:
+            while waiting or running:
+                ready = [
+                    stage
+                    for stage in waiting
+                    if self.dependencies(stage) <= statuses.keys()
+                ]
+                if not ready and not running:
+                    raise ValueError(f"Cyclic dependencies between {waiting}")
+                for stage in ready:
+                    waiting.remove(stage)
+                    dependencies = self.dependencies(stage)
+                    if any(statuses[x] in {"failed", "blocked"} for x in dependencies):
+                        statuses[stage.name] = "blocked"
+                    elif stage.name not in force and self.is_fresh(stage):
+                        print(f"Skipping {stage.name}, its inputs did not change")
+                        statuses[stage.name] = "skipped"
+                    else:
+                        running[pool.submit(self.execute, stage)] = stage
+                if not running:
+                    # Skipped and blocked stages may have unblocked others
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    statuses[stage.name] = "ran" if future.result() else "failed"
+        return statuses
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--force", nargs="*", default=[], help="Stages to run even if fresh"
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    here = pathlib.Path(__file__).parent
+    statuses = Pipeline(STAGES, str(here), workers=args.workers).run(args.force)
+    print(", ".join(f"{name}: {status}" for name, status in statuses.items()))
+    sys.exit(1 if "failed" in statuses.values() else 0)
@@ -1,11 +1,10 @@
-# Posts the idioms.json file to the API
+# Posts the idioms.ndjson file written by merge_jsons.py to the API
 if [[ "$1" == "--dry-run" ]]; then
-  jq -c 'to_entries[] | .value' idioms.json | while read -r payload; do
+  while read -r payload; do
     echo "Dry run: $payload"
-  done
+  done < idioms.ndjson
 else
-  # jq -c 'to_entries[] | .value' idioms.json | xargs -I {} curl -X POST -H "Content-Type: application/json" -d '{}' localhost:8000/idioms
-  jq -c 'to_entries[] | .value' idioms.json | while read -r line; do
+  while read -r line; do
     echo "$line" | curl -X POST -H "Content-Type: application/json" -d @- localhost:8000/idioms
-  done
+  done < idioms.ndjson
 fi
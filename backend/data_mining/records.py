@@ -0,0 +1,141 @@
+"""Intermediate files of the mining scripts, one JSON record per line.
+
+Files are compressed according to their suffix: `.zst` with zstandard, from the
+optional `zstd` extra, `.gz` with gzip, anything else not at all. The scripts write
+`SUFFIX` files, so zstandard when it is installed and gzip otherwise. Both formats
+allow concatenating compressed files into a valid one, which `concat_jsons.py` relies
+on. JSON arrays, the format of the older chunk files, can still be read.
+"""
+
+import gzip
+import io
+import json
+import pathlib
+import re
+from collections.abc import Iterable, Iterator
+from typing import IO, Any
+
+try:
+    import zstandard
+except ImportError:  # The optional `zstd` extra is not installed
+    zstandard = None
+
+SUFFIX = ".ndjson.zst" if zstandard is not None else ".ndjson.gz"
+NDJSON_SUFFIXES = {".ndjson", ".jsonl"}
+ZSTD_LEVEL = 3
+# The default of 9 writes several times slower for a few percent smaller files
+GZIP_LEVEL = 6
+READ_SIZE = 1 << 16
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def compression(path: str) -> str | None:
+    suffix = pathlib.Path(path).suffix
+    return {".zst": "zstd", ".gz": "gzip"}.get(suffix)
+
+
+def is_ndjson(path: str) -> bool:
+    suffixes = pathlib.Path(path).suffixes
+    if compression(path) is not None:
+        suffixes = suffixes[:-1]
+    return bool(suffixes) and suffixes[-1] in NDJSON_SUFFIXES
+
+
+def open_text(path: str, mode: str) -> IO[str]:
+    """Text stream over `path` in mode "r" or "w", compressed by its suffix"""
+    match compression(path):
+        case "gzip":
+            if mode == "r":
+                return gzip.open(path, "rt", encoding="utf-8")
+            # Without a timestamp in the header, the same records give the same bytes
+            stream = gzip.GzipFile(path, "wb", compresslevel=GZIP_LEVEL, mtime=0)
+            return io.TextIOWrapper(stream, encoding="utf-8")
+        case "zstd":
+            if zstandard is None:
+                raise RuntimeError(f"Install the zstd extra to open {path}")
+            raw = open(path, f"{mode}b")
+            if mode == "r":
+                # Concatenated files are several frames, all of them are read
+                stream = zstandard.ZstdDecompressor().stream_reader(
+                    raw, read_across_frames=True
+                )
+            else:
+                compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+                stream = compressor.stream_writer(raw)
+            return io.TextIOWrapper(stream, encoding="utf-8")
+        case _:
+            return open(path, mode, encoding="utf-8")
+
+
+def iter_json_array(f: IO[str]) -> Iterator[Any]:
+    """Items of a JSON array, decoded one at a time as the file is read"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+    started = False
+
+    def fill() -> None:
+        # Drops what was decoded, the buffer only holds the item being read
+        nonlocal buffer, position, eof
+        chunk = f.read(READ_SIZE)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        if started and buffer.startswith(",", position):
+            position = WHITESPACE.match(buffer, position + 1).end()
+        if position == len(buffer):
+            if eof:
+                raise ValueError("Truncated JSON array")
+            fill()
+            continue
+        if not started:
+            if not buffer.startswith("[", position):
+                raise ValueError("Expected a JSON array")
+            position += 1
+            started = True
+            continue
+        if buffer.startswith("]", position):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        # A value ending the buffer may go on in the next chunk, like a number
+        if end == len(buffer) and not eof:
+            fill()
+            continue
+        yield item
+        position = end
+
+
+def read_records(path: str) -> Iterator[Any]:
+    """Records of an NDJSON file, or of a JSON array file for any other suffix"""
+    with open_text(path, "r") as f:
+        if is_ndjson(path):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from iter_json_array(f)
+
+
+def write_ndjson(records: Iterable[Any], f: IO[str]) -> int:
+    count = 0
+    for record in records:
+        f.write(json.dumps(record, ensure_ascii=False))
+        f.write("\n")
+        count += 1
+    return count
+
+
+def write_records(path: str, records: Iterable[Any]) -> int:
+    """Write `records` as NDJSON to `path`, returning how many there were"""
+    with open_text(path, "w") as f:
+        return write_ndjson(records, f)
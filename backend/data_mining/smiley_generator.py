@@ -1,14 +1,16 @@
-import json
-
 from dotenv import load_dotenv
+from enrichment import EnrichmentRunner, ResultCache, report
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent
+from records import SUFFIX, read_records, write_records
 
 MODEL = "openai:gpt-4o-mini"
+CACHE_FILENAME = "enrichment_cache.sqlite"
+MINER_FILENAME = f"miner_list{SUFFIX}"
 
 load_dotenv()
 
-# DEPICTION_FILENAME = "depicted_idioms_chunk"
+# DEPICTION_FILENAME = f"depicted_idioms{SUFFIX}"
 # DEPICTION_PROMPT = (
 #     "You are an expert in smileys and their semantic meaning and interpretation. "
 #     "You are an expert in translating phrases in natural language to smileys. "
@@ -19,7 +21,7 @@ load_dotenv()
 #     "Give me back the same list but with each idiom translated to a list of smileys that depict the idiom's literal text. "
 # )
 #
-DEPICTION_FILENAME = "depicted_meaning_chunk"
+DEPICTION_FILENAME = f"depicted_meaning{SUFFIX}"
 DEPICTION_PROMPT = (
     "You are an expert in smileys and their semantic meaning and interpretation. "
     "You are an expert in translating phrases in natural language to smileys. "
@@ -39,28 +41,17 @@ class IdiomDepiction(BaseModel):
 
 agent = Agent(
     MODEL,
-    result_type=list[IdiomDepiction],
+    output_type=list[IdiomDepiction],
     system_prompt=DEPICTION_PROMPT,
 )
 
-with open("miner_list.json") as f:
-    idioms = json.load(f)
+idioms = list(read_records(MINER_FILENAME))
 
-chunk_size = 20
-separator = "\n- "
-for chunk in range(10):
-    results = []
-    batch = idioms[chunk * chunk_size : (chunk + 1) * chunk_size]
-    depicted_idioms = agent.run_sync(
-        f"Here is the list of idioms: {separator.join([x['text'] for x in batch])}."
-    )
-    print(depicted_idioms)
-    results.extend(depicted_idioms.data)
+cache = ResultCache(CACHE_FILENAME, MODEL, DEPICTION_PROMPT, IdiomDepiction)
+runner = EnrichmentRunner(agent, concurrency=4, requests_per_second=2, cache=cache)
+results = runner.run_batches_sync(
+    [x["text"] for x in idioms], "Here is the list of idioms: {}.", batch_size=20
+)
+print(report(results))
 
-    with open(f"{DEPICTION_FILENAME}_{chunk}.json", "w", encoding="utf-8") as f:
-        json.dump(
-            [x.model_dump() for x in results],
-            f,
-            indent=4,
-            ensure_ascii=False,
-        )
+write_records(DEPICTION_FILENAME, (x.output.model_dump() for x in results if x.ok))
@@ -1,14 +1,16 @@
-import json
-
 from dotenv import load_dotenv
+from enrichment import EnrichmentRunner, ResultCache, report
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent
+from records import SUFFIX, read_records, write_records
 
 MODEL = "openai:gpt-4o-mini"
+CACHE_FILENAME = "enrichment_cache.sqlite"
+MINER_FILENAME = f"miner_list{SUFFIX}"
 
 load_dotenv()
 
-STATS_FILENAME = "stats_chunk"
+STATS_FILENAME = f"stats{SUFFIX}"
 STATS_PROMPT = (
     "You are an idiom analysis engine. "
     "You are an expert in idioms and their idiomatic usage. "
@@ -58,28 +60,17 @@ class IdiomAttributes(BaseModel):
 
 agent = Agent(
     MODEL,
-    result_type=list[IdiomAttributes],
+    output_type=list[IdiomAttributes],
     system_prompt=STATS_PROMPT,
 )
 
-with open("miner_list.json") as f:
-    idioms = json.load(f)
+idioms = list(read_records(MINER_FILENAME))
 
-chunk_size = 20
-separator = "\n- "
-for chunk in range(10):
-    results = []
-    batch = idioms[chunk * chunk_size : (chunk + 1) * chunk_size]
-    idiom_stats = agent.run_sync(
-        f"Here is the list of idioms: {separator.join([x['text'] for x in batch])}."
-    )
-    print(idiom_stats)
-    results.extend(idiom_stats.data)
+cache = ResultCache(CACHE_FILENAME, MODEL, STATS_PROMPT, IdiomAttributes)
+runner = EnrichmentRunner(agent, concurrency=4, requests_per_second=2, cache=cache)
+results = runner.run_batches_sync(
+    [x["text"] for x in idioms], "Here is the list of idioms: {}.", batch_size=20
+)
+print(report(results))
 
-    with open(f"{STATS_FILENAME}_{chunk}.json", "w", encoding="utf-8") as f:
-        json.dump(
-            [x.model_dump() for x in results],
-            f,
-            indent=4,
-            ensure_ascii=False,
-        )
+write_records(STATS_FILENAME, (x.output.model_dump() for x in results if x.ok))
@@ -1,10 +1,11 @@
-import json
-
 from dotenv import load_dotenv
+from enrichment import EnrichmentRunner, ResultCache, report
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent
+from records import SUFFIX, write_records
 
 MODEL = "openai:gpt-4o-mini"
+CACHE_FILENAME = "enrichment_cache.sqlite"
 
 load_dotenv()
 
@@ -18,15 +19,16 @@ class TranslatedIdiom(BaseModel):
     examples: list[str] = Field(description="Examples of the idiom")
 
 
-agent = Agent(
-    MODEL,
-    result_type=TranslatedIdiom,
-    system_prompt="You are an idiom expert translator. "
+TRANSLATOR_PROMPT = (
+    "You are an idiom expert translator. "
     "Given an idiom in English, you can translate it to its closes version in another language. "
     "You are an expert in idioms, can explain their meanings, and give examples. "
-    "You can also explain the origin or logic behind the idioms.",
+    "You can also explain the origin or logic behind the idioms."
 )
 
+
+agent = Agent(MODEL, output_type=TranslatedIdiom, system_prompt=TRANSLATOR_PROMPT)
+
 language = "French"
 
 
@@ -42,19 +44,22 @@ english_idioms = [
     "Under the weather",
     "Once in a blue moon",
 ]
-translated_idioms = []
-for english_idiom in english_idioms:
-    result = agent.run_sync(
+cache = ResultCache(CACHE_FILENAME, MODEL, TRANSLATOR_PROMPT, TranslatedIdiom)
+runner = EnrichmentRunner(agent, concurrency=8, requests_per_second=5, cache=cache)
+results = runner.run_sync(
+    [
         f"Translate the idiom '{english_idiom}' to {language}. Answer in {language}."
-    )
-    translated_idioms.append(result.data)
+        for english_idiom in english_idioms
+    ],
+    english_idioms,
+)
+print(report(results))
+translated_idioms = [result.output for result in results if result.ok]
 
 
 print(translated_idioms)
 
-with open(f"languages/{language.lower()}.json", "w") as f:
-    json.dump(
-        [x.model_dump() for x in translated_idioms],
-        f,
-        indent=4,
-    )
+write_records(
+    f"languages/{language.lower()}{SUFFIX}",
+    (x.model_dump() for x in translated_idioms),
+)
@@ -0,0 +1,7 @@
+#!/bin/bash
+# Lets the replica of docker-compose-replica.yaml stream the primary's WAL
+set -e
+
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" \
+    -c "CREATE ROLE replicator WITH REPLICATION LOGIN PASSWORD '$POSTGRES_PASSWORD'"
+echo "host replication replicator all scram-sha-256" >> "$PGDATA/pg_hba.conf"
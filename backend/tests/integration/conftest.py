@@ -1,15 +1,22 @@
 import json
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
 import psycopg2
 import pytest
+from alembic.config import Config
 from dotenv import load_dotenv
 from psycopg2 import OperationalError
+from sqlalchemy import create_engine, event, text
 
+from alembic import command
 from app.schemas.idioms import IdiomCreate
 
+MIGRATIONS_DATABASE = "idioms_migrations"
 TEST_DIR = Path(__file__).parent
 RESOURCES_DIR = TEST_DIR.parent / "resources"
+ALEMBIC_DIR = TEST_DIR.parent.parent / "alembic"
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -44,11 +51,24 @@ def is_postgres_responsive():
         return False
 
 
+def alembic_config(url: str | None = None) -> Config:
+    """Migrations of the app, on `url` or else the database of the settings.
+
+    Built without `alembic.ini`, whose logging setup would silence the app's loggers.
+    """
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    if url is not None:
+        config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    return config
+
+
 def write_sample_idioms_to_db():
-    from app.database import SessionLocal, create_db_and_tables
+    from app.database import SessionLocal
     from app.models.idioms import IdiomModel
 
-    create_db_and_tables()
+    # The schema the API is deployed on, triggers and indexes included
+    command.upgrade(alembic_config(), "head")
 
     sample_path = RESOURCES_DIR / "sample_idioms.json"
     with open(sample_path, encoding="utf-8") as f:
@@ -74,14 +94,39 @@ def _database(docker_services):  # noqa: ARG001
     yield
 
 
+@pytest.fixture
+def migrations_config(_database) -> Iterator[Config]:
+    """Migrations on an empty database of the test server, dropped after the test"""
+    from app.database import engine
+
+    server = create_engine(engine.url, isolation_level="AUTOCOMMIT")
+    with server.connect() as conn:
+        conn.execute(text(f"DROP DATABASE IF EXISTS {MIGRATIONS_DATABASE}"))
+        conn.execute(text(f"CREATE DATABASE {MIGRATIONS_DATABASE}"))
+    url = engine.url.set(database=MIGRATIONS_DATABASE)
+    yield alembic_config(url.render_as_string(hide_password=False))
+    with server.connect() as conn:
+        conn.execute(text(f"DROP DATABASE {MIGRATIONS_DATABASE} WITH (FORCE)"))
+    server.dispose()
+
+
 @pytest.fixture(scope="session")
 def test_server(_database):
     from fastapi.testclient import TestClient
 
     from app.main import app
 
-    client = TestClient(app)
-    yield client
+    # Keep a single portal open so the async engine's pool stays on one event loop
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def auth_headers(test_server) -> dict[str, str]:
+    response = test_server.post(
+        "/users/register", json={"installation_id": "integration-tests"}
+    )
+    return {"x-api-key": response.json()["api_key"]}
 
 
 @pytest.fixture(scope="session")
@@ -92,3 +137,29 @@ def idioms_test_data() -> dict[str, IdiomCreate]:
     return {
         idiom_text: IdiomCreate(**idiom) for idiom_text, idiom in idioms_data.items()
     }
+
+
+@pytest.fixture
+def statement_budget(test_server):  # noqa: ARG001
+    """Assert that the requests made in a block execute at most `budget` statements.
+
+    The statements are collected from the async engine, so that a failing budget
+    shows the SQL that was issued.
+    """
+    from app.database import async_engine
+
+    @contextmanager
+    def check(budget: int) -> Iterator[list[str]]:
+        statements: list[str] = []
+
+        def record(_conn, _cursor, statement, *_args) -> None:
+            statements.append(statement)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+        assert len(statements) <= budget, "\n\n".join(statements)
+
+    return check
@@ -1,29 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+import pytest
+
 from app.schemas.idioms import IdiomCreate
 
 
-def test_get_idioms_returns_8_elements(test_server):
-    response = test_server.get("/idioms/")
+def test_get_idioms_returns_8_elements(test_server, auth_headers):
+    response = test_server.get("/idioms/", headers=auth_headers)
     assert response.status_code == 200
     data = response.json()
     assert len(data) == 8
 
 
-def test_get_random_idioms_remains_stable_under_pagination(test_server):
-    response = test_server.get("/idioms/random?seed=123&page=1&limit=2")
+def test_get_random_idioms_remains_stable_under_pagination(test_server, auth_headers):
+    response = test_server.get(
+        "/idioms/random?seed=123&page=1&limit=2", headers=auth_headers
+    )
     assert response.status_code == 200
     data = response.json()
     assert len(data) == 2
     first_page_ids = [idiom["id"] for idiom in data]
 
-    response = test_server.get("/idioms/random?seed=123&page=1&limit=4")
+    response = test_server.get(
+        "/idioms/random?seed=123&page=1&limit=4", headers=auth_headers
+    )
     assert response.status_code == 200
     data = response.json()
     second_page_ids = [idiom["id"] for idiom in data]
     assert second_page_ids[:2] == first_page_ids
 
 
-def test_get_idioms_search_query_full_name(test_server, idioms_test_data):
-    response = test_server.get("/idioms/?text=work")
+def test_get_random_idioms_cursor_walks_whole_feed_once(test_server, auth_headers):
+    full_feed = test_server.get("/idioms/random?seed=42", headers=auth_headers).json()
+    assert len(full_feed) == 8
+
+    walked = []
+    response = test_server.get("/idioms/random?seed=42&limit=3", headers=auth_headers)
+    while True:
+        assert response.status_code == 200
+        walked.extend(idiom["id"] for idiom in response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            break
+        response = test_server.get(
+            f"/idioms/random?seed=42&limit=3&cursor={next_cursor}",
+            headers=auth_headers,
+        )
+
+    assert walked == [idiom["id"] for idiom in full_feed]
+
+
+def test_get_idioms_search_query_full_name(test_server, auth_headers, idioms_test_data):
+    response = test_server.get("/idioms/?text=work", headers=auth_headers)
     assert response.status_code == 200
 
     actual_idioms = response.json()
@@ -31,9 +60,44 @@ def test_get_idioms_search_query_full_name(test_server, idioms_test_data):
     assert_idioms(actual_idioms, expected_idioms)
 
 
-def test_get_idioms_sort_frequency(test_server, idioms_test_data):
+def test_get_idioms_sort_relevance(test_server, auth_headers):
+    response = test_server.get(
+        "/idioms/?text=don't&sort=relevance", headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    # The shorter idiom shares a larger fraction of its trigrams with the query
+    assert [idiom["text"] for idiom in response.json()] == [
+        "If it ain't broke, don't fix it",
+        "Don't throw the baby out with the bathwater",
+    ]
+
+
+def explain(query) -> str:
+    """Plan of the statement an endpoint builds, with sequential scans disabled"""
+    from sqlalchemy import text
+
+    from app.database import engine
+
+    with engine.connect() as conn:
+        conn.execute(text("SET enable_seqscan = off"))
+        compiled = query.compile(dialect=conn.dialect)
+        plan = conn.exec_driver_sql(f"EXPLAIN {compiled}", compiled.params).scalars()
+        return "\n".join(plan)
+
+
+def test_get_idioms_search_uses_trigram_index(_database):
+    from app.routers.idioms import idioms_query
+    from app.serialization import project_fields
+
+    query = idioms_query(project_fields(None, "full"), text="bridges")
+
+    assert "ix_idioms_text_trgm" in explain(query)
+
+
+def test_get_idioms_sort_frequency(test_server, auth_headers, idioms_test_data):
     # Test ascending order
-    response = test_server.get("/idioms/?sort=frequency")
+    response = test_server.get("/idioms/?sort=frequency", headers=auth_headers)
     assert response.status_code == 200
     actual_idioms = response.json()
     expected_idioms = sorted(
@@ -42,16 +106,16 @@ def test_get_idioms_sort_frequency(test_server, idioms_test_data):
     assert_idioms(actual_idioms, expected_idioms)
 
     # Test descending order
-    response = test_server.get("/idioms/?sort=-frequency")
+    response = test_server.get("/idioms/?sort=-frequency", headers=auth_headers)
     assert response.status_code == 200
     actual_idioms = response.json()
     expected_idioms = list(reversed(expected_idioms))
     assert_idioms(actual_idioms, expected_idioms)
 
 
-def test_get_idioms_sort_imagery(test_server, idioms_test_data):
+def test_get_idioms_sort_imagery(test_server, auth_headers, idioms_test_data):
     # Test ascending order
-    response = test_server.get("/idioms/?sort=imagery")
+    response = test_server.get("/idioms/?sort=imagery", headers=auth_headers)
     assert response.status_code == 200
     actual_idioms = response.json()
     expected_idioms = sorted(
@@ -60,15 +124,153 @@ def test_get_idioms_sort_imagery(test_server, idioms_test_data):
     assert_idioms(actual_idioms, expected_idioms)
 
     # Test descending order
-    response = test_server.get("/idioms/?sort=-imagery")
+    response = test_server.get("/idioms/?sort=-imagery", headers=auth_headers)
     assert response.status_code == 200
     actual_idioms = response.json()
     expected_idioms = list(reversed(expected_idioms))
     assert_idioms(actual_idioms, expected_idioms)
 
 
-def test_get_categories_returns_all_unique_categories(test_server, idioms_test_data):
-    response = test_server.get("/idioms/categories")
+def test_get_idioms_cursor_pagination_visits_every_idiom(test_server, auth_headers):
+    for sort in ["", "frequency", "-imagery", "relevance"]:
+        query = f"/idioms/?sort={sort}&text=e" if sort else "/idioms/?text=e"
+        expected = test_server.get(query, headers=auth_headers).json()
+
+        actual = []
+        response = test_server.get(f"{query}&limit=3", headers=auth_headers)
+        while True:
+            assert response.status_code == 200
+            actual.extend(response.json())
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if not next_cursor:
+                break
+            response = test_server.get(
+                f"{query}&limit=3&cursor={next_cursor}", headers=auth_headers
+            )
+
+        assert [idiom["id"] for idiom in actual] == [idiom["id"] for idiom in expected]
+
+
+def test_get_idioms_rejects_cursor_of_other_sort(test_server, auth_headers):
+    response = test_server.get("/idioms/?limit=1", headers=auth_headers)
+    next_cursor = response.headers["X-Next-Cursor"]
+
+    response = test_server.get(
+        f"/idioms/?sort=frequency&cursor={next_cursor}", headers=auth_headers
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.parametrize(
+    "path", ["/idioms/", "/idioms/random?seed=7", "/idioms/favorites"]
+)
+def test_list_endpoints_project_card_view(test_server, auth_headers, path):
+    response = test_server.get(path, headers=auth_headers, params={"view": "card"})
+    assert response.status_code == 200
+
+    for idiom in response.json():
+        assert list(idiom) == [
+            "id", "text", "meaning", "depiction", "upvotes", "downvotes",
+            "favorite", "vote",
+        ]  # fmt: skip
+
+
+def test_get_idioms_projects_requested_fields(test_server, auth_headers):
+    response = test_server.get(
+        "/idioms/?fields=text,frequency_of_use&sort=-frequency&limit=3",
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    idioms = response.json()
+    assert [list(idiom) for idiom in idioms] == [["id", "text", "frequency_of_use"]] * 3
+    assert idioms == sorted(idioms, key=lambda idiom: -idiom["frequency_of_use"])
+
+    # Cursors do not depend on the projection
+    response = test_server.get(
+        "/idioms/?fields=text&sort=-frequency&limit=3",
+        headers=auth_headers,
+        params={"cursor": response.headers["X-Next-Cursor"]},
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+
+
+def test_get_random_idioms_projection_keeps_cursor_walk(test_server, auth_headers):
+    seen = []
+    cursor = None
+    while True:
+        params = {"seed": 42, "limit": 3, "view": "card"}
+        if cursor:
+            params["cursor"] = cursor
+        response = test_server.get(
+            "/idioms/random", headers=auth_headers, params=params
+        )
+        seen.extend(idiom["id"] for idiom in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen)) == 8
+
+
+def test_export_streams_every_idiom_in_text_order(test_server, auth_headers):
+    texts = []
+    cursor = None
+    while True:
+        params = {"fields": "text", **({"cursor": cursor} if cursor else {})}
+        response = test_server.get("/idioms/", headers=auth_headers, params=params)
+        texts += [idiom["text"] for idiom in response.json()]
+        if not (cursor := response.headers.get("X-Next-Cursor")):
+            break
+
+    response = test_server.get(
+        "/idioms/export?batch_size=3",
+        headers={**auth_headers, "Accept-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    exported = response.json()
+    assert [idiom["text"] for idiom in exported] == texts
+    assert "favorite" not in exported[0]
+
+
+@pytest.mark.parametrize(
+    "path, budget",
+    [
+        ("/idioms/", 2),
+        ("/idioms/?view=card", 1),
+        ("/idioms/?category=business&text=ice", 2),
+        ("/idioms/random?seed=7", 2),
+        ("/idioms/favorites", 2),
+        ("/idioms/categories/counts", 1),
+        ("/idioms/export", 1),
+    ],
+)
+def test_read_endpoints_stay_within_statement_budgets(
+    test_server, auth_headers, statement_budget, path, budget
+):
+    from app.http_cache import response_cache
+
+    # Warms the API key cache, then clears the responses
+    test_server.get(path, headers=auth_headers)
+    test_server.portal.call(response_cache.invalidate)
+    with statement_budget(budget):
+        response = test_server.get(path, headers=auth_headers)
+    assert response.status_code == 200
+
+
+def test_get_idioms_rejects_unknown_fields(test_server, auth_headers):
+    response = test_server.get("/idioms/?fields=text,secret", headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unknown fields: secret"}
+
+
+def test_get_categories_returns_all_unique_categories(
+    test_server, auth_headers, idioms_test_data
+):
+    response = test_server.get("/idioms/categories", headers=auth_headers)
     assert response.status_code == 200
 
     categories = response.json()
@@ -88,9 +290,66 @@ def test_get_categories_returns_all_unique_categories(test_server, idioms_test_d
     assert categories == expected_categories_sorted
 
 
-def test_get_idioms_filter_by_category(test_server, idioms_test_data):
+def test_get_category_counts_match_idioms(test_server, auth_headers, idioms_test_data):
+    response = test_server.get("/idioms/categories/counts", headers=auth_headers)
+    assert response.status_code == 200
+
+    expected_counts = {}
+    for idiom in idioms_test_data.values():
+        for category in set(idiom.context_diversity):
+            expected_counts[category] = expected_counts.get(category, 0) + 1
+    assert response.json() == [
+        {"name": name, "idiom_count": count}
+        for name, count in sorted(expected_counts.items())
+    ]
+
+
+def test_get_categories_answers_conditional_requests(test_server, auth_headers):
+    response = test_server.get("/idioms/categories", headers=auth_headers)
+    assert response.status_code == 200
+    assert "max-age" in response.headers["Cache-Control"]
+    etag = response.headers["ETag"]
+
+    response = test_server.get(
+        "/idioms/categories", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_get_idioms_serves_repeated_pages_from_cache(test_server, auth_headers):
+    path = "/idioms/?view=card&limit=3"
+    first = test_server.get(path, headers=auth_headers)
+    assert first.headers["X-Cache"] == "MISS"
+
+    second = test_server.get(path, headers=auth_headers)
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert second.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+
+    response = test_server.get(
+        path, headers={**auth_headers, "If-None-Match": first.headers["ETag"]}
+    )
+    assert response.status_code == 304
+
+
+def test_writes_invalidate_cached_pages(test_server):
+    [user] = create_users(1)
+    path = "/idioms/?text=Every rose"
+    idiom = test_server.get(path, headers=user).json()[0]
+    etag = test_server.get(path, headers=user).headers["ETag"]
+
+    test_server.post(f"/idioms/{idiom['id']}/upvote", headers=user)
+
+    response = test_server.get(path, headers={**user, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json()[0]["upvotes"] == idiom["upvotes"] + 1
+
+
+def test_get_idioms_filter_by_category(test_server, auth_headers, idioms_test_data):
     # Test filtering by "business" category
-    response = test_server.get("/idioms/?category=business")
+    response = test_server.get("/idioms/?category=business", headers=auth_headers)
     assert response.status_code == 200
 
     actual_idioms = response.json()
@@ -108,9 +367,11 @@ def test_get_idioms_filter_by_category(test_server, idioms_test_data):
     )
 
 
-def test_get_idioms_filter_by_categories(test_server, idioms_test_data):
+def test_get_idioms_filter_by_categories(test_server, auth_headers, idioms_test_data):
     # Test filtering by "business" or "daily life" category
-    response = test_server.get("/idioms/?category=business,daily life")
+    response = test_server.get(
+        "/idioms/?category=business,daily life", headers=auth_headers
+    )
     assert response.status_code == 200
 
     actual_idioms = response.json()
@@ -131,9 +392,77 @@ def test_get_idioms_filter_by_categories(test_server, idioms_test_data):
     )
 
 
-def test_get_idioms_filter_by_category_and_text(test_server, idioms_test_data):
+def test_get_idioms_filter_by_all_categories(
+    test_server, auth_headers, idioms_test_data
+):
+    response = test_server.get(
+        "/idioms/?category=business,education&match=all", headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    expected_idioms = [
+        idiom
+        for idiom in idioms_test_data.values()
+        if {"business", "education"} <= set(idiom.context_diversity)
+    ]
+    assert_idioms(response.json(), expected_idioms)
+    assert len(expected_idioms) == 2
+
+
+def test_get_idioms_filter_by_theme_and_sentiment(
+    test_server, auth_headers, idioms_test_data
+):
+    response = test_server.get(
+        "/idioms/?theme=emotions,regret&sentiment=negative", headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    expected_idioms = [
+        idiom
+        for idiom in idioms_test_data.values()
+        if {"emotions", "regret"} & set(idiom.category_theme)
+        and "negative" in idiom.sentiment
+    ]
+    assert_idioms(response.json(), expected_idioms)
+    assert len(expected_idioms) == 2
+
+
+def test_get_idioms_rejects_unknown_match_mode(test_server, auth_headers):
+    response = test_server.get(
+        "/idioms/?category=business&match=some", headers=auth_headers
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize(
+    ("parameter", "match", "index"),
+    [
+        ("category", "any", "ix_idioms_context_diversity"),
+        ("category", "all", "ix_idioms_context_diversity"),
+        ("theme", "any", "ix_idioms_category_theme"),
+        ("sentiment", "all", "ix_idioms_sentiment"),
+    ],
+)
+def test_get_idioms_tag_filters_use_gin_indexes(_database, parameter, match, index):
+    from app.routers.idioms import idioms_query
+    from app.serialization import project_fields
+
+    query = idioms_query(
+        project_fields(None, "full"),
+        match=match,
+        **{parameter: "business,negative"},
+    )
+
+    assert index in explain(query)
+
+
+def test_get_idioms_filter_by_category_and_text(
+    test_server, auth_headers, idioms_test_data
+):
     # Test combining category filter with text search
-    response = test_server.get("/idioms/?category=business&text=work")
+    response = test_server.get(
+        "/idioms/?category=business&text=work", headers=auth_headers
+    )
     assert response.status_code == 200
 
     actual_idioms = response.json()
@@ -148,18 +477,22 @@ def test_get_idioms_filter_by_category_and_text(test_server, idioms_test_data):
     assert_idioms(actual_idioms, expected_idioms)
 
 
-def test_get_idioms_filter_by_nonexistent_category(test_server):
+def test_get_idioms_filter_by_nonexistent_category(test_server, auth_headers):
     # Test filtering by a category that doesn't exist
-    response = test_server.get("/idioms/?category=nonexistent_category")
+    response = test_server.get(
+        "/idioms/?category=nonexistent_category", headers=auth_headers
+    )
     assert response.status_code == 200
 
     actual_idioms = response.json()
     assert len(actual_idioms) == 0, "Should return empty list for nonexistent category"
 
 
-def test_get_idioms_filter_by_category_with_text_no_matches(test_server):
+def test_get_idioms_filter_by_category_with_text_no_matches(test_server, auth_headers):
     # Test combining category with text that has no matches
-    response = test_server.get("/idioms/?category=business&text=xyz123")
+    response = test_server.get(
+        "/idioms/?category=business&text=xyz123", headers=auth_headers
+    )
     assert response.status_code == 200
 
     actual_idioms = response.json()
@@ -168,6 +501,184 @@ def test_get_idioms_filter_by_category_with_text_no_matches(test_server):
     )
 
 
+def get_idiom(test_server, auth_headers, text: str) -> dict:
+    response = test_server.get(f"/idioms/?text={text}", headers=auth_headers)
+    return response.json()[0]
+
+
+def create_users(count: int) -> list[dict[str, str]]:
+    from app.database import SessionLocal
+    from app.models.users import UserModel
+
+    api_keys = [str(uuid4()) for _ in range(count)]
+    with SessionLocal() as db:
+        db.add_all(
+            UserModel(api_key=api_key, installation_id="vote-tests")
+            for api_key in api_keys
+        )
+        db.commit()
+    return [{"x-api-key": api_key} for api_key in api_keys]
+
+
+def post_votes(test_server, idiom_id: str, users: list[dict[str, str]]) -> list[int]:
+    def vote(index: int) -> int:
+        direction = "upvote" if index % 2 == 0 else "downvote"
+        response = test_server.post(
+            f"/idioms/{idiom_id}/{direction}", headers=users[index]
+        )
+        return response.status_code
+
+    with ThreadPoolExecutor(max_workers=64) as executor:
+        return list(executor.map(vote, range(len(users))))
+
+
+def test_vote_unknown_idiom_returns_404(test_server, auth_headers):
+    response = test_server.post(
+        "/idioms/00000000-0000-0000-0000-000000000000/upvote", headers=auth_headers
+    )
+    assert response.status_code == 404
+
+
+def test_votes_count_once_per_user(test_server):
+    [user] = create_users(1)
+    idiom = get_idiom(test_server, user, "Every rose has its thorn")
+
+    for _ in range(2):
+        response = test_server.post(f"/idioms/{idiom['id']}/upvote", headers=user)
+        assert response.status_code == 200
+        assert response.json()["vote"] == 1
+        assert response.json()["upvotes"] == idiom["upvotes"] + 1
+
+    response = test_server.post(f"/idioms/{idiom['id']}/downvote", headers=user)
+    assert response.json()["vote"] == -1
+    assert response.json()["upvotes"] == idiom["upvotes"]
+    assert response.json()["downvotes"] == idiom["downvotes"] + 1
+
+
+def test_parallel_votes_are_all_counted(test_server, auth_headers):
+    idiom = get_idiom(test_server, auth_headers, "Burning bridges")
+
+    statuses = post_votes(test_server, idiom["id"], create_users(10_000))
+
+    assert statuses == [200] * 10_000
+    after = get_idiom(test_server, auth_headers, "Burning bridges")
+    assert after["upvotes"] == idiom["upvotes"] + 5_000
+    assert after["downvotes"] == idiom["downvotes"] + 5_000
+
+
+def test_buffered_parallel_votes_are_all_counted_after_flush(
+    test_server, auth_headers, monkeypatch
+):
+    from app.settings import app_settings
+    from app.votes import vote_buffer
+
+    monkeypatch.setattr(app_settings, "vote_write_behind", True)
+    idiom = get_idiom(test_server, auth_headers, "Wild goose chase")
+
+    statuses = post_votes(test_server, idiom["id"], create_users(10_000))
+
+    assert statuses == [200] * 10_000
+    assert get_idiom(test_server, auth_headers, "Wild goose chase") == idiom
+    assert test_server.portal.call(vote_buffer.flush) == 10_000
+    after = get_idiom(test_server, auth_headers, "Wild goose chase")
+    assert after["upvotes"] == idiom["upvotes"] + 5_000
+    assert after["downvotes"] == idiom["downvotes"] + 5_000
+
+
+def test_favorites_are_per_user(test_server):
+    user, other_user = create_users(2)
+    idioms = {
+        idiom["text"]: idiom
+        for idiom in test_server.get("/idioms/", headers=user).json()
+    }
+
+    for text in ["Wild goose chase", "Burning bridges", "Cry over spilled milk"]:
+        response = test_server.patch(
+            f"/idioms/{idioms[text]['id']}", headers=user, json={"favorite": True}
+        )
+        assert response.status_code == 200
+        assert response.json()["favorite"] is True
+    test_server.patch(
+        f"/idioms/{idioms['Cry over spilled milk']['id']}",
+        headers=user,
+        json={"favorite": False},
+    )
+
+    response = test_server.get("/idioms/favorites?limit=1", headers=user)
+    assert [idiom["text"] for idiom in response.json()] == ["Burning bridges"]
+    response = test_server.get(
+        "/idioms/favorites",
+        headers=user,
+        params={"cursor": response.headers["X-Next-Cursor"]},
+    )
+    assert [idiom["text"] for idiom in response.json()] == ["Wild goose chase"]
+    assert all(idiom["favorite"] for idiom in response.json())
+
+    assert test_server.get("/idioms/favorites", headers=other_user).json() == []
+    other_view = test_server.get("/idioms/?text=Wild goose", headers=other_user)
+    assert other_view.json()[0]["favorite"] is False
+
+
+def test_update_unknown_idiom_returns_404(test_server, auth_headers):
+    response = test_server.patch(
+        "/idioms/00000000-0000-0000-0000-000000000000",
+        headers=auth_headers,
+        json={"favorite": True},
+    )
+    assert response.status_code == 404
+
+
+def import_ndjson(test_server, auth_headers, lines: list[str], **params) -> dict:
+    response = test_server.post(
+        "/idioms/import",
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+        content="\n".join(lines).encode(),
+        params=params,
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_import_upserts_idioms_by_text(test_server, auth_headers, idioms_test_data):
+    idioms = [
+        idiom.model_copy(update={"text": f"Imported idiom {index}"})
+        for index, idiom in enumerate(idioms_test_data.values())
+    ]
+    lines = [idiom.model_dump_json() for idiom in idioms]
+
+    report = import_ndjson(
+        test_server, auth_headers, [lines[0], *lines, "not json"], batch_size=3
+    )
+    assert (report["inserted"], report["updated"], report["rejected"]) == (8, 0, 2)
+    assert [batch["lines"] for batch in report["batches"]] == [3, 3, 3, 1]
+    assert [error["line"] for error in report["errors"]] == [1, 10]
+
+    # Replaying the import changes nothing, changed idioms are updated in place
+    report = import_ndjson(test_server, auth_headers, lines)
+    assert (report["inserted"], report["updated"], report["unchanged"]) == (0, 0, 8)
+    changed = idioms[0].model_copy(update={"meaning": "A changed meaning"})
+    report = import_ndjson(test_server, auth_headers, [changed.model_dump_json()])
+    assert (report["inserted"], report["updated"]) == (0, 1)
+
+    response = test_server.get("/idioms/?text=Imported idiom", headers=auth_headers)
+    imported = {idiom["text"]: idiom for idiom in response.json()}
+    assert len(imported) == 8
+    assert imported["Imported idiom 0"]["meaning"] == "A changed meaning"
+
+
+def test_import_does_not_set_vote_counters(test_server, auth_headers, idioms_test_data):
+    idiom = next(iter(idioms_test_data.values())).model_copy(
+        update={"text": "Imported with votes", "upvotes": 7, "downvotes": 3}
+    )
+
+    report = import_ndjson(test_server, auth_headers, [idiom.model_dump_json()])
+
+    assert report["inserted"] == 1
+    response = test_server.get("/idioms/?text=Imported with", headers=auth_headers)
+    [imported] = response.json()
+    assert (imported["upvotes"], imported["downvotes"]) == (0, 0)
+
+
 def assert_idioms(actual: list[dict], expected: list[IdiomCreate]) -> None:
     assert len(actual) == len(expected)
     actual = [IdiomCreate(**idiom) for idiom in actual]
@@ -1,4 +1,27 @@
+import pytest
+
+
 def test_server_is_up(test_server):
     response = test_server.get("/")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+
+
+def test_metrics_report_routes_and_pool_without_api_key(test_server, auth_headers):
+    pytest.importorskip("prometheus_client")
+    test_server.get("/idioms/?limit=1", headers=auth_headers)
+
+    response = test_server.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert any(
+        line.startswith(
+            'http_request_duration_seconds_count{method="GET",route="/idioms/",'
+        )
+        for line in lines
+    )
+    assert any(line.startswith("http_request_sql_statements_sum") for line in lines)
+    assert 'db_pool_connections{engine="async",state="size"} 5.0' in lines
+    assert any(line.startswith('cache_hits_total{cache="api_keys"}') for line in lines)
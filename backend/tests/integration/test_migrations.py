@@ -0,0 +1,31 @@
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect
+
+from alembic import command
+
+TABLES = {"alembic_version", "idiom_categories", "idioms", "user_idiom", "users"}
+
+
+def test_migrations_build_the_schema_of_the_models(migrations_config):
+    from app.database import Base
+    from app.models import categories, idioms, user_idioms, users  # noqa: F401
+
+    command.upgrade(migrations_config, "head")
+
+    engine = create_engine(migrations_config.get_main_option("sqlalchemy.url"))
+    with engine.connect() as conn:
+        assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+    engine.dispose()
+
+
+def test_migrations_downgrade_to_an_empty_database_and_back(migrations_config):
+    engine = create_engine(migrations_config.get_main_option("sqlalchemy.url"))
+
+    command.upgrade(migrations_config, "head")
+    command.downgrade(migrations_config, "base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+    command.upgrade(migrations_config, "head")
+
+    assert set(inspect(engine).get_table_names()) == TABLES
+    engine.dispose()
@@ -0,0 +1,12 @@
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# The app reads its settings at import time, so the environment has to be in place
+# before any test module imports from `app`.
+load_dotenv(Path(__file__).parent.parent / "integration" / "env.testing")
+
+# The data_mining scripts run from their directory and import their shared modules by
+# name, so the tests import them the same way.
+sys.path.append(str(Path(__file__).parent.parent.parent / "data_mining"))
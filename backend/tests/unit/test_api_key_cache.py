@@ -0,0 +1,64 @@
+from app.middleware import APIKeyCache
+from app.models.users import UserModel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_cache(clock: FakeClock, max_size: int = 10) -> APIKeyCache:
+    return APIKeyCache(max_size=max_size, ttl=60.0, negative_ttl=5.0, clock=clock)
+
+
+def test_cache_returns_cached_user_until_ttl_expires():
+    clock = FakeClock()
+    cache = make_cache(clock)
+    user = UserModel(api_key="key", installation_id="installation")
+
+    assert cache.get("key") == (False, None)
+    cache.set("key", user)
+    assert cache.get("key") == (True, user)
+
+    clock.now = 61.0
+    assert cache.get("key") == (False, None)
+    assert cache.stats() == {"hits": 1, "misses": 2, "size": 0}
+
+
+def test_cache_expires_unknown_keys_after_negative_ttl():
+    clock = FakeClock()
+    cache = make_cache(clock)
+
+    cache.set("unknown", None)
+    assert cache.get("unknown") == (True, None)
+
+    clock.now = 6.0
+    assert cache.get("unknown") == (False, None)
+
+
+def test_cache_evicts_least_recently_used_key():
+    clock = FakeClock()
+    cache = make_cache(clock, max_size=2)
+    first = UserModel(api_key="first")
+    second = UserModel(api_key="second")
+
+    cache.set("first", first)
+    cache.set("second", second)
+    cache.get("first")
+    cache.set("third", None)
+
+    assert cache.get("first") == (True, first)
+    assert cache.get("second") == (False, None)
+
+
+def test_cache_invalidate_removes_negative_entry():
+    clock = FakeClock()
+    cache = make_cache(clock)
+
+    cache.set("key", None)
+    cache.invalidate("key")
+
+    assert cache.get("key") == (False, None)
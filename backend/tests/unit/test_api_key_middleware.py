@@ -0,0 +1,53 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.middleware import APIKeyCache, APIKeyMiddleware
+from app.models.users import UserModel
+
+
+def build_client(cache: APIKeyCache) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/")
+    async def status():
+        return {"status": "ok"}
+
+    @app.get("/users/register/check")
+    async def register_check():
+        return {"status": "ok"}
+
+    @app.get("/idioms/")
+    async def idioms(request: Request):
+        return {"installation_id": request.state.user.installation_id}
+
+    app.add_middleware(APIKeyMiddleware, cache=cache)
+    return TestClient(app)
+
+
+def test_middleware_sets_user_from_cached_key():
+    cache = APIKeyCache(max_size=10, ttl=60.0, negative_ttl=60.0)
+    cache.set("valid-key", UserModel(api_key="valid-key", installation_id="abc"))
+    client = build_client(cache)
+
+    response = client.get("/idioms/", headers={"x-api-key": "valid-key"})
+
+    assert response.status_code == 200
+    assert response.json() == {"installation_id": "abc"}
+
+
+def test_middleware_rejects_missing_and_unknown_keys():
+    cache = APIKeyCache(max_size=10, ttl=60.0, negative_ttl=60.0)
+    cache.set("unknown-key", None)
+    client = build_client(cache)
+
+    assert client.get("/idioms/").status_code == 401
+    response = client.get("/idioms/", headers={"x-api-key": "unknown-key"})
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Unauthorized"}
+
+
+def test_middleware_exempts_status_route_and_registration_subtree():
+    client = build_client(APIKeyCache(max_size=10, ttl=60.0, negative_ttl=60.0))
+
+    assert client.get("/").status_code == 200
+    assert client.get("/users/register/check").status_code == 200
@@ -0,0 +1,103 @@
+import asyncio
+import zlib
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware, negotiate_encoding
+
+BODY = b'{"text": "Break the ice"}' * 100
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    async def large() -> Response:
+        return Response(BODY, media_type="application/json", headers={"ETag": '"a"'})
+
+    @app.get("/small")
+    async def small() -> Response:
+        return Response(b"[]", media_type="application/json")
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def chunks():
+            for _ in range(3):
+                yield BODY
+
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    "header, encoding",
+    [
+        ("gzip", "gzip"),
+        ("gzip;q=0.5, identity", "gzip"),
+        ("*", "gzip"),
+        ("identity", None),
+        ("gzip;q=0", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_negotiate_encoding(header, encoding):
+    assert negotiate_encoding(header) == encoding
+
+
+def test_large_responses_are_gzipped(client):
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["ETag"] == 'W/"a"'
+    assert int(response.headers["Content-Length"]) < len(BODY)
+    assert response.content == BODY
+
+
+def test_small_and_unaccepted_responses_are_not_compressed(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.content == b"[]"
+
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] == '"a"'
+    assert response.content == BODY
+
+
+def test_streamed_responses_are_compressed_chunk_by_chunk(client):
+    with client.stream(
+        "GET", "/stream", headers={"Accept-Encoding": "gzip"}
+    ) as response:
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Content-Length" not in response.headers
+        assert response.read() == BODY * 3
+
+
+def test_streamed_chunks_can_be_decoded_as_they_arrive():
+    async def app(_scope, _receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for more_body in [True, True, False]:
+            await send(
+                {"type": "http.response.body", "body": BODY, "more_body": more_body}
+            )
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(app)(scope, None, send))
+
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    for message in messages[1:]:
+        assert decompressor.decompress(message["body"]) == BODY
+    assert decompressor.eof
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import Request, Response
+
+from app import database
+from app.settings import app_settings
+
+
+def make_request(method: str, last_write: float | None = None) -> Request:
+    headers = []
+    if last_write is not None:
+        cookie = f"{database.LAST_WRITE_COOKIE}={last_write}"
+        headers.append((b"cookie", cookie.encode()))
+    return Request({"type": "http", "method": method, "headers": headers, "state": {}})
+
+
+@pytest.fixture
+def routed(monkeypatch):
+    """Name of the session factory each request is routed to"""
+
+    class Factory:
+        def __init__(self, name: str):
+            self.name = name
+
+        def __call__(self):
+            return self
+
+        async def __aenter__(self):
+            return self.name
+
+        async def __aexit__(self, *_exc):
+            return False
+
+    monkeypatch.setattr(database, "AsyncSessionLocal", Factory("primary"))
+    monkeypatch.setattr(database, "AsyncReplicaSessionLocal", Factory("replica"))
+    monkeypatch.setattr(database, "async_replica_engine", object())
+    monkeypatch.setattr(app_settings, "db_replica_sticky_seconds", 5)
+
+    def session_for(request: Request, response: Response | None = None) -> str:
+        async def first():
+            sessions = database.get_session(request, response or Response())
+            return await anext(sessions)
+
+        return asyncio.run(first())
+
+    return session_for
+
+
+def test_reads_go_to_the_replica_and_writes_to_the_primary(routed):
+    assert routed(make_request("GET")) == "replica"
+    assert routed(make_request("HEAD")) == "replica"
+    assert routed(make_request("POST")) == "primary"
+    assert routed(make_request("PATCH")) == "primary"
+
+
+def test_writes_set_the_cookie_that_keeps_reads_on_the_primary(routed):
+    response = Response()
+
+    routed(make_request("POST"), response)
+
+    cookie = response.headers["set-cookie"]
+    assert cookie.startswith(f"{database.LAST_WRITE_COOKIE}=")
+    assert "Max-Age=5" in cookie
+
+
+def test_recent_writers_read_their_writes_from_the_primary(routed):
+    now = time.time()
+
+    assert routed(make_request("GET", last_write=now - 1)) == "primary"
+    assert routed(make_request("GET", last_write=now - 6)) == "replica"
+    assert routed(make_request("GET", last_write=now + 60)) == "replica"
+
+
+def test_replica_reads_are_recorded_on_the_request(routed):
+    read, write = make_request("GET"), make_request("POST")
+
+    routed(read)
+    routed(write)
+
+    assert read.state.replica is True
+    assert write.state.replica is False
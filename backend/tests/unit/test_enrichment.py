@@ -0,0 +1,275 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+import pytest
+from enrichment import (
+    EnrichmentRunner,
+    ResultCache,
+    TokenBucket,
+    backoff_delay,
+    report,
+)
+from pydantic import BaseModel
+
+
+class StubAgent:
+    """Agent answering with the upper-cased prompt after a random latency.
+
+    The first `failures[prompt]` calls for a prompt raise, like a rate limited or
+    flaky model would.
+    """
+
+    def __init__(self, failures: dict[str, int] | None = None, latency=0.005):
+        self.failures = dict(failures or {})
+        self.latency = latency
+        self.calls: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def run(self, prompt: str):
+        self.calls.append(prompt)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(random.uniform(0, self.latency))
+            if self.failures.get(prompt, 0) > 0:
+                self.failures[prompt] -= 1
+                raise RuntimeError(f"429 on {prompt}")
+        finally:
+            self.in_flight -= 1
+        usage = SimpleNamespace(total_tokens=len(prompt))
+        return SimpleNamespace(output=prompt.upper(), usage=lambda: usage)
+
+
+async def no_sleep(_seconds: float) -> None:
+    await asyncio.sleep(0)
+
+
+def make_runner(agent: StubAgent, **kwargs) -> EnrichmentRunner:
+    defaults = {"requests_per_second": 10_000, "rng": random.Random(0)}
+    return EnrichmentRunner(agent, **{**defaults, **kwargs})
+
+
+def test_results_keep_prompt_order():
+    prompts = [f"idiom {i}" for i in range(50)]
+    agent = StubAgent()
+
+    results = make_runner(agent, concurrency=8).run_sync(prompts)
+
+    assert [result.prompt for result in results] == prompts
+    assert [result.output for result in results] == [p.upper() for p in prompts]
+    assert all(result.ok and result.attempts == 1 for result in results)
+    assert results[0].tokens == len(prompts[0])
+
+
+def test_concurrency_is_bounded():
+    agent = StubAgent(latency=0.01)
+
+    make_runner(agent, concurrency=3).run_sync([str(i) for i in range(20)])
+
+    assert 1 < agent.max_in_flight <= 3
+
+
+def test_failures_are_retried():
+    agent = StubAgent(failures={"b": 2})
+    delays = []
+
+    async def sleep(seconds: float) -> None:
+        delays.append(seconds)
+
+    results = make_runner(agent, max_attempts=3, sleep=sleep).run_sync(["a", "b"])
+
+    assert [result.output for result in results] == ["A", "B"]
+    assert results[1].attempts == 3
+    assert agent.calls.count("b") == 3
+    assert len(delays) == 2
+
+
+def test_exhausted_retries_keep_the_error():
+    agent = StubAgent(failures={"b": 5})
+
+    results = make_runner(agent, max_attempts=2, sleep=no_sleep).run_sync(
+        ["a", "b", "c"]
+    )
+
+    assert [result.ok for result in results] == [True, False, True]
+    assert isinstance(results[1].error, RuntimeError)
+    assert results[1].attempts == 2
+    assert results[1].output is None
+
+
+def test_no_prompts():
+    assert make_runner(StubAgent()).run_sync([]) == []
+
+
+@pytest.mark.parametrize("attempt", [0, 1, 2, 5, 10])
+def test_backoff_delay_is_jittered_and_capped(attempt):
+    rng = random.Random(attempt)
+    delays = [backoff_delay(attempt, 0.5, 8.0, rng) for _ in range(100)]
+
+    assert all(0 <= delay <= min(8.0, 0.5 * 2**attempt) for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_token_bucket_paces_after_the_burst():
+    now = 0.0
+    slept = []
+
+    def clock() -> float:
+        return now
+
+    async def sleep(seconds: float) -> None:
+        nonlocal now
+        slept.append(seconds)
+        now += seconds
+
+    async def acquire_all(bucket: TokenBucket, times: int) -> None:
+        for _ in range(times):
+            await bucket.acquire()
+
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=sleep)
+    asyncio.run(acquire_all(bucket, 6))
+
+    # The burst is free, then one token every half second
+    assert slept == [0.5, 0.5, 0.5, 0.5]
+    assert now == 2.0
+
+
+class Stats(BaseModel):
+    text: str
+    length: int
+
+
+class BatchAgent(StubAgent):
+    """Agent analysing the bulleted idioms of a prompt, dropping those in `skip`"""
+
+    def __init__(self, skip=()):
+        super().__init__()
+        self.skip = set(skip)
+
+    async def run(self, prompt: str):
+        await super().run(prompt)
+        texts = prompt.removeprefix("Idioms: ").removesuffix(".").split("\n- ")
+        output = [Stats(text=text, length=len(text)) for text in texts]
+        usage = SimpleNamespace(total_tokens=10 * len(texts))
+        return SimpleNamespace(
+            output=[stats for stats in output if stats.text not in self.skip],
+            usage=lambda: usage,
+        )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"), "test", "Be brief.", str)
+    yield cache
+    cache.close()
+
+
+def test_cache_key_covers_model_prompts_and_text(tmp_path, cache):
+    other_model = ResultCache(str(tmp_path / "cache.sqlite"), "other", "Be brief.")
+    other_system = ResultCache(str(tmp_path / "cache.sqlite"), "test", "Be long.")
+
+    keys = {
+        cache.key("prompt", "text"),
+        cache.key("prompt", "other"),
+        cache.key("other", "text"),
+        other_model.key("prompt", "text"),
+        other_system.key("prompt", "text"),
+    }
+
+    assert len(keys) == 5
+    other_model.close()
+    other_system.close()
+
+
+def test_changed_output_type_misses_the_cache(tmp_path, cache):
+    cache.put("prompt", "text", "output", 10)
+    stats = ResultCache(str(tmp_path / "cache.sqlite"), "test", "Be brief.", Stats)
+
+    assert cache.get("prompt", "text") == ("output", 10)
+    assert stats.get("prompt", "text") is None
+    stats.close()
+
+
+def test_cached_prompts_are_not_called_again(cache):
+    prompts = [f"idiom {i}" for i in range(10)]
+    make_runner(StubAgent(), cache=cache).run_sync(prompts[:6])
+    agent = StubAgent()
+
+    results = make_runner(agent, cache=cache).run_sync(prompts)
+
+    assert [result.output for result in results] == [p.upper() for p in prompts]
+    assert sorted(agent.calls) == prompts[6:]
+    assert report(results) == {
+        "items": 10,
+        "cache_hits": 6,
+        "model_calls": 4,
+        "failed": 0,
+        "tokens_used": sum(len(p) for p in prompts[6:]),
+        "tokens_saved": sum(len(p) for p in prompts[:6]),
+    }
+
+
+def test_interrupted_run_resumes_from_the_cache(cache):
+    prompts = ["a", "b", "c"]
+    # The first run loses "b" for good, as if the script had crashed before it
+    make_runner(StubAgent({"b": 1}), max_attempts=1, cache=cache).run_sync(prompts)
+    agent = StubAgent()
+
+    results = make_runner(agent, cache=cache).run_sync(prompts)
+
+    assert agent.calls == ["b"]
+    assert [result.cached for result in results] == [True, False, True]
+
+
+def test_changed_prompt_is_called_again(cache):
+    make_runner(StubAgent(), cache=cache).run_sync(["Explain: a"], ["a"])
+    agent = StubAgent()
+
+    make_runner(agent, cache=cache).run_sync(["Explain briefly: a"], ["a"])
+
+    assert agent.calls == ["Explain briefly: a"]
+
+
+def test_batches_only_hold_missing_idioms(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"), "test", "Be brief.", Stats)
+    texts = [f"idiom {i}" for i in range(5)]
+    make_runner(BatchAgent(), cache=cache).run_batches_sync(texts[:3], "Idioms: {}.", 2)
+    agent = BatchAgent()
+
+    results = make_runner(agent, cache=cache).run_batches_sync(texts, "Idioms: {}.", 2)
+
+    assert [result.output.text for result in results] == texts
+    assert agent.calls == ["Idioms: idiom 3\n- idiom 4."]
+    assert [result.cached for result in results] == [True] * 3 + [False] * 2
+    assert [result.tokens for result in results] == [10] * 5
+    cache.close()
+
+
+def test_idioms_missing_from_a_batch_output_fail():
+    results = make_runner(BatchAgent(skip={"b"})).run_batches_sync(
+        ["a", "b", "c"], "Idioms: {}.", 3
+    )
+
+    assert [result.ok for result in results] == [True, False, True]
+    assert isinstance(results[1].error, LookupError)
+
+
+def test_batch_outputs_keep_the_text_of_idioms_the_model_altered():
+    class EchoingAgent(BatchAgent):
+        async def run(self, prompt: str):
+            run = await super().run(prompt)
+            for stats in run.output:
+                stats.text = f'"{stats.text.upper()}."'
+            return run
+
+    results = make_runner(EchoingAgent()).run_batches_sync(
+        ["Spill the  beans", "break a leg"], "Idioms: {}.", 2
+    )
+
+    assert [result.ok for result in results] == [True, True]
+    assert [result.output.text for result in results] == [
+        "Spill the  beans",
+        "break a leg",
+    ]
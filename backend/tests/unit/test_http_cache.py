@@ -0,0 +1,240 @@
+import asyncio
+
+from fastapi import Request, Response
+
+from app.http_cache import MemoryCacheBackend, ResponseCache, cache_key
+
+
+def make_request(
+    query: str = "",
+    if_none_match: str | None = None,
+    path: str = "/idioms/",
+    replica: bool = False,
+) -> Request:
+    headers = []
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request(
+        {
+            "type": "http",
+            "path": path,
+            "query_string": query.encode(),
+            "headers": headers,
+            "state": {"replica": replica},
+        }
+    )
+
+
+class Builder:
+    def __init__(self, body: bytes = b"[]"):
+        self.body = body
+        self.calls = 0
+
+    async def __call__(self) -> Response:
+        self.calls += 1
+        return Response(
+            content=self.body,
+            media_type="application/json",
+            headers={"X-Next-Cursor": "abc"},
+        )
+
+
+def respond(
+    cache: ResponseCache, request: Request, build: Builder, tags=None
+) -> Response:
+    return asyncio.run(cache.respond(request, cache_key(request), build, tags=tags))
+
+
+def test_cache_key_normalizes_query_order_and_scopes_users():
+    assert cache_key(make_request("b=2&a=1")) == cache_key(make_request("a=1&b=2"))
+    assert cache_key(make_request("a=1")) != cache_key(make_request("a=2"))
+    assert cache_key(make_request(), "user") != cache_key(make_request())
+
+
+def test_response_cache_builds_once_then_hits():
+    cache = ResponseCache(MemoryCacheBackend(max_size=10, ttl=60))
+    build = Builder(b'["idiom"]')
+
+    miss = respond(cache, make_request(), build)
+    hit = respond(cache, make_request(), build)
+
+    assert build.calls == 1
+    assert miss.headers["X-Cache"] == "MISS"
+    assert hit.headers["X-Cache"] == "HIT"
+    assert hit.body == b'["idiom"]'
+    assert hit.headers["ETag"] == miss.headers["ETag"]
+    assert hit.headers["Cache-Control"] == "private, no-cache"
+    assert hit.headers["content-type"] == "application/json"
+    assert hit.headers["x-next-cursor"] == "abc"
+
+
+def test_response_cache_answers_matching_etags_with_304_without_building():
+    cache = ResponseCache(MemoryCacheBackend(max_size=10, ttl=60))
+    etag = respond(cache, make_request(), Builder()).headers["ETag"]
+    build = Builder()
+
+    for header in [etag, f"W/{etag}", f'"other", {etag}', "*"]:
+        response = respond(cache, make_request(if_none_match=header), build)
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["ETag"] == etag
+    assert build.calls == 0
+
+    response = respond(cache, make_request(if_none_match='"other"'), build)
+    assert response.status_code == 200
+
+
+def test_response_cache_invalidate_rebuilds_and_keeps_etags_of_unchanged_bodies():
+    cache = ResponseCache(MemoryCacheBackend(max_size=10, ttl=60))
+    build = Builder()
+    etag = respond(cache, make_request(), build).headers["ETag"]
+
+    asyncio.run(cache.invalidate())
+    response = respond(cache, make_request(if_none_match=etag), build)
+
+    assert build.calls == 2
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    asyncio.run(cache.invalidate())
+    response = respond(cache, make_request(if_none_match=etag), Builder(b'["new"]'))
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.headers["X-Cache"] == "MISS"
+
+
+def test_response_cache_etags_do_not_match_changed_bodies_after_a_restart():
+    etag = respond(
+        ResponseCache(MemoryCacheBackend(max_size=10, ttl=60)),
+        make_request(),
+        Builder(),
+    ).headers["ETag"]
+
+    # A new process starts over from the same version number
+    restarted = ResponseCache(MemoryCacheBackend(max_size=10, ttl=60))
+    response = respond(restarted, make_request(if_none_match=etag), Builder(b'["x"]'))
+
+    assert response.status_code == 200
+    assert response.body == b'["x"]'
+
+
+def test_response_cache_does_not_store_replica_reads_right_after_a_write():
+    now = [0.0]
+    backend = MemoryCacheBackend(max_size=10, ttl=60, clock=lambda: now[0])
+    cache = ResponseCache(backend, replica_lag=5)
+    build = Builder()
+    asyncio.run(cache.invalidate())
+
+    for _ in range(2):
+        respond(cache, make_request(replica=True), build)
+    assert build.calls == 2
+
+    now[0] = 5
+    for _ in range(2):
+        respond(cache, make_request(replica=True), build)
+    assert build.calls == 3
+
+
+def test_response_cache_invalidate_tags_only_rebuilds_tagged_responses():
+    cache = ResponseCache(MemoryCacheBackend(max_size=10, ttl=60))
+    builds = {page: Builder() for page in ["page=1", "page=2", "categories"]}
+    tags = {"page=1": ["idiom:a", "idiom:b"], "page=2": ["idiom:c"], "categories": []}
+
+    def respond_all():
+        for page, build in builds.items():
+            respond(
+                cache, make_request(page), build, tags=lambda _, page=page: tags[page]
+            )
+
+    respond_all()
+    asyncio.run(cache.invalidate_tags(["idiom:b"]))
+    respond_all()
+    respond_all()
+
+    assert {page: build.calls for page, build in builds.items()} == {
+        "page=1": 2,
+        "page=2": 1,
+        "categories": 1,
+    }
+
+
+def test_response_cache_replica_reads_built_before_a_tagged_write_are_stale():
+    now = [10.0]
+    backend = MemoryCacheBackend(max_size=10, ttl=60, clock=lambda: now[0])
+    cache = ResponseCache(backend, replica_lag=5)
+    build = Builder()
+    tags = lambda _: ["idiom:a"]  # noqa: E731
+
+    respond(cache, make_request(replica=True), build, tags=tags)
+    now[0] = 12
+    asyncio.run(cache.invalidate_tags(["idiom:a"]))
+    respond(cache, make_request(replica=True), build, tags=tags)
+    assert build.calls == 2
+
+    # Built more than `replica_lag` seconds after the write
+    now[0] = 18
+    respond(cache, make_request(replica=True), build, tags=tags)
+    respond(cache, make_request(replica=True), build, tags=tags)
+    assert build.calls == 3
+
+
+def test_response_cache_stores_primary_reads_right_after_a_write():
+    cache = ResponseCache(MemoryCacheBackend(max_size=10, ttl=60), replica_lag=5)
+    build = Builder()
+    asyncio.run(cache.invalidate())
+
+    for _ in range(2):
+        respond(cache, make_request(), build)
+    assert build.calls == 1
+
+
+def test_response_cache_does_not_store_errors():
+    cache = ResponseCache(MemoryCacheBackend(max_size=10, ttl=60))
+
+    async def build() -> Response:
+        return Response(status_code=404)
+
+    for _ in range(2):
+        response = respond(cache, make_request(), build)
+        assert response.status_code == 404
+    assert cache.misses == 2
+
+
+def test_response_cache_stats_report_hit_ratio():
+    cache = ResponseCache(MemoryCacheBackend(max_size=10, ttl=60))
+    build = Builder()
+    etag = respond(cache, make_request(), build).headers["ETag"]
+    respond(cache, make_request(), build)
+    respond(cache, make_request(if_none_match=etag), build)
+    respond(cache, make_request("page=2"), build)
+
+    assert asyncio.run(cache.stats()) == {
+        "hits": 1,
+        "misses": 2,
+        "not_modified": 1,
+        "hit_ratio": 0.5,
+        "size": 2,
+    }
+
+
+def test_memory_backend_evicts_least_recently_used_and_expired_entries():
+    now = [0.0]
+    backend = MemoryCacheBackend(max_size=2, ttl=10, clock=lambda: now[0])
+    cache = ResponseCache(backend)
+    build = Builder()
+
+    respond(cache, make_request("page=1"), build)
+    respond(cache, make_request("page=2"), build)
+    respond(cache, make_request("page=1"), build)
+    respond(cache, make_request("page=3"), build)
+    assert build.calls == 3
+
+    respond(cache, make_request("page=1"), build)
+    assert build.calls == 3
+    respond(cache, make_request("page=2"), build)
+    assert build.calls == 4
+
+    now[0] = 10
+    respond(cache, make_request("page=2"), build)
+    assert build.calls == 5
@@ -0,0 +1,49 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+from fastapi import HTTPException
+
+from app.importer import ndjson_lines
+
+
+async def stream(chunks: list[bytes]) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+def collect(chunks: list[bytes], max_line_bytes: int = 100) -> list[bytes]:
+    async def run() -> list[bytes]:
+        lines = ndjson_lines(stream(chunks), max_line_bytes)
+        return [line async for line in lines]
+
+    return asyncio.run(run())
+
+
+def test_ndjson_lines_joins_lines_split_across_chunks():
+    chunks = [b'{"a": 1}\n{"b"', b": 2}\n", b'{"c": 3}']
+
+    assert collect(chunks) == [b'{"a": 1}', b'{"b": 2}', b'{"c": 3}']
+
+
+def test_ndjson_lines_keeps_empty_lines_for_line_numbers():
+    assert collect([b"first\n\nthird\n"]) == [b"first", b"", b"third", b""]
+
+
+def test_ndjson_lines_rejects_a_body_without_newlines():
+    with pytest.raises(HTTPException) as error:
+        collect([b"x" * 60, b"x" * 60])
+
+    assert error.value.status_code == 413
+
+
+def test_ndjson_lines_rejects_a_long_line_between_short_ones():
+    with pytest.raises(HTTPException):
+        collect([b"short\n" + b"x" * 101 + b"\nshort"])
+
+
+def test_ndjson_lines_joins_a_line_streamed_in_many_chunks():
+    line = b'{"text": "' + b"x" * 50 + b'"}'
+    chunks = [line[i : i + 3] for i in range(0, len(line), 3)]
+
+    assert collect([*chunks, b"\nnext"]) == [line, b"next"]
@@ -0,0 +1,75 @@
+import json
+
+from merge_jsons import external_sort, merge
+
+
+def write_json(path, records) -> str:
+    path.write_text(json.dumps(records, indent=4), encoding="utf-8")
+    return str(path)
+
+
+def write_ndjson(path, records) -> str:
+    path.write_text("".join(json.dumps(x) + "\n" for x in records), encoding="utf-8")
+    return str(path)
+
+
+def read_ndjson(path) -> list[dict]:
+    return [json.loads(line) for line in open(path, encoding="utf-8")]
+
+
+def test_external_sort_spills_runs(tmp_path):
+    records = [{"text": f"{i:03}"} for i in reversed(range(25))]
+
+    result = list(external_sort(records, "text", str(tmp_path), run_size=4))
+
+    assert result == sorted(records, key=lambda x: x["text"])
+
+
+def test_merge_joins_json_and_ndjson_sources(tmp_path):
+    explained = write_json(
+        tmp_path / "explained.json",
+        [
+            {"text": "b", "meaning": "B"},
+            {"text": "a", "meaning": "A"},
+            {"text": "c", "meaning": "C"},
+        ],
+    )
+    depicted = write_ndjson(
+        tmp_path / "depicted.ndjson",
+        [{"text": "c", "depiction": ["3"]}, {"text": "a", "depiction": ["1"]}],
+    )
+    outfile = tmp_path / "idioms.ndjson"
+
+    coverage = merge([explained, depicted], str(outfile), run_size=2)
+
+    assert read_ndjson(outfile) == [
+        {"text": "a", "meaning": "A", "depiction": ["1"]},
+        {"text": "b", "meaning": "B"},
+        {"text": "c", "meaning": "C", "depiction": ["3"]},
+    ]
+    assert (coverage.idioms, coverage.complete) == (3, 2)
+    assert coverage.covered == {explained: 3, depicted: 2}
+
+
+def test_merge_reports_records_without_key(tmp_path):
+    stats = write_json(
+        tmp_path / "stats.json", [{"text": "a", "n": 1}, {"n": 2}, {"text": None}]
+    )
+    outfile = tmp_path / "idioms.ndjson"
+
+    coverage = merge([stats], str(outfile))
+
+    assert read_ndjson(outfile) == [{"text": "a", "n": 1}]
+    assert coverage.records[stats] == 3
+    assert coverage.unkeyed[stats] == 2
+    assert "2 without 'text'" in coverage.report()
+
+
+def test_later_sources_override_earlier_ones(tmp_path):
+    stats = write_json(tmp_path / "stats.json", [{"text": "a", "n": 1, "m": 1}])
+    corrected = write_json(tmp_path / "corrected.json", [{"text": "a", "n": 2}])
+    outfile = tmp_path / "idioms.ndjson"
+
+    merge([stats, corrected], str(outfile))
+
+    assert read_ndjson(outfile) == [{"text": "a", "n": 2, "m": 1}]
@@ -0,0 +1,67 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+
+from app.metrics import (
+    CallbackCollector,
+    MetricsMiddleware,
+    count_statement,
+    registry,
+)
+
+prometheus_client = pytest.importorskip("prometheus_client")
+
+
+def test_callback_collector_reads_its_series_on_every_collection():
+    from prometheus_client.core import GaugeMetricFamily
+
+    metrics = prometheus_client.CollectorRegistry()
+    size = CallbackCollector("size", "Size.", GaugeMetricFamily, ("cache",))
+    metrics.register(size)
+    entries = {"users": 7}
+    size.add(lambda: entries["users"], cache="users")
+
+    assert metrics.get_sample_value("size", {"cache": "users"}) == 7
+    entries["users"] = 8
+    assert metrics.get_sample_value("size", {"cache": "users"}) == 8
+
+
+def test_callback_collector_rejects_unknown_labels():
+    from prometheus_client.core import GaugeMetricFamily
+
+    size = CallbackCollector("size", "Size.", GaugeMetricFamily, ("cache",))
+
+    with pytest.raises(ValueError):
+        size.add(lambda: 7, path="/")
+
+
+def test_middleware_records_latency_and_statements_per_route_template():
+    engine = create_engine("sqlite://")
+    event.listen(engine, "before_cursor_execute", count_statement)
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/{id}")
+    def read(id: int) -> int:
+        with engine.connect() as connection:
+            for _ in range(id):
+                connection.execute(text("SELECT 1"))
+        return id
+
+    client = TestClient(app)
+    for id in [2, 3]:
+        assert client.get(f"/metrics-test/{id}").status_code == 200
+    assert client.get("/metrics-test/x").status_code == 422
+
+    route = "/metrics-test/{id}"
+    for status, count in [("200", 2), ("422", 1)]:
+        labels = {"method": "GET", "route": route, "status": status}
+        assert (
+            registry.get_sample_value("http_request_duration_seconds_count", labels)
+            == count
+        )
+    labels = {"method": "GET", "route": route}
+    assert registry.get_sample_value("http_request_sql_statements_sum", labels) == 5
+    assert registry.get_sample_value("http_request_sql_statements_count", labels) == 3
+    assert registry.get_sample_value("http_requests_in_flight") == 0
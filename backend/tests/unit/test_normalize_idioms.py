@@ -0,0 +1,47 @@
+from collections import Counter
+
+from normalize_idioms import normalize, normalize_all
+
+from app.schemas.idioms import IdiomCreate
+
+# An idiom as merged from the explainer, stats, corrected stats and depiction stages
+MERGED = {
+    "text": "Spill the beans",
+    "meaning": "Reveal a secret",
+    "explanation": "Votes were cast with beans.",
+    "examples": ["She spilled the beans."],
+    "frequency_of_use": 8,
+    "category_theme": ["food"],
+    "sentiment": ["neutral"],
+    "context_diversity": ["daily life"],
+    "literal_transparency": 2.5,
+    "translation_difficulty": 10,
+    "depiction": ["🫘", "🗣️"],
+}
+
+
+def test_merged_idioms_become_importable():
+    record = normalize(MERGED)
+
+    idiom = IdiomCreate.model_validate(record)
+    assert idiom.frequency_of_use == 0.8
+    assert idiom.literal_transparency == 0.25
+    assert idiom.translation_difficulty == 1.0
+    assert idiom.depiction == ["🫘", "🗣️"]
+    assert idiom.alternative_depiction == idiom.meaning_depiction == []
+
+
+def test_lists_are_capped_like_the_api():
+    record = normalize({**MERGED, "examples": [str(i) for i in range(15)]})
+
+    assert record["examples"] == [str(i) for i in range(10)]
+
+
+def test_incomplete_idioms_are_left_out_and_counted():
+    counts = Counter()
+    missing_stats = {"text": "Break a leg", "depiction": ["🦵"]}
+
+    records = list(normalize_all([MERGED, missing_stats], counts))
+
+    assert [record["text"] for record in records] == ["Spill the beans"]
+    assert counts == {"kept": 1, "incomplete": 1}
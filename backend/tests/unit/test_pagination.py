@@ -0,0 +1,32 @@
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.pagination import decode_cursor, encode_cursor
+from app.routers.idioms import idiom_order
+
+
+def test_cursor_round_trip_restores_column_types():
+    order = idiom_order("-frequency", "")
+    idiom_id = uuid4()
+
+    cursor = encode_cursor("-frequency", [3.5, idiom_id])
+
+    assert decode_cursor(cursor, "-frequency", order) == [3.5, idiom_id]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64 !",
+        encode_cursor("frequency", [3.5, str(uuid4())]),
+        encode_cursor("-frequency", [3.5]),
+        encode_cursor("-frequency", [3.5, "not-a-uuid"]),
+    ],
+)
+def test_decode_cursor_rejects_malformed_or_foreign_cursors(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, "-frequency", idiom_order("-frequency", ""))
+
+    assert error.value.status_code == 400
@@ -0,0 +1,175 @@
+import json
+import shutil
+import textwrap
+
+import pytest
+import records
+from load_idioms import LoadedRecords, load
+from pipeline import Pipeline, Stage
+
+# Appends its name to runs.log, then writes the upper-cased input, if any, to its
+# output, as one record through `records` for `.gz` files. `wait_for` makes it wait
+# until another stage has started.
+STAGE_SCRIPT = textwrap.dedent(
+    """
+    import pathlib, sys, time
+    import records
+    name, source, target, wait_for = (sys.argv[1:] + ["", "", ""])[:4]
+    pathlib.Path(f"{name}.started").touch()
+    if wait_for:
+        deadline = time.monotonic() + 10
+        while not pathlib.Path(f"{wait_for}.started").exists():
+            if time.monotonic() > deadline:
+                sys.exit(f"{wait_for} did not run alongside {name}")
+            time.sleep(0.01)
+    with open("runs.log", "a") as f:
+        f.write(name + "\\n")
+    if name == "fail":
+        sys.exit(1)
+    if not source:
+        text = "mined"
+    elif source.endswith(".gz"):
+        text = "".join(record["text"] for record in records.read_records(source))
+    else:
+        text = pathlib.Path(source).read_text()
+    if target.endswith(".gz"):
+        records.write_records(target, [{"text": text.upper()}])
+    elif target:
+        pathlib.Path(target).write_text(text.upper())
+    """
+)
+
+
+@pytest.fixture
+def directory(tmp_path):
+    (tmp_path / "stage.py").write_text(STAGE_SCRIPT)
+    shutil.copy(records.__file__, tmp_path)
+    return tmp_path
+
+
+def stage(name, source="", target="", wait_for="") -> Stage:
+    return Stage(
+        name,
+        "stage.py",
+        args=(name, source, target, wait_for),
+        inputs=(source,) if source else (),
+        outputs=(target,) if target else (),
+    )
+
+
+def runs(directory) -> list[str]:
+    log = directory / "runs.log"
+    return log.read_text().split() if log.exists() else []
+
+
+def make_pipeline(directory, stages) -> Pipeline:
+    return Pipeline(stages, str(directory), str(directory / "state.sqlite"))
+
+
+STAGES = [
+    stage("miner", target="mined.txt"),
+    stage("explainer", "mined.txt", "explained.txt", wait_for="stats"),
+    stage("stats", "mined.txt", "stats.txt", wait_for="explainer"),
+    stage("merge", "explained.txt", "merged.txt"),
+]
+
+
+def test_independent_stages_run_in_parallel(directory):
+    statuses = make_pipeline(directory, STAGES).run()
+
+    assert statuses == dict.fromkeys(["miner", "explainer", "stats", "merge"], "ran")
+    assert runs(directory)[0] == "miner"
+    assert runs(directory)[-1] == "merge"
+    assert (directory / "merged.txt").read_text() == "MINED"
+
+
+def test_unchanged_stages_are_skipped(directory):
+    make_pipeline(directory, STAGES).run()
+    (directory / "runs.log").unlink()
+
+    statuses = make_pipeline(directory, STAGES).run()
+
+    assert set(statuses.values()) == {"skipped"}
+    assert runs(directory) == []
+
+
+def test_changed_input_reruns_downstream_stages(directory):
+    (directory / "seed.txt").write_text("idioms")
+    stages = [stage("miner", "seed.txt", "mined.txt"), *STAGES[1:]]
+    make_pipeline(directory, stages).run()
+    (directory / "runs.log").unlink()
+    (directory / "seed.txt").write_text("more idioms")
+
+    statuses = make_pipeline(directory, stages).run()
+
+    assert set(statuses.values()) == {"ran"}
+    assert (directory / "merged.txt").read_text() == "MORE IDIOMS"
+
+
+@pytest.mark.parametrize("mined", ["mined.txt", "mined.ndjson.gz"])
+def test_stage_whose_output_is_unchanged_skips_its_dependents(directory, mined):
+    stages = [stage("miner", target=mined), stage("merge", mined, "m.txt")]
+    make_pipeline(directory, stages).run()
+    (directory / mined).write_bytes(b"edited by hand")
+
+    statuses = make_pipeline(directory, stages).run()
+
+    # The miner writes its output again, which the merge already computed from
+    assert statuses == {"miner": "ran", "merge": "skipped"}
+
+
+def test_forced_stage_runs_again(directory):
+    stages = [stage("miner", target="mined.txt"), stage("merge", "mined.txt", "m.txt")]
+    make_pipeline(directory, stages).run()
+
+    statuses = make_pipeline(directory, stages).run(force=["miner"])
+
+    assert statuses == {"miner": "ran", "merge": "skipped"}
+    assert runs(directory) == ["miner", "merge", "miner"]
+
+
+def test_failed_stage_blocks_its_dependents(directory):
+    stages = [
+        stage("fail", target="mined.txt"),
+        stage("merge", "mined.txt", "merged.txt"),
+        stage("other", target="other.txt"),
+    ]
+
+    statuses = make_pipeline(directory, stages).run()
+
+    assert statuses == {"fail": "failed", "merge": "blocked", "other": "ran"}
+    assert make_pipeline(directory, stages).run()["fail"] == "failed"
+
+
+def test_cyclic_stages_are_rejected(directory):
+    stages = [stage("a", "b.txt", "a.txt"), stage("b", "a.txt", "b.txt")]
+
+    with pytest.raises(ValueError, match="Cyclic"):
+        make_pipeline(directory, stages).run()
+
+
+def test_load_only_sends_new_records(tmp_path):
+    idioms = tmp_path / "idioms.ndjson"
+    records = [json.dumps({"text": f"idiom {i}"}) for i in range(5)]
+    idioms.write_text("\n".join(records[:3]) + "\n")
+    loaded = LoadedRecords(str(tmp_path / "loaded.sqlite"))
+    bodies = []
+
+    def post(body: bytes) -> dict:
+        bodies.append(body.decode().splitlines())
+        # The API rejects the second line of every batch
+        counts = {"inserted": len(bodies[-1]) - 1, "updated": 0, "unchanged": 0}
+        return {**counts, "rejected": 1, "errors": [{"line": 2, "detail": "bad"}]}
+
+    load(str(idioms), loaded, post, batch_size=2)
+    idioms.write_text("\n".join(records) + "\n")
+    totals = load(str(idioms), loaded, post, batch_size=2)
+
+    assert bodies == [
+        records[:2],
+        records[2:3],
+        [records[1], records[3]],
+        [records[4]],
+    ]
+    assert totals == {"inserted": 1, "updated": 0, "unchanged": 0, "rejected": 2}
+    loaded.close()
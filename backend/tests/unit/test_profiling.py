@@ -0,0 +1,95 @@
+import logging
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+from app import profiling
+from app.metrics import RequestContext, count_statement, current_request
+from app.settings import app_settings
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    event.listen(engine, "before_cursor_execute", count_statement)
+    profiling.instrument_engine(engine)
+    return engine
+
+
+@pytest.fixture
+def request_context():
+    context = RequestContext({"type": "http", "method": "GET", "path": "/idioms/"})
+    token = current_request.set(context)
+    yield context
+    current_request.reset(token)
+
+
+def test_statements_are_tagged_with_their_route(engine, request_context):
+    executed = []
+    event.listen(
+        engine,
+        "after_cursor_execute",
+        lambda _conn, _cursor, statement, *_args: executed.append(statement),
+    )
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT 1")).scalar() == 1
+
+    assert executed == ["SELECT 1 /* route='GET unmatched' */"]
+    assert request_context.statement_counts == {"SELECT 1": 1}
+
+
+def test_slow_statements_are_logged_without_parameter_values(
+    engine, monkeypatch, caplog
+):
+    monkeypatch.setattr(app_settings, "slow_query_seconds", 0)
+
+    with caplog.at_level(logging.WARNING), engine.connect() as connection:
+        connection.execute(text("SELECT :value, :key"), {"value": 42, "key": "secret"})
+
+    [record] = caplog.records
+    assert "Slow query" in record.message
+    assert "['int', 'str']" in record.message
+    assert "secret" not in record.message
+
+
+def test_slow_statements_are_logged_with_parameter_values_on_demand(
+    engine, monkeypatch, caplog
+):
+    monkeypatch.setattr(app_settings, "slow_query_seconds", 0)
+    monkeypatch.setattr(app_settings, "slow_query_log_parameters", True)
+
+    with caplog.at_level(logging.WARNING), engine.connect() as connection:
+        connection.execute(text("SELECT :value"), {"value": 42})
+
+    [record] = caplog.records
+    assert "parameters: (42,)" in record.message
+
+
+def test_failed_statements_do_not_leave_their_timer(engine):
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing"))
+
+        assert connection.info["query_started"] == []
+
+
+def test_requests_over_budget_and_repeated_statements_are_flagged(
+    engine, request_context, monkeypatch, caplog
+):
+    monkeypatch.setattr(app_settings, "sql_statement_budget", 4)
+    monkeypatch.setattr(app_settings, "sql_repeated_statement_threshold", 3)
+
+    with engine.connect() as connection:
+        for id in range(3):
+            connection.execute(text("SELECT :id"), {"id": id})
+        connection.execute(text("SELECT 'other'"))
+        connection.execute(text("SELECT 'last'"))
+    with caplog.at_level(logging.WARNING):
+        profiling.check_request(request_context)
+
+    assert [record.message for record in caplog.records] == [
+        "GET unmatched issued 5 SQL statements, over the budget of 4",
+        "Possible N+1 on GET unmatched, a statement ran 3 times: SELECT ?",
+    ]
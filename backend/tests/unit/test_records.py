@@ -0,0 +1,91 @@
+import gzip
+import io
+import json
+
+import pytest
+import records
+from concat_jsons import concat, record_files
+from records import is_ndjson, iter_json_array, read_records, write_records
+
+RECORDS = [{"text": "Avoir le cafard", "examples": ["🪳", "Il a le cafard"]}]
+
+
+@pytest.mark.parametrize("read_size", [1, 3, 7, 1 << 16])
+def test_iter_json_array_across_chunk_boundaries(monkeypatch, read_size):
+    monkeypatch.setattr(records, "READ_SIZE", read_size)
+    items = [{"text": "a, b", "n": 12345}, [1, 2], 678, "]", None, {"nested": {}}]
+
+    assert list(iter_json_array(io.StringIO(json.dumps(items, indent=2)))) == items
+
+
+@pytest.mark.parametrize("content", ["", "{}", "[1, 2", '[{"text": "a"'])
+def test_iter_json_array_rejects_malformed_input(content):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(content)))
+
+
+@pytest.mark.parametrize(
+    ("name", "expected"),
+    [
+        ("stats.ndjson", True),
+        ("stats.ndjson.gz", True),
+        ("stats.jsonl.zst", True),
+        ("stats.json", False),
+        ("stats.gz", False),
+    ],
+)
+def test_is_ndjson(name, expected):
+    assert is_ndjson(name) is expected
+
+
+@pytest.mark.parametrize("suffix", [".ndjson", ".ndjson.gz"])
+def test_records_round_trip(tmp_path, suffix):
+    path = str(tmp_path / f"stats{suffix}")
+
+    assert write_records(path, iter(RECORDS * 3)) == 3
+    assert list(read_records(path)) == RECORDS * 3
+
+
+def test_gzip_records_are_compressed(tmp_path):
+    path = tmp_path / "stats.ndjson.gz"
+    write_records(str(path), RECORDS)
+
+    assert gzip.decompress(path.read_bytes()).decode().endswith('cafard"]}\n')
+
+
+def test_gzip_records_are_written_identically_over_time(tmp_path, monkeypatch):
+    path = tmp_path / "stats.ndjson.gz"
+    write_records(str(path), RECORDS)
+    written = path.read_bytes()
+    monkeypatch.setattr("time.time", lambda: 2_000_000_000.0)
+
+    write_records(str(path), RECORDS)
+
+    assert path.read_bytes() == written
+
+
+def test_zstd_records_round_trip(tmp_path):
+    pytest.importorskip("zstandard")
+    first, second = str(tmp_path / "a.ndjson.zst"), str(tmp_path / "b.ndjson.zst")
+    write_records(first, RECORDS)
+    write_records(second, [{"text": "b"}])
+    output = str(tmp_path / "all.ndjson.zst")
+
+    concat([first, second], output, workers=1)
+
+    assert list(read_records(output)) == [*RECORDS, {"text": "b"}]
+
+
+def test_concat_mixes_json_chunks_and_records(tmp_path):
+    chunks = tmp_path / "chunks"
+    (chunks / "nested").mkdir(parents=True)
+    (chunks / "chunk_0.json").write_text(json.dumps([{"text": "a"}], indent=4))
+    write_records(str(chunks / "chunk_1.ndjson.gz"), [{"text": "b"}, {"text": "c"}])
+    (chunks / "nested" / "chunk_2.ndjson").write_text('{"text": "d"}')
+    (chunks / "notes.txt").write_text("not records")
+    output = str(tmp_path / "chunks.ndjson.gz")
+
+    concat(record_files(str(chunks)), output, workers=2)
+
+    texts = [record["text"] for record in read_records(output)]
+    assert texts == ["a", "b", "c", "d"]
@@ -0,0 +1,105 @@
+import asyncio
+import json
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.user_idioms import UserIdiomModel
+from app.schemas.idioms import IdiomSchema
+from app.serialization import (
+    IDIOM_FIELDS,
+    encode_idiom_stream,
+    encode_idioms,
+    idiom_columns,
+    project_fields,
+)
+
+
+def idiom_row(text: str) -> list:
+    values = {
+        "id": uuid4(),
+        "text": text,
+        "meaning": "A meaning",
+        "explanation": "An explanation",
+        "examples": ["An example"],
+        "frequency_of_use": 0.5,
+        "category_theme": ["business"],
+        "sentiment": ["neutral"],
+        "context_diversity": ["daily life"],
+        "literal_transparency": 0.25,
+        "translation_difficulty": 0.75,
+        "depiction": ["🌧️"],
+        "alternative_depiction": [],
+        "meaning_depiction": ["💧"],
+        "upvotes": 3,
+        "downvotes": 1,
+        "created_at": datetime(2026, 1, 1, 12, 30),
+        "updated_at": datetime(2026, 1, 2, 8, 0),
+    }
+    return [values[name] for name in IDIOM_FIELDS]
+
+
+def test_encode_idioms_matches_validated_serialization():
+    rows = [idiom_row("Break the ice"), idiom_row("Spill the beans")]
+    state = UserIdiomModel(idiom_id=rows[1][0], favorite=True, vote=-1)
+
+    encoded = encode_idioms(
+        rows, list(IdiomSchema.model_fields), {state.idiom_id: state}
+    )
+
+    expected = [
+        IdiomSchema.model_validate(dict(zip(IDIOM_FIELDS, row, strict=True)))
+        for row in rows
+    ]
+    expected[1] = expected[1].model_copy(update={"favorite": True, "vote": -1})
+    assert json.loads(encoded) == [idiom.model_dump(mode="json") for idiom in expected]
+
+
+def test_encode_idioms_projects_requested_fields():
+    fields = project_fields("text,vote", "full")
+    row = idiom_row("Break the ice")
+    columns = [column.key for column in idiom_columns(fields=fields)]
+
+    encoded = encode_idioms([[row[IDIOM_FIELDS.index(c)] for c in columns]], fields, {})
+
+    assert fields == ["id", "text", "vote"]
+    assert columns == ["id", "text"]
+    assert json.loads(encoded) == [
+        {"id": str(row[0]), "text": "Break the ice", "vote": 0}
+    ]
+
+
+def test_project_fields_uses_card_view_and_rejects_unknown_fields():
+    assert project_fields(None, "card") == [
+        "id", "text", "meaning", "depiction", "upvotes", "downvotes", "favorite", "vote"
+    ]  # fmt: skip
+    with pytest.raises(HTTPException) as error:
+        project_fields("text,password", "full")
+    assert error.value.status_code == 400
+
+
+def collect_stream(partitions: list[list]) -> list[bytes]:
+    async def stream() -> list[bytes]:
+        async def source():
+            for rows in partitions:
+                yield rows
+
+        return [chunk async for chunk in encode_idiom_stream(source(), IDIOM_FIELDS)]
+
+    return asyncio.run(stream())
+
+
+def test_encode_idiom_stream_joins_partitions_into_one_list():
+    rows = [idiom_row(text) for text in ["Break the ice", "Piece of cake", "Spill"]]
+
+    chunks = collect_stream([rows[:2], [], rows[2:]])
+
+    assert len(chunks) == 3
+    assert b"".join(chunks) == encode_idioms(rows, IDIOM_FIELDS, {})
+
+
+def test_encode_idiom_stream_of_empty_table():
+    assert json.loads(b"".join(collect_stream([]))) == []
+    assert json.loads(b"".join(collect_stream([[]]))) == []
@@ -0,0 +1,59 @@
+import asyncio
+from uuid import uuid4
+
+from app import database
+from app.votes import VoteBuffer
+
+
+class Session:
+    """Session whose statements wait for `release`, recording what was committed"""
+
+    def __init__(self, release: asyncio.Event, committed: list):
+        self.release = release
+        self.committed = committed
+        self.executed = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_args):
+        return False
+
+    async def execute(self, _statement, params):
+        await self.release.wait()
+        self.executed = params
+
+    async def commit(self):
+        self.committed.append(self.executed)
+
+
+def test_stop_writes_the_votes_of_a_cancelled_flush(monkeypatch):
+    release = asyncio.Event()
+    committed = []
+    monkeypatch.setattr(
+        database, "AsyncSessionLocal", lambda: Session(release, committed)
+    )
+    votes = [(uuid4(), uuid4(), 1), (uuid4(), uuid4(), -1)]
+
+    async def scenario():
+        buffer = VoteBuffer(interval=0)
+        for vote in votes:
+            buffer.add(*vote)
+        buffer.start()
+        # Let the background flush take the votes and block on the database
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert buffer._pending == {}
+
+        stop = asyncio.create_task(buffer.stop())
+        await asyncio.sleep(0)
+        release.set()
+        await stop
+
+    asyncio.run(scenario())
+
+    (params,) = committed
+    written = zip(
+        params["user_ids"], params["idiom_ids"], params["values"], strict=True
+    )
+    assert set(written) == set(votes)